@@ -0,0 +1,218 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from googleapiclient.errors import HttpError
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from .quota_service import ContadorEnMemoria, contador_cuota, fraccion_dia
+import hashlib
+
+INTERACTIVA = 'interactiva'  # Petición de un usuario esperando la página
+FONDO = 'fondo'  # Workers, refrescos de caché, sincronizaciones
+
+# Unidades por operación (https://developers.google.com/youtube/v3/determine_quota_cost)
+COSTOS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'channels.list': 1,
+    'playlists.list': 1,
+    'playlistItems.list': 1,
+    'commentThreads.list': 1,
+    'videoCategories.list': 1,
+    'videos.insert': 1600,
+    'videos.update': 50,
+    'videos.delete': 50,
+    'videos.rate': 50,
+    'thumbnails.set': 50,
+    'playlists.insert': 50,
+    'playlists.update': 50,
+    'playlists.delete': 50,
+    'playlistItems.insert': 50,
+    'playlistItems.update': 50,
+    'playlistItems.delete': 50,
+    'captions.insert': 400,
+    'captions.update': 450,
+    'captions.download': 200,
+}
+COSTO_ESCRITURA = 50  # Operaciones de escritura no listadas
+COSTO_LECTURA = 1  # Lecturas (*.list) no listadas
+
+CACHE_ETAG = 'youtube_etag_{firma}'  # {'etag', 'cuerpo'} de la última respuesta 200 de cada petición
+PARAMETROS_SIN_FIRMA = {'key', 'alt'}  # No cambian la respuesta: la misma firma para cualquier API key
+
+# ContextVar y no threading.local: cada hilo nuevo arranca en INTERACTIVA igual que antes,
+# pero el valor sí viaja por sync_to_async / async_to_sync y entre tareas de asyncio
+_prioridad = ContextVar('prioridad_youtube', default=INTERACTIVA)
+
+
+class CuotaExcedida(Exception):
+    """La llamada no se hizo: no hay cuota para ella en este momento"""
+
+    def __init__(self, operacion, prioridad, reintentar_en=None):
+        self.operacion = operacion
+        self.prioridad = prioridad
+        self.reintentar_en = reintentar_en  # Segundos hasta que podría admitirse (None = mañana)
+        super().__init__(f"Cuota de YouTube insuficiente para {operacion} ({prioridad})")
+
+
+def costo(operacion):
+    if operacion in COSTOS:
+        return COSTOS[operacion]
+    return COSTO_LECTURA if operacion.endswith('.list') else COSTO_ESCRITURA
+
+
+def prioridad_actual():
+    return _prioridad.get()
+
+
+@contextmanager
+def segundo_plano():
+    """Las llamadas hechas dentro del bloque (en este hilo o esta tarea) cuentan como FONDO"""
+    token = _prioridad.set(FONDO)
+    try:
+        yield
+    finally:
+        _prioridad.reset(token)
+
+
+@contextmanager
+def cuota_simulada():
+    """
+    Dentro del bloque (en todos los hilos) se cobra en un ContadorEnMemoria
+
+    Para los benchmarks contra el servidor falso: sus llamadas no gastan
+    cuota real y no deben sumarse a CuotaDiaria / QuotaUsage del día.
+    """
+    global contador_cuota
+    real, contador_cuota = contador_cuota, ContadorEnMemoria()
+    try:
+        yield contador_cuota
+    finally:
+        contador_cuota = real
+
+
+def _tope(prioridad):
+    """Total del día que puede alcanzar una llamada de esta prioridad"""
+    config = settings.YOUTUBE_QUOTA_CONFIG
+    if prioridad == INTERACTIVA:
+        return config['daily_limit']
+    presupuesto = config['daily_limit'] - config['reserva_interactiva']
+    return presupuesto * min(1.0, fraccion_dia() + config['margen_ritmo'])
+
+
+def admitir(operacion, prioridad=None, usuario=None):
+    """
+    Decide si una llamada cabe en la cuota y la cobra; si no, lanza CuotaExcedida
+
+    - INTERACTIVA: se admite mientras quede cuota en el día.
+    - FONDO: nunca toca `reserva_interactiva` y además va a ritmo: a una
+      fracción f del día solo puede haber gastado (f + margen_ritmo) de su
+      presupuesto, así la cuota se reparte en el día en vez de agotarse
+      por la mañana.
+
+    La decisión y el cobro son un solo UPDATE condicional sobre CuotaDiaria
+    (contador_cuota.reservar), atómico entre hilos y entre procesos.
+    """
+    config = settings.YOUTUBE_QUOTA_CONFIG
+    prioridad = prioridad or prioridad_actual()
+    unidades = costo(operacion)
+    admitida, total = contador_cuota.reservar(operacion, unidades, _tope(prioridad), usuario)
+    if admitida:
+        return unidades
+
+    usado = total + unidades
+    presupuesto = config['daily_limit'] - config['reserva_interactiva']
+    if prioridad == INTERACTIVA or usado > presupuesto:
+        raise CuotaExcedida(operacion, prioridad)  # Sin cuota (o lo que queda es para los usuarios)
+
+    # Va adelantado a su ritmo: se difiere hasta que el reloj lo alcance
+    fraccion_necesaria = usado / presupuesto - config['margen_ritmo']
+    raise CuotaExcedida(operacion, prioridad, reintentar_en=(fraccion_necesaria - fraccion_dia()) * 86400)
+
+
+def cobrar(operacion, prioridad=None, usuario=None):
+    """Admite y registra una operación que no pasa por ejecutar() (p. ej. next_chunk)"""
+    return admitir(operacion, prioridad, usuario)
+
+
+def ejecutar(request, prioridad=None, usuario=None):
+    """
+    Punto único de salida hacia la YouTube API
+
+    Cobra la operación antes de despacharla (YouTube también cobra las
+    llamadas que fallan) y solo entonces llama a request.execute().
+
+    Args:
+        request: HttpRequest de googleapiclient (p. ej. youtube.videos().list(...))
+        prioridad: INTERACTIVA o FONDO (por defecto la del hilo, ver segundo_plano)
+        usuario: Usuario al que se le atribuye el gasto
+
+    Raises:
+        CuotaExcedida: si la llamada no cabe; el llamador debe servir lo que tenga en caché/BD
+    """
+    operacion = request.methodId.split('.', 1)[-1]  # youtube.videos.list → videos.list
+    cobrar(operacion, prioridad, usuario)
+    return request.execute()
+
+
+def firma_peticion(uri):
+    """
+    Identifica una lectura por ruta y parámetros (ordenados, sin key ni alt)
+
+    Así el cliente síncrono y el async comparten el ETag de la misma consulta.
+    """
+    partes = urlsplit(uri)
+    parametros = sorted((k, v) for k, v in parse_qsl(partes.query) if k not in PARAMETROS_SIN_FIRMA)
+    return hashlib.md5(f"{partes.path}?{urlencode(parametros)}".encode()).hexdigest()
+
+
+def etag_guardado(uri):
+    """{'etag', 'cuerpo'} guardado para esta petición, o None"""
+    if not settings.YOUTUBE_QUOTA_CONFIG['peticiones_condicionales'] or 'mine=true' in uri:
+        return None  # Depende de quién pregunta y la firma no incluye al usuario
+    return cache.get(CACHE_ETAG.format(firma=firma_peticion(uri)))
+
+
+def guardar_etag(uri, respuesta):
+    """Recuerda el etag del cuerpo (las respuestas *.list lo traen) para el próximo If-None-Match"""
+    if not settings.YOUTUBE_QUOTA_CONFIG['peticiones_condicionales'] or 'mine=true' in uri:
+        return
+    etag = respuesta.get('etag') if isinstance(respuesta, dict) else None
+    if etag:
+        cache.set(
+            CACHE_ETAG.format(firma=firma_peticion(uri)), {'etag': etag, 'cuerpo': respuesta},
+            timeout=settings.YOUTUBE_QUOTA_CONFIG['etag_ttl']
+        )
+
+
+def ejecutar_condicional(request, prioridad=None, usuario=None, guardar=True):
+    """
+    Como ejecutar(), pero con If-None-Match si ya se tiene el ETag de la petición
+
+    Un 304 no trae cuerpo: se devuelve el guardado sin descargarlo ni
+    parsearlo de nuevo, y `modificada` le dice al llamador que puede
+    saltarse sus escrituras. La cuota se cobra igual (YouTube cobra la
+    llamada); lo que se ahorra es ancho de banda, parseo y escrituras.
+
+    Con guardar=False el ETag nuevo no se guarda: el llamador llama a
+    guardar_etag(request.uri, respuesta) cuando ya persistió la respuesta.
+    Si lo guardara antes y su escritura fallara, las próximas corridas
+    recibirían 304 y nunca escribirían esas filas.
+
+    Returns:
+        tuple: (respuesta, modificada)
+    """
+    operacion = request.methodId.split('.', 1)[-1]
+    guardado = etag_guardado(request.uri)
+    if guardado:
+        request.headers['If-None-Match'] = guardado['etag']
+    cobrar(operacion, prioridad, usuario)
+    try:
+        respuesta = request.execute()
+    except HttpError as e:
+        if guardado and e.resp.status == 304:
+            return guardado['cuerpo'], False
+        raise
+    if guardar:
+        guardar_etag(request.uri, respuesta)
+    return respuesta, True
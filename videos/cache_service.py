@@ -0,0 +1,366 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from concurrent.futures import Future
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from django.db import connection
+from .api_gateway import segundo_plano
+import threading
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+CLAVE_CONTADOR = 'youtube_cache_{tipo}_{espacio}'  # hits / misses por espacio de nombres
+ESPERA_MAXIMA = 30  # Segundos que un proceso espera la respuesta que otro ya está pidiendo
+
+_en_vuelo_async = weakref.WeakKeyDictionary()  # loop -> {clave: Task} (single-flight de las corrutinas)
+
+
+class CacheYouTube:
+    """
+    Caché compartida para respuestas de la YouTube API
+
+    Usa el backend configurado en settings.CACHES (compartido entre workers),
+    respeta YOUTUBE_QUOTA_CONFIG['enable_cache'] y lleva contadores de
+    aciertos/fallos para medir cuánta cuota se ahorra.
+
+    Cada entrada tiene dos TTL (stale-while-revalidate):
+        - cache_soft_ttl: pasado este tiempo se sirve el dato viejo al instante
+          y se refresca en segundo plano.
+        - cache_ttl (duro): pasado este tiempo la entrada expira y la siguiente
+          petición espera a la API.
+    """
+
+    _registro = {}  # espacio -> unidades de cuota por llamada (para estadísticas)
+    _en_vuelo = {}  # clave -> Future de la llamada a la API en curso (single-flight)
+    _lock_en_vuelo = threading.Lock()
+
+    def __init__(self, espacio, unidades_por_llamada=1):
+        self.espacio = espacio  # Prefijo de las claves: search, videos, ...
+        self.unidades_por_llamada = unidades_por_llamada
+        CacheYouTube._registro[espacio] = unidades_por_llamada
+
+    @property
+    def habilitada(self):
+        return settings.YOUTUBE_QUOTA_CONFIG.get('enable_cache', True)
+
+    @property
+    def ttl(self):
+        """TTL duro: la entrada desaparece de la caché"""
+        return settings.YOUTUBE_QUOTA_CONFIG.get('cache_ttl', 3600)
+
+    @property
+    def ttl_suave(self):
+        """TTL suave: la entrada se sirve pero se refresca en segundo plano"""
+        return settings.YOUTUBE_QUOTA_CONFIG.get('cache_soft_ttl', self.ttl)
+
+    def construir_clave(self, **parametros):
+        """Clave estable a partir de TODOS los parámetros de la llamada"""
+        firma = json.dumps(parametros, sort_keys=True, default=str)
+        return f"youtube_{self.espacio}_{hashlib.md5(firma.encode()).hexdigest()}"
+
+    def _contar(self, tipo, cantidad=1):
+        if not cantidad:
+            return
+        clave = CLAVE_CONTADOR.format(tipo=tipo, espacio=self.espacio)
+        try:
+            cache.incr(clave, cantidad)
+        except ValueError:  # El contador aún no existe
+            cache.add(clave, 0, timeout=None)
+            cache.incr(clave, cantidad)
+
+    def _leer(self, clave):
+        """Devuelve (valor, vencido) sin tocar los contadores"""
+        if not self.habilitada:
+            return None, False
+
+        entrada = cache.get(clave)
+        if entrada is None:
+            return None, False
+        vencido = time.time() - entrada['guardado'] > entrada['ttl_suave']
+        return entrada['valor'], vencido
+
+    def obtener(self, clave):
+        """Devuelve el valor cacheado (aunque esté vencido) o None, registrando hit/miss"""
+        if not self.habilitada:
+            return None
+
+        valor, _ = self._leer(clave)
+        self._contar('hits' if valor is not None else 'misses')
+        return valor
+
+    def obtener_varios(self, claves):
+        """
+        Lee varias claves con una sola lectura a la caché
+
+        Las entradas que pasaron su TTL suave se devuelven igual (se sirven al
+        instante) y además se listan en `vencidas` para que quien llama las
+        refresque con revalidar_varios, como hace obtener_o_calcular.
+
+        Returns:
+            tuple: ({clave: valor} de las encontradas, [claves vencidas])
+        """
+        if not self.habilitada or not claves:
+            return {}, []
+
+        ahora = time.time()
+        encontradas, vencidas = {}, []
+        for clave, entrada in cache.get_many(claves).items():
+            encontradas[clave] = entrada['valor']
+            if ahora - entrada['guardado'] > entrada['ttl_suave']:
+                vencidas.append(clave)
+        self._contar('hits', len(encontradas))
+        self._contar('misses', len(claves) - len(encontradas))
+        return encontradas, vencidas
+
+    def guardar_varios(self, valores, timeout=None):
+        """Guarda {clave: valor} con una sola escritura a la caché"""
+        if self.habilitada and valores:
+            timeout = timeout or self.ttl
+            entrada = {'guardado': time.time(), 'ttl_suave': min(self.ttl_suave, timeout)}
+            cache.set_many({clave: {**entrada, 'valor': valor} for clave, valor in valores.items()}, timeout=timeout)
+
+    def guardar(self, clave, valor, timeout=None):
+        if self.habilitada:
+            timeout = timeout or self.ttl
+            entrada = {
+                'valor': valor,
+                'guardado': time.time(),
+                'ttl_suave': min(self.ttl_suave, timeout),
+            }
+            cache.set(clave, entrada, timeout=timeout)
+
+    def obtener_o_calcular(self, clave, calcular, timeout=None):
+        """
+        Lee de caché y, si falta, ejecuta `calcular()` una sola vez
+
+        Las peticiones idénticas que fallan la caché al mismo tiempo se agrupan
+        (single-flight): dentro del proceso esperan el mismo Future y entre
+        procesos un candado en la caché compartida deja pasar solo a uno.
+        Si la entrada pasó su TTL suave se devuelve igual y se refresca en
+        un hilo aparte.
+
+        Args:
+            clave: Clave construida con construir_clave()
+            calcular: Función sin argumentos que llama a la API (debe poder
+                ejecutarse desde otro hilo)
+            timeout: TTL duro opcional (por defecto cache_ttl)
+        """
+        valor, vencido = self._leer(clave)
+        if self.habilitada:
+            self._contar('hits' if valor is not None else 'misses')
+        if valor is not None:
+            if vencido:
+                self._revalidar_en_segundo_plano(clave, calcular, timeout)
+            return valor
+
+        with self._lock_en_vuelo:
+            futuro = self._en_vuelo.get(clave)
+            es_lider = futuro is None
+            if es_lider:
+                futuro = self._en_vuelo[clave] = Future()
+
+        if not es_lider:
+            return futuro.result(timeout=ESPERA_MAXIMA)  # Otro hilo ya está llamando a la API
+
+        try:
+            valor = self._calcular_con_candado(clave, calcular, timeout)
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(valor)
+            return valor
+        finally:
+            with self._lock_en_vuelo:
+                self._en_vuelo.pop(clave, None)
+
+    def _calcular_con_candado(self, clave, calcular, timeout):
+        """Llama a la API solo si ningún otro proceso lo está haciendo ya"""
+        valor, _ = self._leer(clave)  # Un líder anterior pudo terminar justo ahora
+        if valor is not None:
+            return valor
+
+        candado = f"{clave}_lock"
+        if self.habilitada and not cache.add(candado, 1, timeout=ESPERA_MAXIMA):
+            limite = time.monotonic() + ESPERA_MAXIMA
+            while time.monotonic() < limite:
+                time.sleep(0.05)
+                valor, _ = self._leer(clave)
+                if valor is not None:
+                    return valor
+            logger.warning(f"⏱️ Tiempo de espera agotado para {clave}; se llama a la API")
+            candado = None  # No es nuestro, no lo borramos
+
+        try:
+            valor = calcular()
+            self.guardar(clave, valor, timeout)
+            return valor
+        finally:
+            if self.habilitada and candado:
+                cache.delete(candado)
+
+    async def aobtener_o_calcular(self, clave, acalcular, timeout=None):
+        """
+        Versión async de obtener_o_calcular (cliente de youtube_async)
+
+        Mismas reglas: hit, stale-while-revalidate y single-flight. Las
+        corrutinas del mismo proceso que piden la misma clave esperan una
+        sola tarea; entre procesos decide el mismo candado en la caché. El
+        refresco de una entrada vencida corre en un hilo con su propio loop,
+        así sobrevive aunque el loop de la petición se cierre (WSGI).
+
+        Args:
+            acalcular: Función sin argumentos que devuelve la corrutina que llama a la API
+        """
+        valor, vencido = await sync_to_async(self._leer)(clave)
+        if self.habilitada:
+            await sync_to_async(self._contar)('hits' if valor is not None else 'misses')
+        if valor is not None:
+            if vencido:
+                async def refrescar():
+                    from .youtube_async import cerrar_http  # Import diferido: youtube_async importa este módulo
+                    try:
+                        return await acalcular()
+                    finally:
+                        await cerrar_http()  # El loop del hilo de refresco muere con él: su pool también
+
+                await sync_to_async(self._revalidar_en_segundo_plano)(clave, async_to_sync(refrescar), timeout)
+            return valor
+
+        en_vuelo = _en_vuelo_async.setdefault(asyncio.get_running_loop(), {})
+        tarea = en_vuelo.get(clave)
+        if tarea is None:
+            tarea = en_vuelo[clave] = asyncio.ensure_future(self._acalcular_con_candado(clave, acalcular, timeout))
+            tarea.add_done_callback(lambda _: en_vuelo.pop(clave, None))
+        return await asyncio.shield(tarea)  # Si una petición se cancela, las demás siguen esperando
+
+    async def _acalcular_con_candado(self, clave, acalcular, timeout):
+        valor, _ = await sync_to_async(self._leer)(clave)
+        if valor is not None:
+            return valor
+
+        candado = f"{clave}_lock"
+        if self.habilitada and not await cache.aadd(candado, 1, timeout=ESPERA_MAXIMA):
+            limite = time.monotonic() + ESPERA_MAXIMA
+            while time.monotonic() < limite:
+                await asyncio.sleep(0.05)
+                valor, _ = await sync_to_async(self._leer)(clave)
+                if valor is not None:
+                    return valor
+            logger.warning(f"⏱️ Tiempo de espera agotado para {clave}; se llama a la API")
+            candado = None
+
+        try:
+            valor = await acalcular()
+            await sync_to_async(self.guardar)(clave, valor, timeout)
+            return valor
+        finally:
+            if self.habilitada and candado:
+                await cache.adelete(candado)
+
+    def _revalidar_en_segundo_plano(self, clave, calcular, timeout):
+        """Refresca una entrada vencida sin bloquear a quien la pidió"""
+        with self._lock_en_vuelo:
+            if clave in self._en_vuelo:
+                return  # Ya se está refrescando en este proceso
+            futuro = self._en_vuelo[clave] = Future()
+
+        candado = f"{clave}_lock"
+        if not cache.add(candado, 1, timeout=ESPERA_MAXIMA):
+            with self._lock_en_vuelo:  # Otro proceso ya la está refrescando
+                self._en_vuelo.pop(clave, None)
+            futuro.cancel()
+            return
+
+        def refrescar():
+            try:
+                with segundo_plano():  # Nadie espera este refresco: compite como tarea de fondo
+                    valor = calcular()
+                self.guardar(clave, valor, timeout)
+                futuro.set_result(valor)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo refrescar {clave}: {e}")
+                futuro.set_exception(e)
+            finally:
+                cache.delete(candado)
+                with self._lock_en_vuelo:
+                    self._en_vuelo.pop(clave, None)
+                connection.close()  # La de este hilo (cobro de cuota, escrituras): muere con él
+
+        threading.Thread(target=refrescar, daemon=True).start()
+
+
+    def revalidar_varios(self, claves, calcular, timeout=None):
+        """
+        Refresca en segundo plano varias entradas vencidas con una sola llamada
+
+        Versión por lotes de _revalidar_en_segundo_plano (para obtener_varios):
+        se saltan las claves que ya se están refrescando en este u otro
+        proceso y el resto va junto a un solo `calcular`, en un hilo y como
+        tarea de fondo.
+
+        Args:
+            claves: Claves vencidas
+            calcular: Función (claves) -> {clave: valor nuevo}; las que no
+                devuelva se dejan como están
+        """
+        propias = {}
+        with self._lock_en_vuelo:
+            for clave in claves:
+                if clave not in self._en_vuelo:
+                    propias[clave] = self._en_vuelo[clave] = Future()
+
+        for clave in list(propias):
+            if not cache.add(f"{clave}_lock", 1, timeout=ESPERA_MAXIMA):
+                futuro = propias.pop(clave)  # Otro proceso ya la está refrescando
+                with self._lock_en_vuelo:
+                    self._en_vuelo.pop(clave, None)
+                futuro.cancel()
+        if not propias:
+            return
+
+        def refrescar():
+            try:
+                with segundo_plano():  # Nadie espera este refresco: compite como tarea de fondo
+                    valores = calcular(list(propias))
+                self.guardar_varios(valores, timeout)
+                for clave, futuro in propias.items():
+                    futuro.set_result(valores.get(clave))
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron refrescar {len(propias)} entradas de {self.espacio}: {e}")
+                for futuro in propias.values():
+                    futuro.set_exception(e)
+            finally:
+                cache.delete_many([f"{clave}_lock" for clave in propias])
+                with self._lock_en_vuelo:
+                    for clave in propias:
+                        self._en_vuelo.pop(clave, None)
+                connection.close()  # La de este hilo (cobro de cuota, escrituras): muere con él
+
+        threading.Thread(target=refrescar, daemon=True).start()
+
+
+def estadisticas_cache():
+    """
+    Contadores de la caché por espacio de nombres
+
+    Returns:
+        dict: {espacio: {'hits', 'misses', 'ratio', 'unidades_ahorradas'}}
+    """
+    resultado = {}
+    for espacio, unidades in CacheYouTube._registro.items():
+        hits = cache.get(CLAVE_CONTADOR.format(tipo='hits', espacio=espacio), 0)
+        misses = cache.get(CLAVE_CONTADOR.format(tipo='misses', espacio=espacio), 0)
+        total = hits + misses
+        resultado[espacio] = {
+            'hits': hits,
+            'misses': misses,
+            'ratio': round(hits / total, 3) if total else 0.0,
+            'unidades_ahorradas': round(hits * unidades, 2),  # Cada hit es una llamada (o parte de una) que no se hizo
+        }
+    return resultado
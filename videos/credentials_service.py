@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from cryptography.fernet import Fernet, MultiFernet
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import Request
+from django.conf import settings  # Configuración
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+import threading
+import httplib2
+import logging
+
+logger = logging.getLogger(__name__)
+
+SESION_CREDENCIALES = 'youtube_credentials'  # Clave en request.session
+
+_cifrador = None
+_lock_cifrador = threading.Lock()
+
+
+def obtener_cifrador():
+    """MultiFernet único por proceso construido con settings.FERNET_KEYS"""
+    global _cifrador
+    if _cifrador is None:
+        with _lock_cifrador:
+            if _cifrador is None:
+                claves = [clave for clave in settings.FERNET_KEYS if clave]
+                if not claves:
+                    raise ImproperlyConfigured('Define FERNET_KEYS para cifrar los tokens de YouTube')
+                _cifrador = MultiFernet([Fernet(clave) for clave in claves])
+    return _cifrador
+
+
+def cifrar(texto):
+    return obtener_cifrador().encrypt(texto.encode()).decode()
+
+
+def descifrar(texto):
+    return obtener_cifrador().decrypt(texto.encode()).decode()
+
+
+def rotar(texto):
+    """Vuelve a cifrar con la clave principal (tras agregar una clave nueva)"""
+    return obtener_cifrador().rotate(texto.encode()).decode()
+
+
+def credenciales_a_datos(credentials):
+    """Credentials → dict serializable (sesión, trabajos de subida)"""
+    return {
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None,
+    }
+
+
+def credenciales_desde_datos(datos):
+    """dict de credenciales_a_datos (o el formato anterior, sin expiry) → Credentials"""
+    datos = dict(datos)
+    expiry = datos.pop('expiry', None)
+    credentials = Credentials(**datos)
+    if expiry:
+        credentials.expiry = datetime.fromisoformat(expiry)  # UTC sin tzinfo, como google-auth
+    return credentials
+
+
+class GestorCredenciales:
+    """
+    Credenciales OAuth vivas, compartidas entre peticiones del proceso
+
+    - LRU de objetos Credentials por clave (usuario o sesión): no se
+      reconstruyen en cada petición.
+    - Un hilo en segundo plano renueva los access tokens que están por
+      vencer (`margen_refresco`), así ninguna petición paga el refresh.
+    """
+
+    def __init__(self):
+        self._credenciales = OrderedDict()  # clave -> Credentials
+        self._persistir = {}  # clave -> función a llamar tras un refresh
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    @property
+    def config(self):
+        return settings.YOUTUBE_CREDENTIALS_CONFIG
+
+    def obtener(self, clave, fabrica, persistir=None):
+        """
+        Devuelve las Credentials de `clave`, creándolas con `fabrica()` si faltan
+
+        Args:
+            clave: Identificador estable (p. ej. 'usuario:3', 'sesion:abc')
+            fabrica: Función sin argumentos que construye las Credentials
+            persistir: Función opcional que recibe las Credentials tras renovarse
+        """
+        with self._lock:
+            credentials = self._credenciales.get(clave)
+            if credentials is not None:
+                self._credenciales.move_to_end(clave)
+                return credentials
+
+        credentials = fabrica()
+        with self._lock:
+            credentials = self._credenciales.setdefault(clave, credentials)
+            self._credenciales.move_to_end(clave)
+            if persistir:
+                self._persistir[clave] = persistir
+            while len(self._credenciales) > self.config['max_en_memoria']:
+                viejo, _ = self._credenciales.popitem(last=False)
+                self._persistir.pop(viejo, None)
+        self._iniciar_refresco()
+        return credentials
+
+    def olvidar(self, clave):
+        with self._lock:
+            self._credenciales.pop(clave, None)
+            self._persistir.pop(clave, None)
+
+    def para_sesion(self, request):
+        """Credentials del usuario de la sesión (o None si no conectó YouTube)"""
+        datos = request.session.get(SESION_CREDENCIALES)
+        if not datos:
+            return None
+        if request.user.is_authenticated:
+            clave = f"usuario:{request.user.pk}"
+        else:
+            clave = f"sesion:{request.session.session_key}"
+        credentials = self.obtener(clave, lambda: credenciales_desde_datos(datos))
+        if credentials.token != datos.get('token'):
+            request.session[SESION_CREDENCIALES] = credenciales_a_datos(credentials)  # Renovado en segundo plano
+        return credentials
+
+    def guardar_en_sesion(self, request, credentials):
+        """Guarda credenciales recién autorizadas y descarta las vivas anteriores"""
+        request.session[SESION_CREDENCIALES] = credenciales_a_datos(credentials)
+        if request.user.is_authenticated:
+            self.olvidar(f"usuario:{request.user.pk}")
+        self.olvidar(f"sesion:{request.session.session_key}")
+
+    def para_usuario(self, user):
+        """Credentials guardadas en YouTubeToken (para workers sin sesión)"""
+        from .models import YouTubeToken  # Import diferido: models usa cifrar/descifrar
+
+        def fabrica():
+            token = YouTubeToken.objects.get(user=user)
+            return Credentials(
+                token=token.access_token,
+                refresh_token=token.decrypt_refresh_token(),
+                token_uri='https://oauth2.googleapis.com/token',
+                client_id=settings.GOOGLE_CLIENT_ID,
+                client_secret=settings.GOOGLE_CLIENT_SECRET,
+                expiry=timezone.make_naive(token.token_expiry, dt_timezone.utc) if token.token_expiry else None,
+            )
+
+        def persistir(credentials):
+            YouTubeToken.objects.filter(user=user).update(
+                access_token=credentials.token,
+                token_expiry=timezone.make_aware(credentials.expiry, dt_timezone.utc),
+            )
+
+        return self.obtener(f"usuario:{user.pk}", fabrica, persistir)
+
+    def _por_vencer(self, credentials):
+        if not credentials.refresh_token:
+            return False
+        if credentials.expiry is None:
+            return not credentials.token
+        margen = timedelta(seconds=self.config['margen_refresco'])
+        return credentials.expiry - margen <= datetime.utcnow()
+
+    def refrescar_pendientes(self):
+        """Renueva los access tokens que vencen dentro de `margen_refresco`"""
+        with self._lock:
+            candidatos = [(clave, c) for clave, c in self._credenciales.items() if self._por_vencer(c)]
+
+        renovadas = 0
+        for clave, credentials in candidatos:
+            try:
+                credentials.refresh(Request(httplib2.Http()))
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo renovar el token de {clave}: {e}")
+                continue
+            renovadas += 1
+            persistir = self._persistir.get(clave)
+            if persistir:
+                persistir(credentials)
+        return renovadas
+
+    def _iniciar_refresco(self):
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._bucle_refresco, name='refresco-tokens', daemon=True)
+        self._hilo.start()
+
+    def _bucle_refresco(self):
+        evento = threading.Event()
+        while not evento.wait(self.config['intervalo_refresco']):
+            try:
+                self.refrescar_pendientes()
+            except Exception:
+                logger.exception("Error en el hilo de refresco de tokens")
+
+
+gestor_credenciales = GestorCredenciales()  # Uno por proceso
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from django.conf import settings  # Configuración
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .api_gateway import ejecutar, CuotaExcedida
+from .cache_service import CacheYouTube
+from .search_service import invalidar_indice
+from .tag_service import guardar_etiquetas
+from .metrics_service import CAMPOS_METRICAS, asignar_duracion, calcular_metricas, vistas_por_dia_desviada
+from .models import Video
+from .sync_service import obtener_estadisticas_dashboard
+from .youtube_client import obtener_cliente
+import logging
+
+logger = logging.getLogger(__name__)
+
+cache_detalle = CacheYouTube('detalle', unidades_por_llamada=1)  # Un videos.list por página de detalle
+
+
+def _frescura():
+    """Ventana en la que una fila local se considera actual (sin llamar a la API)"""
+    return timedelta(seconds=settings.YOUTUBE_QUOTA_CONFIG.get('detail_freshness', 900))
+
+
+def _es_fresco(video):
+    """La fila es actual si se editó, o el worker de estadísticas la revisó, hace poco"""
+    revisado = video.actualizado
+    ultima_sync = obtener_estadisticas_dashboard()['ultima_sincronizacion']
+    if ultima_sync and ultima_sync > revisado:
+        revisado = ultima_sync
+    return timezone.now() - revisado < _frescura()
+
+
+def _a_contexto(video):
+    """Datos que necesita detalle_video.html a partir de una fila Video"""
+    return {
+        'youtube_id': video.youtube_id,
+        'titulo': video.titulo,
+        'descripcion': video.descripcion,
+        'vistas': video.vistas,
+        'likes': video.likes,
+        'comentarios': video.comentarios,
+        'duracion': video.duracion,
+        'fecha_publicacion': video.fecha_publicacion,
+        'canal_nombre': video.canal_nombre,
+        'canal_id': video.canal_id,
+        'categoria': video.get_categoria_display(),
+        'etiquetas': [tag for tag in video.etiquetas.split(',') if tag],
+        'actualizado': video.actualizado,
+        'get_embed_url': video.get_embed_url(),
+        'url_video': f"https://www.youtube.com/watch?v={video.youtube_id}",
+    }
+
+
+def _consultar_api(video_id, credentials=None):
+    """videos.list del video; devuelve una instancia Video sin guardar (o None)"""
+    youtube = obtener_cliente(credentials) if credentials is not None else obtener_cliente()
+    res = ejecutar(youtube.videos().list(
+        part='snippet,statistics,contentDetails',
+        id=video_id
+    ))
+
+    if not res['items']:
+        return None
+
+    item = res['items'][0]
+    snippet = item['snippet']
+    estadisticas = item.get('statistics', {})
+    video = Video(
+        youtube_id=video_id,
+        titulo=snippet['title'],
+        descripcion=snippet['description'],
+        url_video=f"https://www.youtube.com/watch?v={video_id}",
+        canal_id=snippet['channelId'],
+        canal_nombre=snippet['channelTitle'],
+        fecha_publicacion=parse_datetime(snippet['publishedAt']),
+        vistas=int(estadisticas.get('viewCount', 0)),
+        likes=int(estadisticas.get('likeCount', 0)),
+        comentarios=int(estadisticas.get('commentCount', 0)),
+        etiquetas=','.join(snippet.get('tags', [])),
+        actualizado=timezone.now(),
+    )
+    return asignar_duracion(video, item.get('contentDetails', {}).get('duration', ''))
+
+
+def _clave(video_id, credentials=None):
+    """Clave de cache_detalle: la pública (API key) o la del usuario de esas credenciales"""
+    if credentials is None:
+        return cache_detalle.construir_clave(id=video_id)
+    return cache_detalle.construir_clave(id=video_id, usuario=credentials.refresh_token or credentials.token)
+
+
+def obtener_detalle_video(video_id, credentials=None):
+    """
+    Detalle de un video con lectura en capas: caché → tabla Video → API
+
+    Solo se gasta cuota cuando el video no está en la BD o su fila es más
+    vieja que YOUTUBE_QUOTA_CONFIG['detail_freshness']. Si la fila existe,
+    se actualiza con lo que devolvió la API. Con credenciales la entrada de
+    caché es propia de ese usuario: un video privado no llega a los
+    visitantes anónimos.
+
+    Args:
+        video_id: ID de YouTube
+        credentials: Credenciales OAuth opcionales (necesarias para videos privados)
+
+    Returns:
+        dict: Datos para la plantilla, o None si el video no existe
+    """
+    clave = _clave(video_id, credentials)
+    datos = cache_detalle.obtener(clave)
+    if datos is not None:
+        return datos
+
+    video = Video.objects.filter(youtube_id=video_id).first()
+    remoto = None
+
+    if video is None or not _es_fresco(video):
+        try:
+            remoto = _consultar_api(video_id, credentials)
+        except CuotaExcedida:
+            if video is None:
+                raise
+            logger.warning(f"⛽ Sin cuota: se sirve la fila local de {video_id}")
+            return _a_contexto(video)  # Sin cachear: se reintenta en la próxima visita
+        if remoto is None:
+            if video is None:
+                return None
+            # Privado o no listado y sin las credenciales del dueño: la fila local sigue valiendo
+            logger.info(f"🔒 La API no devolvió {video_id}: se sirve la fila local")
+        elif video is not None:
+            campos = ['titulo', 'descripcion', 'canal_id', 'canal_nombre', 'duracion', 'duracion_segundos',
+                      'es_short', 'fecha_publicacion', 'vistas', 'likes', 'comentarios', 'etiquetas']
+            cambiados = [campo for campo in campos if getattr(video, campo) != getattr(remoto, campo)]
+            vistas_por_dia = video.vistas_por_dia
+            for campo in cambiados:
+                setattr(video, campo, getattr(remoto, campo))
+            calcular_metricas([video])
+            video.actualizado = remoto.actualizado  # Recién verificado (se muestra aunque no se escriba)
+            if cambiados or vistas_por_dia_desviada(vistas_por_dia, video.vistas_por_dia):
+                video.save(update_fields=cambiados + CAMPOS_METRICAS + ['actualizado'])
+                if 'etiquetas' in cambiados:
+                    guardar_etiquetas({video.pk: video.etiquetas})
+                if {'titulo', 'descripcion', 'etiquetas', 'fecha_publicacion'} & set(cambiados):
+                    invalidar_indice()  # Solo si cambió texto buscable
+                logger.info(f"🔄 Detalle refrescado desde la API: {video_id} ({len(cambiados)} campos cambiaron)")
+            # Sin cambios no se escribe nada: la entrada de cache_detalle (abajo) ya lo da por fresco
+        else:
+            video = remoto  # Video ajeno a la biblioteca: solo se cachea
+
+    datos = _a_contexto(video)
+    cache_detalle.guardar(clave, datos, timeout=int(_frescura().total_seconds()))
+    return datos
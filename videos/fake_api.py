@@ -0,0 +1,172 @@
+"""
+Servidor falso de la YouTube Data API para pruebas locales y benchmarks
+
+Implementa lo mínimo que usa la app:
+    - Subidas reanudables (POST /upload/... → Location, PUT → 308 / 200)
+    - videos.list, playlistItems.list y channels.list con datos inventados,
+      con etag y 304 ante un If-None-Match que coincide
+
+Se activa apuntando YOUTUBE_API_ENDPOINT a http://127.0.0.1:<puerto>/
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import threading
+import hashlib
+import json
+import time
+import uuid
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como la API real
+
+    def log_message(self, formato, *args):
+        pass  # Silencioso: lo usan los benchmarks
+
+    def _responder(self, status, cuerpo=None, cabeceras=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else b''
+        self.server.contar_bytes(len(datos))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _responder_lista(self, cuerpo):
+        """200 con etag (en el cuerpo y en la cabecera) o 304 si el cliente ya lo tiene"""
+        etag = f'"{hashlib.md5(json.dumps(cuerpo, sort_keys=True).encode()).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server.contar('304')
+            return self._responder(304, None, {'ETag': etag})
+        return self._responder(200, {'etag': etag, **cuerpo}, {'ETag': etag})
+
+    def _leer_cuerpo(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(largo) if largo else b''
+
+    # ---------- Lecturas ----------
+
+    def do_GET(self):
+        time.sleep(self.server.latencia)
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        self.server.contar(url.path)
+
+        if url.path.endswith('/videos'):
+            ids = [i for i in ','.join(params.get('id', [''])).split(',') if i]
+            return self._responder_lista({'items': [_video(i, self.server.vistas.get(i, 100)) for i in ids]})
+
+        if url.path.endswith('/channels'):
+            ids = [i for i in ','.join(params.get('id', [''])).split(',') if i] or ['UCfalso']  # mine=true
+            return self._responder_lista({'items': [_canal(i) for i in ids]})
+
+        if url.path.endswith('/playlistItems'):
+            return self._responder_lista(self.server.pagina_playlist(params))
+
+        self._responder(404, {'error': {'code': 404, 'message': 'No implementado'}})
+
+    # ---------- Subidas reanudables ----------
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self._leer_cuerpo()  # Metadatos del video
+        self.server.contar(url.path)
+        if not url.path.startswith('/upload/'):
+            return self._responder(404, {'error': {'code': 404, 'message': 'No implementado'}})
+
+        sesion = uuid.uuid4().hex
+        self.server.subidas[sesion] = 0
+        destino = f"http://{self.headers['Host']}/upload/sesion/{sesion}"
+        self._responder(200, {}, {'Location': destino})
+
+    def do_PUT(self):
+        sesion = urlparse(self.path).path.rsplit('/', 1)[-1]
+        datos = self._leer_cuerpo()
+        if sesion not in self.server.subidas:
+            return self._responder(404, {'error': {'code': 404, 'message': 'Sesión desconocida'}})
+
+        time.sleep(self.server.latencia)
+        rango = self.headers.get('Content-Range', '')  # bytes 0-999/5000 o bytes */5000
+        total = rango.rsplit('/', 1)[-1]
+        self.server.subidas[sesion] += len(datos)
+        recibidos = self.server.subidas[sesion]
+
+        if total != '*' and recibidos >= int(total):
+            del self.server.subidas[sesion]
+            return self._responder(200, {'id': f'falso{sesion[:6]}', 'snippet': {}})
+        cabeceras = {'Range': f'bytes=0-{recibidos - 1}'} if recibidos else {}
+        self._responder(308, None, cabeceras)
+
+
+def _video(video_id, vistas=100):
+    return {
+        'id': video_id,
+        'snippet': {
+            'title': f'Video {video_id}',
+            'description': '',
+            'channelId': 'UCfalso',
+            'channelTitle': 'Canal falso',
+            'publishedAt': '2024-01-01T00:00:00Z',
+            'thumbnails': {'high': {'url': f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg'}},
+            'tags': ['falso', f'tema{sum(map(ord, video_id)) % 5}'],
+        },
+        'statistics': {'viewCount': str(vistas), 'likeCount': '10', 'commentCount': '1'},
+        'contentDetails': {'duration': 'PT1M'},
+        'processingDetails': {'processingStatus': 'succeeded'},
+    }
+
+
+def _canal(canal_id):
+    return {
+        'id': canal_id,
+        'snippet': {'title': f'Canal {canal_id}'},
+        'statistics': {'subscriberCount': '1000', 'viewCount': '50000', 'videoCount': '120'},
+        'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + canal_id[2:]}},
+    }
+
+
+class ServidorFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, puerto=0, latencia=0.0, videos_playlist=0):
+        super().__init__(('127.0.0.1', puerto), _Manejador)
+        self.latencia = latencia  # Segundos de espera por llamada (simula la red)
+        self.videos_playlist = videos_playlist  # Tamaño de la playlist de subidas
+        self.subidas = {}  # sesión -> bytes recibidos
+        self.llamadas = {}  # ruta -> número de peticiones ('304' cuenta las respuestas sin cambios)
+        self.vistas = {}  # video_id -> viewCount (por defecto 100); cambiarlo cambia el etag
+        self.bytes_enviados = 0  # Cuerpos de respuesta (ancho de banda)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def contar(self, ruta):
+        with self._lock:
+            self.llamadas[ruta] = self.llamadas.get(ruta, 0) + 1
+
+    def contar_bytes(self, cantidad):
+        with self._lock:
+            self.bytes_enviados += cantidad
+
+    def pagina_playlist(self, params):
+        por_pagina = int(params.get('maxResults', ['50'])[0])
+        inicio = int(params.get('pageToken', ['0'])[0])
+        fin = min(inicio + por_pagina, self.videos_playlist)
+        playlist_id = params.get('playlistId', ['UUfalso'])[0]
+        prefijo = 'v' if playlist_id == 'UUfalso' else f'{playlist_id[2:]}_'  # Cada canal, sus propios videos
+        respuesta = {'items': [
+            {'contentDetails': {'videoId': f'{prefijo}{n:010d}'}, 'snippet': _video(f'{prefijo}{n:010d}')['snippet']}
+            for n in range(inicio, fin)
+        ]}
+        if fin < self.videos_playlist:
+            respuesta['nextPageToken'] = str(fin)
+        return respuesta
+
+    def iniciar(self):
+        """Atiende peticiones en un hilo aparte y devuelve el servidor"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
@@ -0,0 +1,177 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from .models import Video
+from .sync_service import sumar_a_resumenes
+from .search_service import invalidar_indice
+from .tag_service import guardar_etiquetas
+from .metrics_service import asignar_duracion
+from .api_gateway import ejecutar, CuotaExcedida  # Cobra la cuota antes de cada llamada
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLAVE_INGESTA = 'ingesta_canal_{clave}'  # Marca de la última ingesta por sesión/usuario
+
+
+def reservar_ingesta(clave):
+    """True si toca ingresar el canal de `clave` (a lo sumo una vez por intervalo_ingesta)"""
+    return cache.add(
+        CLAVE_INGESTA.format(clave=clave), 1,
+        timeout=settings.YOUTUBE_SYNC_CONFIG['intervalo_ingesta']
+    )
+
+
+def iterar_playlist(youtube, playlist_id, por_pagina=50, part='snippet,contentDetails'):
+    """
+    Recorre una playlist completa siguiendo nextPageToken (1 unidad por página)
+
+    Yields:
+        list: Items de cada página (máximo 50 por página)
+    """
+    page_token = None
+    while True:
+        respuesta = ejecutar(youtube.playlistItems().list(
+            part=part,
+            playlistId=playlist_id,
+            maxResults=por_pagina,
+            pageToken=page_token
+        ))
+
+        yield respuesta.get('items', [])
+
+        page_token = respuesta.get('nextPageToken')
+        if not page_token:
+            break
+
+
+class IngestaCanal:
+    """Sincroniza la playlist de subidas del canal con la tabla Video usando escrituras en bloque"""
+
+    # Campos que vienen del playlistItem y se comparan contra la BD
+    CAMPOS = ['titulo', 'descripcion', 'url_thumbnail', 'fecha_publicacion', 'canal_id', 'canal_nombre']
+
+    def __init__(self, youtube):
+        self.youtube = youtube  # Cliente autenticado del usuario
+
+    def obtener_playlist_subidas(self):
+        """Obtiene el ID de la playlist 'uploads' del canal autenticado"""
+        canal_res = ejecutar(self.youtube.channels().list(part='contentDetails', mine=True))
+        return canal_res['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+    def _a_campos(self, item):
+        """Convierte un playlistItem en los valores que guardamos en Video"""
+        snippet = item['snippet']
+        thumbnails = snippet.get('thumbnails', {})
+        url_thumb = (thumbnails.get('high') or thumbnails.get('medium') or thumbnails.get('default', {})).get('url', '')
+
+        return {
+            'titulo': snippet['title'],
+            'descripcion': snippet['description'],
+            'url_thumbnail': url_thumb,
+            'fecha_publicacion': parse_datetime(snippet['publishedAt']),
+            'canal_id': snippet.get('channelId', ''),
+            'canal_nombre': snippet.get('channelTitle', ''),
+        }
+
+    def _consultar_detalles(self, youtube_ids):
+        """
+        {youtube_id: (tags, duración ISO)} con un solo videos.list (1 unidad por 50 IDs)
+
+        playlistItems no trae ni los tags ni la duración. Si no hay cuota se
+        devuelve None y los videos quedan sin ellos hasta que se refresque
+        su detalle.
+        """
+        try:
+            respuesta = ejecutar(self.youtube.videos().list(
+                part='snippet,contentDetails',
+                id=','.join(youtube_ids),
+                fields='items(id,snippet/tags,contentDetails/duration)',  # No baja descripciones de nuevo
+                maxResults=len(youtube_ids)
+            ))
+        except CuotaExcedida:
+            logger.warning(f"⛽ Sin cuota para los detalles de {len(youtube_ids)} videos")
+            return None
+        return {
+            item['id']: (item.get('snippet', {}).get('tags', []), item.get('contentDetails', {}).get('duration', ''))
+            for item in respuesta.get('items', [])
+        }
+
+    def _procesar_pagina(self, items):
+        """Compara una página contra la BD (una sola consulta) y escribe solo lo necesario"""
+        entrantes = {item['contentDetails']['videoId']: self._a_campos(item) for item in items}
+        existentes = Video.objects.only('youtube_id', *self.CAMPOS).in_bulk(
+            list(entrantes), field_name='youtube_id'
+        )
+
+        nuevos, cambiados = [], []
+        ahora = timezone.now()
+        for youtube_id, campos in entrantes.items():
+            video = existentes.get(youtube_id)
+            if video is None:
+                nuevos.append(Video(
+                    youtube_id=youtube_id,
+                    url_video=f"https://www.youtube.com/watch?v={youtube_id}",
+                    **campos
+                ))
+            elif any(getattr(video, campo) != valor for campo, valor in campos.items()):
+                for campo, valor in campos.items():
+                    setattr(video, campo, valor)
+                video.actualizado = ahora  # bulk_update no aplica auto_now
+                cambiados.append(video)
+
+        detalles = None
+        if nuevos or cambiados:
+            detalles = self._consultar_detalles([v.youtube_id for v in nuevos + cambiados])
+        if detalles is not None:
+            for video in nuevos + cambiados:
+                tags, duracion = detalles.get(video.youtube_id, ([], ''))
+                video.etiquetas = ','.join(tags)
+                asignar_duracion(video, duracion)  # Se parsea una vez, aquí
+
+        if nuevos:
+            Video.objects.bulk_create(nuevos, ignore_conflicts=True)
+            por_canal = {}
+            for video in nuevos:
+                por_canal[video.canal_id] = por_canal.get(video.canal_id, 0) + 1
+            for canal_id, cantidad in por_canal.items():
+                sumar_a_resumenes(videos=cantidad, canal_id=canal_id)  # Llegan sin estadísticas: solo cuentan
+        if cambiados:
+            extra = ['etiquetas', 'duracion', 'duracion_segundos', 'es_short'] if detalles is not None else []
+            Video.objects.bulk_update(cambiados, self.CAMPOS + ['actualizado'] + extra)
+        if detalles is not None:
+            # ignore_conflicts no devuelve pk: se leen de una vez para la tabla intermedia
+            pks = dict(Video.objects.filter(youtube_id__in=detalles).values_list('youtube_id', 'id'))
+            guardar_etiquetas({pks[yid]: tags for yid, (tags, _) in detalles.items() if yid in pks})
+        if nuevos or cambiados:
+            invalidar_indice()  # Cambió texto buscable
+
+        return len(nuevos), len(cambiados), len(entrantes) - len(nuevos) - len(cambiados)
+
+    def ejecutar(self, incremental=True):
+        """
+        Ingresa la playlist de subidas página por página
+
+        Args:
+            incremental: Si es True, se detiene en la primera página donde
+                todos los videos ya existen y no cambiaron
+
+        Returns:
+            dict: creados, actualizados, sin_cambios y paginas
+        """
+        resumen = {'creados': 0, 'actualizados': 0, 'sin_cambios': 0, 'paginas': 0}
+        uploads_id = self.obtener_playlist_subidas()
+
+        for items in iterar_playlist(self.youtube, uploads_id):
+            creados, actualizados, sin_cambios = self._procesar_pagina(items)
+            resumen['paginas'] += 1
+            resumen['creados'] += creados
+            resumen['actualizados'] += actualizados
+            resumen['sin_cambios'] += sin_cambios
+
+            if incremental and items and not creados and not actualizados:
+                break  # Lo que sigue (más antiguo) ya está sincronizado
+
+        logger.info(f"📥 Ingesta de canal: {resumen}")
+        return resumen
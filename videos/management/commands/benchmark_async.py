@@ -0,0 +1,71 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from videos.api_gateway import cuota_simulada, ejecutar
+from videos.fake_api import ServidorFalso
+from videos.youtube_async import YouTubeServiceAsync, cerrar_http
+from videos.youtube_service import LOTE_DETALLES, YouTubeService2026
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compara el resumen de varios canales en síncrono (una llamada tras otra) contra youtube_async'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--canales', type=int, nargs='+', default=[1, 5, 20])
+        parser.add_argument('--por-canal', type=int, default=10, help='Últimos videos por canal')
+        parser.add_argument('--latencia', type=float, default=0.1, help='Segundos por llamada del servidor falso')
+
+    def handle(self, *args, **options):
+        servidor = ServidorFalso(latencia=options['latencia'], videos_playlist=options['por_canal']).iniciar()
+        cliente = {**settings.YOUTUBE_CLIENT_CONFIG, 'api_endpoint': servidor.url}
+        # Sin tope diario (cobrando en memoria) ni caché de detalles: se mide la red, no los aciertos
+        cuota = {**settings.YOUTUBE_QUOTA_CONFIG, 'daily_limit': 10 ** 9, 'enable_cache': False}
+
+        try:
+            with override_settings(YOUTUBE_CLIENT_CONFIG=cliente, YOUTUBE_QUOTA_CONFIG=cuota), cuota_simulada():
+                self.stdout.write(f"{'canales':>8}{'síncrono s':>12}{'llamadas':>10}{'async s':>10}{'llamadas':>10}")
+                for cantidad in options['canales']:
+                    canal_ids = [f"UCbench{n:04d}" for n in range(cantidad)]
+
+                    servidor.llamadas.clear()
+                    inicio = time.perf_counter()
+                    self._resumen_sincrono(canal_ids, options['por_canal'])
+                    sincrono = time.perf_counter() - inicio
+                    llamadas_sincrono = sum(servidor.llamadas.values())
+
+                    servidor.llamadas.clear()
+                    inicio = time.perf_counter()
+                    async_to_sync(self._resumen_async)(canal_ids, options['por_canal'])
+                    asincrono = time.perf_counter() - inicio
+                    llamadas_async = sum(servidor.llamadas.values())
+
+                    self.stdout.write(
+                        f"{cantidad:>8}{sincrono:>12.2f}{llamadas_sincrono:>10}{asincrono:>10.2f}{llamadas_async:>10}"
+                    )
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    def _resumen_sincrono(self, canal_ids, por_canal):
+        """Lo mismo que resumen_canales con el cliente síncrono: cada llamada espera a la anterior"""
+        servicio = YouTubeService2026(api_key='benchmark')
+        canales = ejecutar(servicio.youtube.channels().list(id=','.join(canal_ids), part='snippet,statistics,contentDetails'))
+        ids = []
+        for item in canales.get('items', []):
+            pagina = ejecutar(servicio.youtube.playlistItems().list(
+                playlistId=item['contentDetails']['relatedPlaylists']['uploads'],
+                part='contentDetails', maxResults=por_canal
+            ))
+            ids += [video['contentDetails']['videoId'] for video in pagina.get('items', [])]
+        return [
+            video for i in range(0, len(ids), LOTE_DETALLES)
+            for video in servicio._consultar_detalles(ids[i:i + LOTE_DETALLES])
+        ]
+
+    async def _resumen_async(self, canal_ids, por_canal):
+        try:
+            return await YouTubeServiceAsync(api_key='benchmark').resumen_canales(canal_ids, por_canal)
+        finally:
+            await cerrar_http()
@@ -0,0 +1,139 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from videos.models import Video
+from videos.search_service import IndiceInvertido, buscar_en_biblioteca, invalidar_indice, motor_busqueda
+import itertools
+import statistics
+import random
+import time
+
+# youtube_id de las filas sintéticas: '~' no existe en un ID de YouTube ([A-Za-z0-9_-]),
+# así filtrar y borrar por el prefijo nunca alcanza videos reales
+PREFIJO_ID = 'bench~'
+
+
+def _vocabulario(n, azar):
+    letras = 'abcdefghijklmnopqrstuvwxyz'
+    palabras = set()
+    while len(palabras) < n:
+        palabras.add(''.join(azar.choice(letras) for _ in range(azar.randint(4, 10))))
+    return sorted(palabras)
+
+
+def _documentos(filas, vocabulario, azar):
+    """Títulos, descripciones y etiquetas con frecuencia de palabras tipo Zipf"""
+    acumulados = list(itertools.accumulate(1 / (rango + 1) for rango in range(len(vocabulario))))
+    for _ in range(filas):
+        yield (
+            ' '.join(azar.choices(vocabulario, cum_weights=acumulados, k=6)),
+            ' '.join(azar.choices(vocabulario, cum_weights=acumulados, k=30)),
+            ','.join(azar.choices(vocabulario, cum_weights=acumulados, k=4)),
+        )
+
+
+def _percentiles(tiempos):
+    tiempos = sorted(tiempos)
+    return statistics.median(tiempos) * 1000, tiempos[max(0, int(len(tiempos) * 0.95) - 1)] * 1000
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de búsqueda (índice invertido / FULLTEXT) contra un escaneo tipo LIKE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--consultas', type=int, default=200, help='Consultas medidas por tamaño')
+        parser.add_argument('--escaneos', type=int, default=20, help='Consultas medidas con el escaneo lineal')
+        parser.add_argument(
+            '--bd', action='store_true',
+            help='Inserta también las filas en la tabla Video y mide buscar_en_biblioteca contra icontains'
+        )
+
+    def handle(self, *args, **options):
+        azar = random.Random(42)
+        vocabulario = _vocabulario(20_000, azar)
+        self.stdout.write(
+            f"{'filas':>10}{'índice s':>10}{'MB':>8}{'p50 ms':>9}{'p95 ms':>9}{'escaneo p50 ms':>16}"
+            + (f"{motor_busqueda() + ' p50':>16}{'icontains p50':>15}" if options['bd'] else '')
+        )
+
+        for filas in options['filas']:
+            documentos = list(_documentos(filas, vocabulario, azar))
+            consultas = self._consultas(documentos, vocabulario, azar, options['consultas'])
+
+            inicio = time.perf_counter()
+            indice = IndiceInvertido()
+            for pk, (titulo, descripcion, etiquetas) in enumerate(documentos, start=1):
+                indice.agregar(pk, titulo, descripcion, etiquetas)
+            indice.buscar('precalentar')  # Ordena los términos una vez
+            construccion = time.perf_counter() - inicio
+            megas = (sum(d.itemsize * len(d) + p.itemsize * len(p) for d, p in indice._postings.values())
+                     + indice._pks.itemsize * len(indice._pks)) / 2 ** 20
+
+            tiempos = []
+            for consulta in consultas:
+                inicio = time.perf_counter()
+                indice.buscar(consulta, limite=20)
+                tiempos.append(time.perf_counter() - inicio)
+            p50, p95 = _percentiles(tiempos)
+
+            # Lo que hace LIKE '%x%': recorrer todas las filas comparando texto
+            textos = [f"{t} {d}".lower() for t, d, _ in documentos]
+            escaneo = []
+            for consulta in consultas[:options['escaneos']]:
+                palabras = consulta.split()
+                inicio = time.perf_counter()
+                [i for i, texto in enumerate(textos) if all(p in texto for p in palabras)]
+                escaneo.append(time.perf_counter() - inicio)
+            del textos
+
+            linea = f"{filas:>10}{construccion:>10.2f}{megas:>8.1f}{p50:>9.3f}{p95:>9.3f}{_percentiles(escaneo)[0]:>16.2f}"
+            if options['bd']:
+                linea += self._medir_bd(documentos, consultas[:options['escaneos']])
+            self.stdout.write(linea)
+
+    def _consultas(self, documentos, vocabulario, azar, cantidad):
+        """Mezcla de una palabra, dos palabras del mismo video y prefijos"""
+        consultas = []
+        for i in range(cantidad):
+            titulo = documentos[azar.randrange(len(documentos))][0].split()
+            if i % 3 == 0:
+                consultas.append(titulo[0])
+            elif i % 3 == 1:
+                consultas.append(f"{titulo[0]} {titulo[1]}")
+            else:
+                consultas.append(titulo[2][:4])
+        return consultas
+
+    def _medir_bd(self, documentos, consultas):
+        ahora = timezone.now()
+        try:
+            with transaction.atomic():
+                Video.objects.bulk_create((
+                    Video(youtube_id=f"{PREFIJO_ID}{i}", titulo=t, descripcion=d, etiquetas=e[:500],
+                          url_video='', url_thumbnail='', canal_id='', canal_nombre='',
+                          fecha_publicacion=ahora, categoria='otro')
+                    for i, (t, d, e) in enumerate(documentos)
+                ), batch_size=5000)
+            invalidar_indice()
+            if connection.vendor == 'mysql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE TABLE videos_video')
+
+            buscar_en_biblioteca('precalentar').count()  # Construye el índice en memoria si aplica
+            motor, like = [], []
+            for consulta in consultas:
+                inicio = time.perf_counter()
+                list(buscar_en_biblioteca(consulta)[:20])
+                motor.append(time.perf_counter() - inicio)
+
+                inicio = time.perf_counter()
+                list(Video.objects.filter(
+                    Q(titulo__icontains=consulta) | Q(descripcion__icontains=consulta)
+                ).order_by('-fecha_publicacion')[:20])  # Como lo hacía mis_videos
+                like.append(time.perf_counter() - inicio)
+            return f"{_percentiles(motor)[0]:>16.2f}{_percentiles(like)[0]:>15.2f}"
+        finally:
+            Video.objects.filter(youtube_id__startswith=PREFIJO_ID).delete()
+            invalidar_indice()
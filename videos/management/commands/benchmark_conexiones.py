@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from videos.ingest_service import reservar_ingesta
+import http.client
+import statistics
+import threading
+import time
+
+
+class _ManejadorSilencioso(WSGIRequestHandler):
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorWSGIConPool(WSGIServer):
+    """WSGI con un pool fijo de hilos (como gunicorn --threads): cada hilo conserva su conexión"""
+
+    def __init__(self, hilos):
+        super().__init__(('127.0.0.1', 0), _ManejadorSilencioso)
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='wsgi')
+        self.set_app(get_wsgi_application())
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def cerrar(self):
+        self.shutdown()
+        self.server_close()
+        self.pool.shutdown(wait=True)
+
+
+class Command(BaseCommand):
+    help = 'Mide peticiones/segundo de inicio y mis_videos con y sin conexiones persistentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500, help='Peticiones por vista y configuración')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Clientes simultáneos')
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos del servidor WSGI')
+        parser.add_argument(
+            '--conn-max-age', type=int, nargs='+', default=[0, 60],
+            help='Valores de CONN_MAX_AGE a comparar (0 = una conexión por petición)'
+        )
+
+    def handle(self, *args, **options):
+        # Sesión con credenciales y la ingesta ya hecha: mis_videos solo lee la BD
+        sesion = SessionStore()
+        sesion['youtube_credentials'] = {'token': 'benchmark', 'refresh_token': None,
+                                         'token_uri': '', 'client_id': '', 'client_secret': ''}
+        sesion.create()
+        reservar_ingesta(sesion.session_key)
+        rutas = {'inicio': '/', 'mis_videos': '/mis-videos/'}
+
+        abiertas = [0]
+        contador_lock = threading.Lock()
+
+        def contar(**kwargs):
+            with contador_lock:
+                abiertas[0] += 1
+
+        connection_created.connect(contar)
+        original = connections.settings['default'].get('CONN_MAX_AGE', 0)
+        self.stdout.write(f"{'vista':<12}{'CONN_MAX_AGE':>14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'conexiones':>12}")
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['127.0.0.1']):
+                for nombre, ruta in rutas.items():
+                    for conn_max_age in options['conn_max_age']:
+                        connections.settings['default']['CONN_MAX_AGE'] = conn_max_age
+                        abiertas[0] = 0
+                        tiempos, segundos = self._medir(ruta, sesion.session_key, options)
+                        tiempos.sort()
+                        self.stdout.write(
+                            f"{nombre:<12}{conn_max_age:>14}{len(tiempos) / segundos:>10.1f}"
+                            f"{statistics.median(tiempos) * 1000:>10.2f}"
+                            f"{tiempos[int(len(tiempos) * 0.95) - 1] * 1000:>10.2f}{abiertas[0]:>12}"
+                        )
+        finally:
+            connections.settings['default']['CONN_MAX_AGE'] = original
+            connection_created.disconnect(contar)
+            sesion.delete()
+
+    def _medir(self, ruta, session_key, options):
+        servidor = ServidorWSGIConPool(options['hilos'])
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        puerto = servidor.server_address[1]
+        cabeceras = {'Cookie': f'sessionid={session_key}'}
+
+        def cliente(n):
+            tiempos = []
+            for _ in range(n):
+                inicio = time.perf_counter()
+                conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+                conexion.request('GET', ruta, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                conexion.close()
+                if respuesta.status != 200:
+                    raise RuntimeError(f"{ruta} respondió {respuesta.status}")
+                tiempos.append(time.perf_counter() - inicio)
+            return tiempos
+
+        # Calentamiento: plantillas compiladas, discovery, etc. no cuentan
+        cliente(options['hilos'])
+
+        por_cliente = max(1, options['peticiones'] // options['concurrencia'])
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as clientes:
+            resultados = list(clientes.map(cliente, [por_cliente] * options['concurrencia']))
+        segundos = time.perf_counter() - inicio
+
+        servidor.cerrar()
+        return [t for tiempos in resultados for t in tiempos], segundos
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from videos.api_gateway import cuota_simulada
+from videos.fake_api import ServidorFalso
+from videos.youtube_service import LOTE_DETALLES, YouTubeService2026, cache_detalles
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Mide obtener_detalles_videos (lotes de 50 en paralelo + caché por ID) contra el servidor falso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, default=2000, help='IDs distintos a consultar')
+        parser.add_argument('--repetidos', type=float, default=0.2, help='Fracción extra de IDs repetidos en la entrada')
+        parser.add_argument('--latencia', type=float, default=0.1, help='Segundos por llamada del servidor falso')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+        parser.add_argument(
+            '--locmem', action='store_true',
+            help='Caché en memoria del proceso (como Redis: sin el costo por archivo de FileBasedCache)'
+        )
+
+    def handle(self, *args, **options):
+        azar = random.Random(5)
+        distintos = [f"bench{n:06d}" for n in range(options['ids'])]
+        entrada = distintos + azar.choices(distintos, k=int(len(distintos) * options['repetidos']))
+        azar.shuffle(entrada)
+
+        servidor = ServidorFalso(latencia=options['latencia']).iniciar()
+        cliente = {**settings.YOUTUBE_CLIENT_CONFIG, 'api_endpoint': servidor.url}
+        # Sin tope diario y cobrando en memoria (cuota_simulada): el servidor falso no gasta cuota real
+        cuota = {**settings.YOUTUBE_QUOTA_CONFIG, 'daily_limit': 10 ** 9}
+        claves = [cache_detalles.construir_clave(id=video_id) for video_id in distintos]
+        servicio = YouTubeService2026(api_key='benchmark')
+        caches = settings.CACHES
+        if options['locmem']:
+            caches = {'default': {**caches['default'], 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+        with override_settings(YOUTUBE_CLIENT_CONFIG=cliente, YOUTUBE_QUOTA_CONFIG=cuota, CACHES=caches), \
+                cuota_simulada():
+            try:
+                self.stdout.write(f"{len(entrada)} IDs ({len(distintos)} distintos), latencia {options['latencia']}s")
+
+                # Como antes: una sola llamada (se parte en 50 para que la API la acepte), en serie y con repetidos
+                servidor.llamadas.clear()
+                inicio = time.perf_counter()
+                total = sum(
+                    len(servicio._consultar_detalles(entrada[i:i + LOTE_DETALLES]))
+                    for i in range(0, len(entrada), LOTE_DETALLES)
+                )
+                self._fila('en serie', total, time.perf_counter() - inicio, servidor)
+
+                for workers in options['workers']:
+                    cache.delete_many(claves)
+                    servidor.llamadas.clear()
+                    with override_settings(YOUTUBE_CLIENT_CONFIG={**cliente, 'workers_detalles': workers}):
+                        inicio = time.perf_counter()
+                        primero = None
+                        total = 0
+                        for _ in servicio.obtener_detalles_videos(iter(entrada)):
+                            total += 1
+                            if primero is None:
+                                primero = time.perf_counter() - inicio
+                        segundos = time.perf_counter() - inicio
+                    self._fila(f"{workers} workers", total, segundos, servidor, primero)
+
+                servidor.llamadas.clear()
+                inicio = time.perf_counter()
+                total = sum(1 for _ in servicio.obtener_detalles_videos(entrada))
+                self._fila('caché caliente', total, time.perf_counter() - inicio, servidor)
+            finally:
+                cache.delete_many(claves)  # En la caché del benchmark (puede ser la locmem)
+                servidor.shutdown()
+                servidor.server_close()
+
+    def _fila(self, nombre, total, segundos, servidor, primero=None):
+        llamadas = sum(servidor.llamadas.values())
+        extra = f" | primer video a los {primero * 1000:.0f} ms" if primero is not None else ''
+        self.stdout.write(f"{nombre:<16}{total:>6} videos en {segundos:6.2f}s | {llamadas:>4} llamadas a la API{extra}")
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from videos.api_gateway import cuota_simulada
+from videos.fake_api import ServidorFalso
+from videos.models import Video
+from videos.sync_service import SincronizadorEstadisticas
+from datetime import timedelta
+import random
+import time
+
+# youtube_id de las filas sintéticas: '~' no existe en un ID de YouTube ([A-Za-z0-9_-]),
+# así filtrar y borrar por el prefijo nunca alcanza videos reales
+PREFIJO_ID = 'etg~'
+
+
+class Command(BaseCommand):
+    help = 'Mide la sincronización de estadísticas con y sin If-None-Match contra el servidor falso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=20_000)
+        parser.add_argument('--cambios', type=float, nargs='+', default=[0.0, 0.001, 0.01, 0.1],
+                            help='Fracción de videos cuyas vistas cambian entre corridas')
+        parser.add_argument('--latencia', type=float, default=0.02, help='Segundos por llamada del servidor falso')
+
+    def handle(self, *args, **options):
+        azar = random.Random(11)
+        ahora = timezone.now()
+        ids = [f"{PREFIJO_ID}{i:07d}" for i in range(options['filas'])]
+        servidor = ServidorFalso(latencia=options['latencia']).iniciar()
+        cliente = {**settings.YOUTUBE_CLIENT_CONFIG, 'api_endpoint': servidor.url}
+        # El servidor falso no gasta cuota real: sin tope y cobrando en memoria (cuota_simulada)
+        cuota = {**settings.YOUTUBE_QUOTA_CONFIG, 'daily_limit': 10 ** 9}
+
+        try:
+            with transaction.atomic():
+                Video.objects.bulk_create((
+                    Video(youtube_id=youtube_id, titulo=youtube_id, descripcion='', url_video='', url_thumbnail='',
+                          canal_id='', canal_nombre='', categoria='otro', fecha_publicacion=ahora - timedelta(days=30))
+                    for youtube_id in ids
+                ), batch_size=5000)
+            queryset = Video.objects.filter(youtube_id__startswith=PREFIJO_ID)
+
+            with override_settings(YOUTUBE_CLIENT_CONFIG=cliente, YOUTUBE_QUOTA_CONFIG=cuota), cuota_simulada():
+                self._correr(servidor, queryset)  # Primera corrida: guarda los ETags
+                self.stdout.write(f"{'cambian':>8}{'modo':>10}{'segundos':>10}{'304':>8}{'escritas':>10}{'omitidas':>10}{'KB':>10}")
+                for fraccion in options['cambios']:
+                    for modo, condicional in (('sin ETag', False), ('con ETag', True)):
+                        # Cambios nuevos en cada modo: la corrida anterior ya escribió los suyos
+                        for youtube_id in azar.sample(ids, int(len(ids) * fraccion)):
+                            servidor.vistas[youtube_id] = servidor.vistas.get(youtube_id, 100) + azar.randint(1, 1000)
+                        with override_settings(YOUTUBE_QUOTA_CONFIG={**cuota, 'peticiones_condicionales': condicional}):
+                            segundos, resultado, kb = self._correr(servidor, queryset)
+                        self.stdout.write(
+                            f"{fraccion:>8.1%}{modo:>10}{segundos:>10.2f}{resultado['paginas_sin_cambios']:>8}"
+                            f"{resultado['escritos']:>10}{resultado['omitidos']:>10}{kb:>10.0f}"
+                        )
+        finally:
+            Video.objects.filter(youtube_id__startswith=PREFIJO_ID).delete()
+            servidor.shutdown()
+            servidor.server_close()
+
+    def _correr(self, servidor, queryset):
+        servidor.bytes_enviados = 0
+        inicio = time.perf_counter()
+        resultado = SincronizadorEstadisticas(videos=queryset).ejecutar()
+        return time.perf_counter() - inicio, resultado, servidor.bytes_enviados / 1024
@@ -0,0 +1,107 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from videos.models import Etiqueta, Video, VideoEtiqueta
+from videos.pagination_service import paginar_por_fecha
+from videos.sync_service import recalcular_resumenes
+from videos.tag_service import filtrar_por_etiquetas, guardar_etiquetas, recalcular_totales
+from datetime import timedelta
+import itertools
+import statistics
+import random
+import time
+
+# youtube_id de las filas sintéticas: '~' no existe en un ID de YouTube ([A-Za-z0-9_-]),
+# así filtrar y borrar por el prefijo nunca alcanza videos reales
+PREFIJO_ID = 'tag~'
+
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Mide filtro por tag y nube de etiquetas (tabla intermedia) contra LIKE sobre el texto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000)
+        parser.add_argument('--tags', type=int, default=5_000, help='Vocabulario de tags distintos')
+        parser.add_argument('--por-video', type=int, default=8, help='Tags por video')
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        azar = random.Random(7)
+        vocabulario = [f"tema {i}" for i in range(options['tags'])]
+        acumulados = list(itertools.accumulate(1 / (rango + 1) for rango in range(len(vocabulario))))
+        ahora = timezone.now()
+        repeticiones = options['repeticiones']
+
+        try:
+            tags = [
+                list(dict.fromkeys(azar.choices(vocabulario, cum_weights=acumulados, k=options['por_video'])))
+                for _ in range(options['filas'])
+            ]
+            with transaction.atomic():
+                Video.objects.bulk_create((
+                    Video(youtube_id=f"{PREFIJO_ID}{i}", titulo=f"Video {i}", descripcion='',
+                          url_video='', url_thumbnail='', canal_id='', canal_nombre='',
+                          fecha_publicacion=ahora - timedelta(minutes=i), categoria='otro',
+                          etiquetas=','.join(tags[i]))
+                    for i in range(options['filas'])
+                ), batch_size=5000)
+            recalcular_resumenes()  # filtrar_por_etiquetas elige el plan según el total de videos
+            pks = dict(Video.objects.filter(youtube_id__startswith=PREFIJO_ID).values_list('youtube_id', 'id'))
+
+            inicio = time.perf_counter()
+            creados, _ = guardar_etiquetas({pks[f"{PREFIJO_ID}{i}"]: t for i, t in enumerate(tags)})
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(f"guardar_etiquetas: {creados} vínculos en {segundos:.2f}s "
+                              f"({creados / segundos:,.0f}/s)")
+
+            queryset = Video.objects.filter(youtube_id__startswith=PREFIJO_ID)
+            self.stdout.write(f"{'consulta':<34}{'tabla ms':>10}{'LIKE ms':>10}")
+            # Del tag más frecuente al más raro
+            for nombre in (vocabulario[0], vocabulario[50], vocabulario[500], vocabulario[-1]):
+                tabla = _mediana_ms(
+                    lambda: list(paginar_por_fecha(filtrar_por_etiquetas(queryset, [nombre]), None, 25)), repeticiones
+                )
+                like = _mediana_ms(lambda: list(queryset.filter(etiquetas__icontains=nombre)
+                                                .order_by('-fecha_publicacion', '-id')[:25]), repeticiones)
+                self.stdout.write(f"{'filtro ' + repr(nombre):<34}{tabla:>10.2f}{like:>10.2f}")
+
+            dos = [vocabulario[0], vocabulario[1]]
+            tabla = _mediana_ms(lambda: list(paginar_por_fecha(filtrar_por_etiquetas(queryset, dos), None, 25)),
+                                repeticiones)
+            like = _mediana_ms(lambda: list(queryset.filter(etiquetas__icontains=dos[0]).filter(
+                etiquetas__icontains=dos[1]).order_by('-fecha_publicacion', '-id')[:25]), repeticiones)
+            self.stdout.write(f"{'filtro dos tags':<34}{tabla:>10.2f}{like:>10.2f}")
+
+            # Nube: contador indexado contra GROUP BY sobre la tabla intermedia y contra partir el texto
+            contador = _mediana_ms(lambda: self._nube_sin_cache(50), repeticiones)
+            agrupado = _mediana_ms(lambda: list(VideoEtiqueta.objects.values('etiqueta__nombre').annotate(
+                n=Count('id')).order_by('-n')[:50]), max(1, repeticiones // 5))
+            texto = _mediana_ms(lambda: self._nube_desde_texto(queryset, 50), max(1, repeticiones // 10))
+            self.stdout.write(f"nube top 50: contador {contador:.2f} ms | GROUP BY {agrupado:.2f} ms | "
+                              f"texto {texto:.2f} ms")
+        finally:
+            Video.objects.filter(youtube_id__startswith=PREFIJO_ID).delete()
+            recalcular_totales()
+            recalcular_resumenes()
+
+    def _nube_sin_cache(self, limite):
+        """La consulta de nube_etiquetas sin pasar por la caché"""
+        return list(Etiqueta.objects.filter(total_videos__gt=0).order_by('-total_videos', 'nombre')
+                    .values_list('nombre', 'total_videos')[:limite])
+
+    def _nube_desde_texto(self, queryset, limite):
+        conteo = {}
+        for etiquetas in queryset.values_list('etiquetas', flat=True).iterator(chunk_size=5000):
+            for tag in etiquetas.split(','):
+                conteo[tag] = conteo.get(tag, 0) + 1
+        return sorted(conteo.items(), key=lambda par: par[1], reverse=True)[:limite]
@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from videos.metrics_service import ORDENES, asignar_duracion, calcular_metricas, duracion_en_segundos, filtrar_shorts
+from videos.models import Video
+from videos.pagination_service import paginar_por_campo
+from datetime import timedelta
+import statistics
+import random
+import time
+
+# youtube_id de las filas sintéticas: '~' no existe en un ID de YouTube ([A-Za-z0-9_-]),
+# así filtrar y borrar por el prefijo nunca alcanza videos reales
+PREFIJO_ID = 'met~'
+
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compara ordenar/filtrar por métricas guardadas (índice) contra calcularlas por petición'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000)
+        parser.add_argument('--repeticiones', type=int, default=10)
+
+    def handle(self, *args, **options):
+        azar = random.Random(3)
+        ahora = timezone.now()
+        repeticiones = options['repeticiones']
+
+        def duracion_iso():
+            segundos = azar.choice([azar.randint(5, 180), azar.randint(181, 7200)])
+            return f"PT{segundos // 3600}H{segundos % 3600 // 60}M{segundos % 60}S"
+
+        videos = []
+        for i in range(options['filas']):
+            vistas = int(azar.paretovariate(1.2) * 100)
+            videos.append(asignar_duracion(Video(
+                youtube_id=f"{PREFIJO_ID}{i}", titulo=f"Video {i}", descripcion='', url_video='',
+                url_thumbnail='', canal_id='', canal_nombre='', categoria='otro',
+                fecha_publicacion=ahora - timedelta(hours=azar.randint(1, 5 * 365 * 24)),
+                vistas=vistas, likes=int(vistas * azar.random() * 0.1), comentarios=int(vistas * azar.random() * 0.01),
+            ), duracion_iso()))
+
+        inicio = time.perf_counter()
+        calcular_metricas(videos, ahora)
+        self.stdout.write(f"calcular_metricas: {len(videos)} videos en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        try:
+            with transaction.atomic():
+                Video.objects.bulk_create(videos, batch_size=5000)
+            del videos
+            queryset = Video.objects.filter(youtube_id__startswith=PREFIJO_ID)
+
+            self.stdout.write(f"{'consulta (primera página)':<30}{'índice ms':>12}{'por petición ms':>18}")
+            for orden, campo in ORDENES.items():
+                indice = _mediana_ms(lambda: list(paginar_por_campo(queryset, campo, None, 25)), repeticiones)
+                python = _mediana_ms(lambda: self._como_antes(queryset, orden, ahora), max(1, repeticiones // 5))
+                self.stdout.write(f"{orden:<30}{indice:>12.2f}{python:>18.2f}")
+
+            indice = _mediana_ms(
+                lambda: list(paginar_por_campo(filtrar_shorts(queryset, True), 'fecha_publicacion', None, 25)),
+                repeticiones
+            )
+            python = _mediana_ms(lambda: self._como_antes(queryset, 'shorts', ahora), max(1, repeticiones // 5))
+            self.stdout.write(f"{'solo shorts':<30}{indice:>12.2f}{python:>18.2f}")
+        finally:
+            Video.objects.filter(youtube_id__startswith=PREFIJO_ID).delete()
+
+    def _como_antes(self, queryset, orden, ahora):
+        """Lo que exigía no tener columnas: traer todo, parsear/calcular en Python y ordenar"""
+        filas = []
+        for pk, fecha, duracion, vistas, likes, comentarios in queryset.values_list(
+            'id', 'fecha_publicacion', 'duracion', 'vistas', 'likes', 'comentarios'
+        ).iterator(chunk_size=5000):
+            segundos = duracion_en_segundos(duracion)
+            engagement = (likes + comentarios) * 100 / vistas if vistas else 0.0
+            por_dia = vistas / max(1.0, (ahora - fecha).total_seconds() / 86400)
+            filas.append((pk, fecha, segundos, engagement, por_dia))
+        if orden == 'shorts':
+            filas = [f for f in filas if 0 < f[2] <= 180]
+            orden = 'recientes'
+        columna = {'recientes': 1, 'largos': 2, 'engagement': 3, 'populares': 4}[orden]
+        return sorted(filas, key=lambda f: f[columna], reverse=True)[:25]
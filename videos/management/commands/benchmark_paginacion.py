@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from videos.models import Video
+from videos.pagination_service import paginar_por_fecha
+from datetime import timedelta
+import statistics
+import time
+
+# youtube_id de las filas sintéticas: '~' no existe en un ID de YouTube ([A-Za-z0-9_-]),
+# así filtrar y borrar por el prefijo nunca alcanza videos reales
+PREFIJO_ID = 'pag~'
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo de la página N con cursor (keyset) contra OFFSET + COUNT(*)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000)
+        parser.add_argument('--por-pagina', type=int, default=25)
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        filas, tamano = options['filas'], options['por_pagina']
+        ahora = timezone.now()
+        try:
+            with transaction.atomic():
+                Video.objects.bulk_create((
+                    # Fechas repetidas de a 3 para ejercitar el desempate por id
+                    Video(youtube_id=f"{PREFIJO_ID}{i}", titulo=f"Video {i}", descripcion='',
+                          url_video='', url_thumbnail='', canal_id='', canal_nombre='',
+                          fecha_publicacion=ahora - timedelta(minutes=i // 3), categoria='otro')
+                    for i in range(filas)
+                ), batch_size=5000)
+
+            queryset = Video.objects.filter(youtube_id__startswith=PREFIJO_ID)
+            total_paginas = filas // tamano
+
+            # Cursores de las páginas a medir, recorriendo una sola vez
+            objetivos = {1, total_paginas // 2, total_paginas}
+            cursores, cursor, vistos = {}, None, 0
+            for numero in range(1, total_paginas + 1):
+                if numero in objetivos:
+                    cursores[numero] = cursor
+                pagina = paginar_por_fecha(queryset, cursor, tamano)
+                vistos += len(pagina)
+                cursor = pagina.cursor_siguiente
+            if vistos != filas:
+                raise RuntimeError(f"El recorrido con cursor vio {vistos} de {filas} videos")
+
+            self.stdout.write(f"{'página':>10}{'cursor ms':>12}{'OFFSET+COUNT ms':>18}")
+            for numero in sorted(objetivos):
+                keyset, offset = [], []
+                for _ in range(options['repeticiones']):
+                    inicio = time.perf_counter()
+                    list(paginar_por_fecha(queryset, cursores[numero], tamano))
+                    keyset.append(time.perf_counter() - inicio)
+
+                    inicio = time.perf_counter()
+                    queryset.count()
+                    desde = (numero - 1) * tamano
+                    list(queryset.order_by('-fecha_publicacion', '-id')[desde:desde + tamano])
+                    offset.append(time.perf_counter() - inicio)
+                self.stdout.write(
+                    f"{numero:>10}{statistics.median(keyset) * 1000:>12.2f}{statistics.median(offset) * 1000:>18.2f}"
+                )
+        finally:
+            Video.objects.filter(youtube_id__startswith=PREFIJO_ID).delete()
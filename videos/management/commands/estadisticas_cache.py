@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from videos import youtube_service  # Importarlo registra los espacios de caché
+from videos.cache_service import estadisticas_cache
+
+
+class Command(BaseCommand):
+    help = 'Muestra aciertos/fallos de la caché de YouTube y la cuota ahorrada'
+
+    def handle(self, *args, **options):
+        for espacio, datos in estadisticas_cache().items():
+            self.stdout.write(
+                f"{espacio}: {datos['hits']} hits / {datos['misses']} misses "
+                f"(ratio {datos['ratio']:.1%}) → {datos['unidades_ahorradas']} unidades ahorradas"
+            )
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from videos.models import TrabajoSubida
+from videos.upload_queue import procesar_pendientes
+import time
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos de subida en cola (worker fuera del servidor web)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Sigue revisando la cola en lugar de una sola pasada'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=5,
+            help='Segundos entre revisiones de la cola en modo --loop'
+        )
+        parser.add_argument(
+            '--recuperar', type=int, default=None, metavar='MINUTOS',
+            help='Vuelve a encolar trabajos "subiendo" sin avance en los últimos MINUTOS '
+                 '(p. ej. tras reiniciar el servidor); se reanudan desde su sesión'
+        )
+
+    def handle(self, *args, **options):
+        if options['recuperar'] is not None:
+            limite = timezone.now() - timedelta(minutes=options['recuperar'])
+            recuperados = TrabajoSubida.objects.filter(
+                estado=TrabajoSubida.SUBIENDO, actualizado__lt=limite
+            ).update(estado=TrabajoSubida.EN_COLA, actualizado=timezone.now())
+            self.stdout.write(f"♻️ {recuperados} trabajos devueltos a la cola")
+
+        while True:
+            close_old_connections()  # Recicla la conexión si venció o se cayó entre revisiones
+            futuros = procesar_pendientes()
+            for futuro in futuros:
+                futuro.result()
+            if futuros:
+                self.stdout.write(self.style.SUCCESS(f"✅ {len(futuros)} trabajos procesados"))
+            if not options['loop']:
+                break
+            time.sleep(options['intervalo'])
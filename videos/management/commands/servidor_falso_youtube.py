@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from videos.fake_api import ServidorFalso
+
+
+class Command(BaseCommand):
+    help = 'Levanta un servidor falso de la YouTube API (usar con YOUTUBE_API_ENDPOINT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puerto', type=int, default=8765, help='Puerto de escucha')
+        parser.add_argument(
+            '--latencia', type=float, default=0.0,
+            help='Segundos de latencia simulada por llamada'
+        )
+        parser.add_argument(
+            '--videos-playlist', type=int, default=0,
+            help='Videos en la playlist de subidas falsa'
+        )
+
+    def handle(self, *args, **options):
+        servidor = ServidorFalso(options['puerto'], options['latencia'], options['videos_playlist'])
+        self.stdout.write(f"🧪 Servidor falso en {servidor.url} (Ctrl+C para detener)")
+        self.stdout.write(f"   export YOUTUBE_API_ENDPOINT={servidor.url}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            servidor.server_close()
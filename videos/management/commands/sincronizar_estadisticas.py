@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from videos.sync_service import sincronizar_estadisticas, ejecutar_worker
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza las estadísticas de los videos locales con YouTube'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Ejecuta como worker periódico en lugar de una sola corrida'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=None,
+            help='Segundos entre corridas en modo --loop (default: YOUTUBE_SYNC_CONFIG)'
+        )
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            self.stdout.write('🔁 Worker de estadísticas iniciado (Ctrl+C para detener)')
+            ejecutar_worker(intervalo=options['intervalo'])
+            return
+
+        estado = sincronizar_estadisticas()
+        velocidad = estado.videos_procesados / estado.duracion_segundos if estado.duracion_segundos else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {estado.videos_procesados} videos sincronizados en {estado.duracion_segundos:.2f}s "
+            f"({velocidad:.1f} videos/s), {estado.videos_escritos} con cambios escritos"
+        ))
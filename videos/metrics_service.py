@@ -0,0 +1,79 @@
+from django.conf import settings  # Configuración
+from django.utils import timezone
+import isodate
+
+CAMPOS_METRICAS = ['engagement', 'vistas_por_dia']  # Derivadas de las estadísticas (se recalculan en cada sync)
+
+# ?orden= de mis_videos → campo con índice (-campo, -id) para paginar por cursor
+ORDENES = {
+    'recientes': 'fecha_publicacion',
+    'largos': 'duracion_segundos',
+    'engagement': 'engagement',
+    'populares': 'vistas_por_dia',
+}
+
+
+def duracion_en_segundos(duracion_iso):
+    """'PT15M30S' → 930 (0 si falta o no se puede leer)"""
+    if not duracion_iso:
+        return 0
+    try:
+        return int(isodate.parse_duration(duracion_iso).total_seconds())
+    except (isodate.ISO8601Error, ValueError):
+        return 0
+
+
+def asignar_duracion(video, duracion_iso):
+    """Guarda la duración ISO y lo que se deriva de ella (segundos, es_short) en la instancia"""
+    video.duracion = duracion_iso or ''
+    video.duracion_segundos = duracion_en_segundos(duracion_iso)
+    video.es_short = 0 < video.duracion_segundos <= settings.YOUTUBE_SYNC_CONFIG['duracion_max_short']
+    return video
+
+
+def calcular_metricas(videos, ahora=None):
+    """
+    Calcula engagement y vistas_por_dia de un lote de instancias Video
+
+    Recorre el lote columna por columna (una lista por campo, sin tocar
+    la BD) para que el costo sea el de unas pocas comprensiones de listas
+    aunque el lote sea de miles de filas. Las instancias necesitan vistas,
+    likes, comentarios y fecha_publicacion.
+
+    Returns:
+        list: Las mismas instancias, listas para bulk_update(CAMPOS_METRICAS)
+    """
+    ahora = ahora or timezone.now()
+    vistas = [v.vistas or 0 for v in videos]
+    interacciones = [(v.likes or 0) + (v.comentarios or 0) for v in videos]
+    dias = [max(1.0, (ahora - v.fecha_publicacion).total_seconds() / 86400) for v in videos]
+
+    engagement = [round(i * 100 / n, 2) if n else 0.0 for i, n in zip(interacciones, vistas)]
+    por_dia = [round(n / d, 2) for n, d in zip(vistas, dias)]
+
+    for video, e, p in zip(videos, engagement, por_dia):
+        video.engagement = e
+        video.vistas_por_dia = p
+    return videos
+
+
+def vistas_por_dia_desviada(guardado, nuevo):
+    """
+    True si vale la pena reescribir vistas_por_dia
+
+    Envejece aunque las estadísticas no se muevan, así que solo cuenta como
+    cambio si se alejó más de `tolerancia_vistas_por_dia` del valor guardado.
+    """
+    if guardado is None:
+        return True
+    return abs(nuevo - guardado) > guardado * settings.YOUTUBE_SYNC_CONFIG['tolerancia_vistas_por_dia']
+
+
+def filtrar_shorts(queryset, solo_shorts):
+    """
+    solo_shorts=True: solo Shorts; False: el resto
+
+    Igualdad sobre es_short (no un rango sobre duracion_segundos): así el
+    índice (es_short, -fecha_publicacion, -id) ya entrega las filas en orden.
+    """
+    return queryset.filter(es_short=solo_shorts)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SincronizacionEstado",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nombre", models.CharField(max_length=50, unique=True)),
+                ("ultima_sincronizacion", models.DateTimeField(blank=True, null=True)),
+                ("videos_procesados", models.IntegerField(default=0)),
+                ("duracion_segundos", models.FloatField(default=0)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name_plural": "Estados de sincronización",
+            },
+        ),
+    ]
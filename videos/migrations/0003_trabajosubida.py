@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-16 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0002_sincronizacionestado"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrabajoSubida",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("en_cola", "En cola"),
+                            ("subiendo", "Subiendo"),
+                            ("procesando", "Procesando en YouTube"),
+                            ("terminado", "Terminado"),
+                            ("fallido", "Fallido"),
+                        ],
+                        db_index=True,
+                        default="en_cola",
+                        max_length=20,
+                    ),
+                ),
+                ("archivo", models.CharField(max_length=500)),
+                ("titulo", models.CharField(max_length=300)),
+                ("descripcion", models.TextField(blank=True)),
+                ("categoria", models.CharField(default="22", max_length=5)),
+                ("privacidad", models.CharField(default="private", max_length=20)),
+                ("credenciales", models.TextField()),
+                ("sesion_uri", models.TextField(blank=True)),
+                ("bytes_enviados", models.BigIntegerField(default=0)),
+                ("bytes_totales", models.BigIntegerField(default=0)),
+                ("porcentaje", models.FloatField(default=0)),
+                ("bytes_por_segundo", models.FloatField(default=0)),
+                ("youtube_id", models.CharField(blank=True, max_length=20)),
+                ("error", models.TextField(blank=True)),
+                ("creado", models.DateTimeField(auto_now_add=True)),
+                ("actualizado", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Trabajos de subida",
+                "ordering": ["-creado"],
+            },
+        ),
+    ]
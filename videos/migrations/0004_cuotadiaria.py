@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-16 23:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("videos", "0003_trabajosubida"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CuotaDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(unique=True)),
+                ("unidades", models.BigIntegerField(default=0)),
+                ("llamadas", models.IntegerField(default=0)),
+                ("actualizado", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Cuota diaria",
+                "ordering": ["-fecha"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="quotausage",
+            name="fecha",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterField(
+            model_name="quotausage",
+            name="usuario",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0004_cuotadiaria"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenEstadisticas",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ambito",
+                    models.CharField(
+                        choices=[
+                            ("global", "Global"),
+                            ("usuario", "Por usuario"),
+                            ("canal", "Por canal"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("clave", models.CharField(blank=True, max_length=50)),
+                ("total_videos", models.IntegerField(default=0)),
+                ("total_vistas", models.BigIntegerField(default=0)),
+                ("total_likes", models.BigIntegerField(default=0)),
+                ("total_comentarios", models.BigIntegerField(default=0)),
+                ("actualizado", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Resúmenes de estadísticas",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["-fecha_publicacion", "-id"],
+                name="videos_vide_fecha_p_022f0f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["canal_id"], name="videos_vide_canal_i_b01778_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["categoria"], name="videos_vide_categor_c90695_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="resumenestadisticas",
+            constraint=models.UniqueConstraint(
+                fields=("ambito", "clave"), name="resumen_ambito_clave_unico"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def crear_fulltext(apps, schema_editor):
+    # Solo MySQL tiene FULLTEXT; en SQLite la búsqueda usa el índice en memoria
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE videos_video "
+            "ADD FULLTEXT INDEX video_busqueda_ft (titulo, descripcion, etiquetas)"
+        )
+
+
+def borrar_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE videos_video DROP INDEX video_busqueda_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0005_indices_resumenestadisticas"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_fulltext, borrar_fulltext),
+    ]
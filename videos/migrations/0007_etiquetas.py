@@ -0,0 +1,134 @@
+# Generated by Django 4.2 on 2026-10-17 00:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import unicodedata
+
+
+def normalizar(tag):
+    """Copia de tag_service.normalizar_etiqueta: sin tildes ni mayúsculas"""
+    tag = unicodedata.normalize("NFKD", re.sub(r"\s+", " ", tag).strip())
+    return "".join(c for c in tag if not unicodedata.combining(c)).casefold()[:255]
+
+
+def poblar_etiquetas(apps, schema_editor):
+    """Copia el texto separado por comas de cada video a la tabla intermedia"""
+    Video = apps.get_model("videos", "Video")
+    Etiqueta = apps.get_model("videos", "Etiqueta")
+    VideoEtiqueta = apps.get_model("videos", "VideoEtiqueta")
+
+    por_video = {}
+    for pk, etiquetas in (
+        Video.objects.exclude(etiquetas="").values_list("id", "etiquetas").iterator()
+    ):
+        nombres = (normalizar(tag) for tag in etiquetas.split(","))
+        por_video[pk] = list(dict.fromkeys(n for n in nombres if n))
+    if not por_video:
+        return
+
+    todas = {n for nombres in por_video.values() for n in nombres}
+    Etiqueta.objects.bulk_create(
+        [Etiqueta(nombre=n) for n in todas], batch_size=500, ignore_conflicts=True
+    )
+    ids = {normalizar(nombre): pk for nombre, pk in Etiqueta.objects.values_list("nombre", "id")}
+    VideoEtiqueta.objects.bulk_create(
+        [
+            VideoEtiqueta(video_id=pk, etiqueta_id=ids[n])
+            for pk, nombres in por_video.items()
+            for n in nombres
+        ],
+        batch_size=500,
+    )
+    conteo = (
+        VideoEtiqueta.objects.filter(etiqueta=models.OuterRef("pk"))
+        .order_by()
+        .values("etiqueta")
+        .annotate(n=models.Count("id"))
+        .values("n")
+    )
+    Etiqueta.objects.update(total_videos=models.Subquery(conteo))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0006_video_fulltext"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Etiqueta",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nombre", models.CharField(max_length=255, unique=True)),
+                ("total_videos", models.IntegerField(db_index=True, default=0)),
+            ],
+            options={
+                "ordering": ["nombre"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="video",
+            name="etiquetas",
+            field=models.TextField(blank=True),
+        ),
+        migrations.CreateModel(
+            name="VideoEtiqueta",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "etiqueta",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="videos.etiqueta",
+                    ),
+                ),
+                (
+                    "video",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="videos.video"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="video",
+            name="lista_etiquetas",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="videos",
+                through="videos.VideoEtiqueta",
+                to="videos.etiqueta",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videoetiqueta",
+            index=models.Index(
+                fields=["etiqueta", "video"], name="videos_vide_etiquet_a6d672_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="videoetiqueta",
+            constraint=models.UniqueConstraint(
+                fields=("video", "etiqueta"), name="video_etiqueta_unico"
+            ),
+        ),
+        migrations.RunPython(poblar_etiquetas, migrations.RunPython.noop),
+    ]
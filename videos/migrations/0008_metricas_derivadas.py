@@ -0,0 +1,96 @@
+# Generated by Django 4.2 on 2026-10-17 00:20
+
+from django.db import migrations, models
+from django.utils import timezone
+import isodate
+
+
+def calcular_existentes(apps, schema_editor):
+    """Duración en segundos, es_short y métricas de los videos ya guardados"""
+    Video = apps.get_model("videos", "Video")
+    ahora = timezone.now()
+    lote = []
+    for video in Video.objects.only(
+        "id", "duracion", "fecha_publicacion", "vistas", "likes", "comentarios"
+    ).iterator(chunk_size=2000):
+        try:
+            segundos = int(isodate.parse_duration(video.duracion).total_seconds())
+        except (isodate.ISO8601Error, ValueError):
+            segundos = 0
+        dias = max(1.0, (ahora - video.fecha_publicacion).total_seconds() / 86400)
+        video.duracion_segundos = segundos
+        video.es_short = 0 < segundos <= 180
+        video.engagement = (
+            round((video.likes + video.comentarios) * 100 / video.vistas, 2)
+            if video.vistas
+            else 0.0
+        )
+        video.vistas_por_dia = round(video.vistas / dias, 2)
+        lote.append(video)
+        if len(lote) >= 2000:
+            Video.objects.bulk_update(
+                lote,
+                ["duracion_segundos", "es_short", "engagement", "vistas_por_dia"],
+            )
+            lote = []
+    if lote:
+        Video.objects.bulk_update(
+            lote, ["duracion_segundos", "es_short", "engagement", "vistas_por_dia"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0007_etiquetas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="duracion_segundos",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="video",
+            name="engagement",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="video",
+            name="es_short",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="video",
+            name="vistas_por_dia",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["-duracion_segundos", "-id"],
+                name="videos_vide_duracio_a0c85f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["es_short", "-fecha_publicacion", "-id"],
+                name="videos_vide_es_shor_d0b600_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["-engagement", "-id"], name="videos_vide_engagem_a4a1bb_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["-vistas_por_dia", "-id"], name="videos_vide_vistas__968d0e_idx"
+            ),
+        ),
+        migrations.RunPython(calcular_existentes, migrations.RunPython.noop),
+    ]
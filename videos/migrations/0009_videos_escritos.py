@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0008_metricas_derivadas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sincronizacionestado",
+            name="videos_escritos",
+            field=models.IntegerField(default=0),
+        ),
+    ]
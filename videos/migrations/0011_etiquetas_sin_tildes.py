@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-17 02:10
+
+from django.db import migrations, models
+import re
+import unicodedata
+
+
+def normalizar(tag):
+    """Copia de tag_service.normalizar_etiqueta: sin tildes ni mayúsculas"""
+    tag = unicodedata.normalize("NFKD", re.sub(r"\s+", " ", tag).strip())
+    return "".join(c for c in tag if not unicodedata.combining(c)).casefold()[:255]
+
+
+def fusionar_variantes(apps, schema_editor):
+    """Une las etiquetas que solo difieren en tildes o mayúsculas ('música' / 'musica')"""
+    Etiqueta = apps.get_model("videos", "Etiqueta")
+    VideoEtiqueta = apps.get_model("videos", "VideoEtiqueta")
+
+    grupos = {}
+    for pk, nombre in Etiqueta.objects.order_by("pk").values_list("id", "nombre").iterator():
+        grupos.setdefault(normalizar(nombre), []).append((pk, nombre))
+
+    cambios = False
+    for nombre, filas in grupos.items():
+        destino, nombre_actual = filas[0]
+        duplicadas = [pk for pk, _ in filas[1:]]
+        if duplicadas:
+            cambios = True
+            ya_tienen = set(
+                VideoEtiqueta.objects.filter(etiqueta_id=destino).values_list("video_id", flat=True)
+            )
+            for pk, video_id in (
+                VideoEtiqueta.objects.filter(etiqueta_id__in=duplicadas).values_list("id", "video_id")
+            ):
+                if video_id in ya_tienen:
+                    VideoEtiqueta.objects.filter(pk=pk).delete()
+                else:
+                    VideoEtiqueta.objects.filter(pk=pk).update(etiqueta_id=destino)
+                    ya_tienen.add(video_id)
+            Etiqueta.objects.filter(pk__in=duplicadas).delete()
+        if nombre_actual != nombre:
+            cambios = True
+            Etiqueta.objects.filter(pk=destino).update(nombre=nombre)
+
+    if cambios:
+        conteo = (
+            VideoEtiqueta.objects.filter(etiqueta=models.OuterRef("pk"))
+            .order_by()
+            .values("etiqueta")
+            .annotate(n=models.Count("id"))
+            .values("n")
+        )
+        Etiqueta.objects.update(
+            total_videos=models.functions.Coalesce(models.Subquery(conteo), models.Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0010_trabajosubida_dueno"),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_variantes, migrations.RunPython.noop),
+    ]
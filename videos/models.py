@@ -1,8 +1,6 @@
 from django.db import models  # ORM de Django
 from django.contrib.auth.models import User  # Usuario
-from cryptography.fernet import Fernet
-from django.conf import settings
-from datetime import datetime
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,12 +23,16 @@ class Video(models.Model):
     
     # Detalles
     duracion = models.CharField(max_length=20, blank=True)  # Formato ISO 8601 (PT15M30S)
+    duracion_segundos = models.PositiveIntegerField(default=0)  # La misma duración ya parseada (0 = desconocida)
+    es_short = models.BooleanField(default=False)  # 0 < duracion_segundos ≤ duracion_max_short
     fecha_publicacion = models.DateTimeField()  # Cuándo se publicó en YouTube
     
     # Estadísticas (se actualizan periódicamente)
     vistas = models.BigIntegerField(default=0)  # Visualizaciones en YouTube
     likes = models.IntegerField(default=0)  # Me gusta
     comentarios = models.IntegerField(default=0)  # Cantidad de comentarios
+    engagement = models.FloatField(default=0)  # (likes + comentarios) / vistas × 100
+    vistas_por_dia = models.FloatField(default=0)  # Vistas / días desde la publicación
     
     # Categorización local
     categoria = models.CharField(max_length=50, choices=[  # Categorías personalizadas
@@ -40,7 +42,10 @@ class Video(models.Model):
         ('seguridad', 'Seguridad'),
         ('otro', 'Otro'),
     ])
-    etiquetas = models.CharField(max_length=500, blank=True)  # Tags separados por comas
+    etiquetas = models.TextField(blank=True)  # Tags separados por comas (texto completo, para buscar y mostrar)
+    lista_etiquetas = models.ManyToManyField(  # Tags normalizados: filtros y nube por índice
+        'Etiqueta', through='VideoEtiqueta', related_name='videos', blank=True
+    )
     
     # Relaciones
     agregado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)  # Usuario que agregó
@@ -52,6 +57,15 @@ class Video(models.Model):
     class Meta:
         ordering = ['-fecha_publicacion']  # Más recientes primero
         verbose_name_plural = 'Videos'
+        indexes = [
+            models.Index(fields=['-fecha_publicacion', '-id']),  # Listados por fecha (y desempate estable)
+            models.Index(fields=['-duracion_segundos', '-id']),  # Orden "más largos"
+            models.Index(fields=['es_short', '-fecha_publicacion', '-id']),  # Shorts (o no) por fecha
+            models.Index(fields=['-engagement', '-id']),
+            models.Index(fields=['-vistas_por_dia', '-id']),
+            models.Index(fields=['canal_id']),
+            models.Index(fields=['categoria']),
+        ]
     
     def __str__(self):
         return self.titulo
@@ -74,7 +88,134 @@ class Playlist(models.Model):
     
     def __str__(self):
         return self.nombre
-    
+
+
+class Etiqueta(models.Model):
+    """Tag de YouTube normalizado (una fila por tag distinto)"""
+
+    nombre = models.CharField(max_length=255, unique=True)  # Normalizado (ver tag_service.normalizar_etiqueta)
+    total_videos = models.IntegerField(default=0, db_index=True)  # Videos con el tag (para la nube)
+
+    class Meta:
+        ordering = ['nombre']
+
+    def __str__(self):
+        return self.nombre
+
+
+class VideoEtiqueta(models.Model):
+    """Tabla intermedia Video ↔ Etiqueta"""
+
+    video = models.ForeignKey(Video, on_delete=models.CASCADE)
+    etiqueta = models.ForeignKey(Etiqueta, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'etiqueta'], name='video_etiqueta_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['etiqueta', 'video']),  # Filtrar por tag sin tocar la tabla Video
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} → {self.etiqueta_id}"
+
+
+class SincronizacionEstado(models.Model):
+    """Marca de la última sincronización ejecutada por los workers en segundo plano"""
+
+    nombre = models.CharField(max_length=50, unique=True)  # estadisticas, canal, etc.
+    ultima_sincronizacion = models.DateTimeField(null=True, blank=True)  # Última ejecución exitosa
+    videos_procesados = models.IntegerField(default=0)  # Videos consultados en la última corrida
+    videos_escritos = models.IntegerField(default=0)  # De ellos, los que cambiaron y se escribieron
+    duracion_segundos = models.FloatField(default=0)  # Cuánto tardó la última corrida
+    error = models.TextField(blank=True)  # Último error (vacío si terminó bien)
+
+    class Meta:
+        verbose_name_plural = 'Estados de sincronización'
+
+    def __str__(self):
+        return f"{self.nombre} ({self.ultima_sincronizacion})"
+
+
+class ResumenEstadisticas(models.Model):
+    """Totales precalculados de la tabla Video (global, por usuario y por canal)"""
+
+    GLOBAL = 'global'
+    USUARIO = 'usuario'
+    CANAL = 'canal'
+    AMBITOS = [
+        (GLOBAL, 'Global'),
+        (USUARIO, 'Por usuario'),
+        (CANAL, 'Por canal'),
+    ]
+
+    ambito = models.CharField(max_length=10, choices=AMBITOS)
+    clave = models.CharField(max_length=50, blank=True)  # '' (global), pk del usuario o canal_id
+    total_videos = models.IntegerField(default=0)
+    total_vistas = models.BigIntegerField(default=0)
+    total_likes = models.BigIntegerField(default=0)
+    total_comentarios = models.BigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ambito', 'clave'], name='resumen_ambito_clave_unico'),
+        ]
+        verbose_name_plural = 'Resúmenes de estadísticas'
+
+    def __str__(self):
+        return f"{self.ambito}:{self.clave} ({self.total_videos} videos)"
+
+
+class TrabajoSubida(models.Model):
+    """Subida a YouTube encolada para el pool de workers"""
+
+    EN_COLA = 'en_cola'
+    SUBIENDO = 'subiendo'
+    PROCESANDO = 'procesando'
+    TERMINADO = 'terminado'
+    FALLIDO = 'fallido'
+    ESTADOS = [
+        (EN_COLA, 'En cola'),
+        (SUBIENDO, 'Subiendo'),
+        (PROCESANDO, 'Procesando en YouTube'),
+        (TERMINADO, 'Terminado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=EN_COLA, db_index=True)
+    archivo = models.CharField(max_length=500)  # Ruta del video en disco
+    titulo = models.CharField(max_length=300)
+    descripcion = models.TextField(blank=True)
+    categoria = models.CharField(max_length=5, default='22')  # ID de categoría de YouTube
+    privacidad = models.CharField(max_length=20, default='private')  # public, private, unlisted
+    credenciales = models.TextField()  # Credenciales OAuth de la sesión (JSON cifrado con FERNET_KEYS)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # Dueño (si inició sesión)
+    sesion = models.CharField(max_length=40, blank=True, db_index=True)  # session_key del dueño anónimo
+    sesion_uri = models.TextField(blank=True)  # URI de la subida reanudable
+
+    # Progreso
+    bytes_enviados = models.BigIntegerField(default=0)
+    bytes_totales = models.BigIntegerField(default=0)
+    porcentaje = models.FloatField(default=0)
+    bytes_por_segundo = models.FloatField(default=0)
+
+    # Resultado
+    youtube_id = models.CharField(max_length=20, blank=True)
+    error = models.TextField(blank=True)
+
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name_plural = 'Trabajos de subida'
+
+    def __str__(self):
+        return f"{self.titulo} ({self.estado})"
+
+
 class YouTubeToken(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     access_token = models.TextField()  # Expira en 1h, no crítico
@@ -82,39 +223,42 @@ class YouTubeToken(models.Model):
     token_expiry = models.DateTimeField()
     
     def encrypt_refresh_token(self, token):
-        cipher = Fernet(settings.FERNET_KEY)
-        return cipher.encrypt(token.encode()).decode()
+        from .credentials_service import cifrar  # Un solo MultiFernet por proceso (FERNET_KEYS)
+        return cifrar(token)
     
     def decrypt_refresh_token(self):
-        cipher = Fernet(settings.FERNET_KEY)
-        return cipher.decrypt(self.refresh_token_encrypted.encode()).decode()
+        from .credentials_service import descifrar
+        return descifrar(self.refresh_token_encrypted)
     
 class QuotaUsage(models.Model):
-    fecha = models.DateField(auto_now_add=True)
+    fecha = models.DateField(default=timezone.localdate)  # Día en que se gastó (no el del guardado en lote)
     operacion = models.CharField(max_length=50)  # search, upload, etc.
     unidades = models.IntegerField()
-    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # None = worker / API key
     
     class Meta:
         indexes = [
             models.Index(fields=['fecha'])
         ]
 
-def registrar_uso_cuota(operacion, unidades, usuario):
-    QuotaUsage.objects.create(
-        operacion=operacion,
-        unidades=unidades,
-        usuario=usuario
-    )
-    
-    # Verificar si excede límite diario
-    hoy = datetime.date.today()
-    total_hoy = QuotaUsage.objects.filter(fecha=hoy).aggregate(
-        total=models.Sum('unidades')
-    )['total'] or 0
-    
-    if total_hoy > 9000:  # 90% del límite
-        logger.warning(f"⚠️ Cuota casi agotada: {total_hoy}/10000")
 
+class CuotaDiaria(models.Model):
+    """Total de unidades gastadas por día (se incrementa con F(), nunca se recalcula)"""
+
+    fecha = models.DateField(unique=True)
+    unidades = models.BigIntegerField(default=0)
+    llamadas = models.IntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name_plural = 'Cuota diaria'
+
+    def __str__(self):
+        return f"{self.fecha}: {self.unidades} unidades"
 
 
+def registrar_uso_cuota(operacion, unidades, usuario=None):
+    """Registra unidades gastadas (ver quota_service.contador_cuota)"""
+    from .quota_service import contador_cuota  # Import diferido: quota_service importa estos modelos
+    return contador_cuota.registrar(operacion, unidades, usuario)
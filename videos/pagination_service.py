@@ -0,0 +1,194 @@
+from django.conf import settings  # Configuración
+from django.db.models import DateTimeField, Q
+from datetime import datetime
+import binascii
+import base64
+import json
+import math
+
+ADELANTE = 'sig'  # Cursor que apunta a la página siguiente
+ATRAS = 'ant'  # Cursor que apunta a la página anterior
+
+
+def codificar_cursor(datos):
+    """dict → token corto y seguro para la URL"""
+    crudo = json.dumps(datos, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """Token de codificar_cursor → dict; None si falta o fue alterado"""
+    if not token:
+        return None
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        return None
+    return datos if isinstance(datos, dict) else None
+
+
+def tamano_pagina(valor=None):
+    """?por_pagina= validado y acotado a tamano_maximo"""
+    config = settings.YOUTUBE_PAGINATION_CONFIG
+    try:
+        tamano = int(valor)
+    except (TypeError, ValueError):
+        return config['tamano_pagina']
+    return max(1, min(tamano, config['tamano_maximo']))
+
+
+class PaginaCursor:
+    """
+    Una página de videos; se itera como la lista que contiene
+
+    A diferencia de django.core.paginator.Page no conoce el total exacto:
+    `total` es opcional (p. ej. el de ResumenEstadisticas) y solo sirve
+    para mostrar "página X de ~Y".
+    """
+
+    def __init__(self, videos, tamano, numero=1, cursor_siguiente=None, cursor_anterior=None, total=None):
+        self.videos = videos
+        self.tamano = tamano
+        self.numero = numero
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.videos)
+
+    def __len__(self):
+        return len(self.videos)
+
+    def __bool__(self):
+        return bool(self.videos)
+
+    @property
+    def hay_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def hay_anterior(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def hay_otras(self):
+        return self.hay_siguiente or self.hay_anterior
+
+    @property
+    def total_paginas(self):
+        if self.total is None:
+            return None
+        return max(self.numero, math.ceil(self.total / self.tamano))
+
+
+def paginar_por_campo(queryset, campo, cursor=None, tamano=None, total=None):
+    """
+    Paginación keyset sobre (campo, id), de mayor a menor
+
+    Cada página es un WHERE (campo, id) < (última fila vista) ... LIMIT n+1
+    que usa el índice (-campo, -id): la página 500 cuesta lo mismo que la
+    primera, sin OFFSET ni COUNT(*).
+
+    Args:
+        queryset: Videos a paginar (se reordena por -campo, -id)
+        campo: Columna con índice (-campo, -id), p. ej. fecha_publicacion
+        cursor: Token de una página anterior (None = primera página)
+        tamano: Videos por página (por defecto tamano_pagina)
+        total: Total conocido o aproximado, solo para mostrar
+
+    Returns:
+        PaginaCursor
+    """
+    tamano = tamano or tamano_pagina()
+    datos = decodificar_cursor(cursor) or {}
+    es_fecha = isinstance(queryset.model._meta.get_field(campo), DateTimeField)
+    numero = 1
+    filtro = None
+    direccion = datos.get('d')
+
+    try:
+        if datos.get('c', 'fecha_publicacion') != campo:
+            raise ValueError('El cursor es de otro orden')
+        valor = datetime.fromisoformat(datos['f']) if es_fecha else float(datos['f'])
+        pk = int(datos['id'])
+        numero = max(1, int(datos.get('p', 1)))
+    except (KeyError, TypeError, ValueError):
+        direccion = None  # Cursor inválido: primera página
+
+    # (campo, id) < (v, pk) escrito con una cota simple sobre campo: con solo
+    # el OR, MySQL/SQLite no acotan el rango del índice y recorren desde el inicio
+    if direccion == ADELANTE:
+        filtro = Q(**{f'{campo}__lte': valor}) & (Q(**{f'{campo}__lt': valor}) | Q(id__lt=pk))
+    elif direccion == ATRAS:
+        filtro = Q(**{f'{campo}__gte': valor}) & (Q(**{f'{campo}__gt': valor}) | Q(id__gt=pk))
+
+    if direccion == ATRAS:
+        filas = list(queryset.filter(filtro).order_by(campo, 'id')[:tamano + 1])
+        hay_anterior = len(filas) > tamano
+        videos = filas[:tamano][::-1]
+        hay_siguiente = True
+        if not hay_anterior:
+            numero = 1  # Llegamos al principio aunque se hayan agregado videos mientras tanto
+        if not videos:
+            return paginar_por_campo(queryset, campo, None, tamano, total)
+    else:
+        if direccion != ADELANTE:
+            numero = 1
+        else:
+            queryset = queryset.filter(filtro)
+        filas = list(queryset.order_by(f'-{campo}', '-id')[:tamano + 1])
+        hay_siguiente = len(filas) > tamano
+        videos = filas[:tamano]
+        hay_anterior = direccion == ADELANTE
+
+    def cursor_de(video, hacia, numero_destino):
+        valor = getattr(video, campo)
+        return codificar_cursor({'c': campo, 'd': hacia, 'f': valor.isoformat() if es_fecha else valor,
+                                 'id': video.pk, 'p': numero_destino})
+
+    return PaginaCursor(
+        videos, tamano, numero,
+        cursor_siguiente=cursor_de(videos[-1], ADELANTE, numero + 1) if hay_siguiente and videos else None,
+        cursor_anterior=cursor_de(videos[0], ATRAS, numero - 1) if hay_anterior and videos else None,
+        total=total,
+    )
+
+
+def paginar_por_fecha(queryset, cursor=None, tamano=None, total=None):
+    """paginar_por_campo sobre (fecha_publicacion, id): de la más reciente a la más vieja"""
+    return paginar_por_campo(queryset, 'fecha_publicacion', cursor, tamano, total)
+
+
+def paginar_por_posicion(queryset, cursor=None, tamano=None, total=None):
+    """
+    Pagina una lista ya ordenada por relevancia (resultados de búsqueda)
+
+    El orden por relevancia no es un par de columnas sobre el que hacer
+    keyset, pero la lista está acotada por max_resultados: el desplazamiento
+    nunca pasa de ese tope.
+    """
+    tamano = tamano or tamano_pagina()
+    datos = decodificar_cursor(cursor) or {}
+    tope = settings.YOUTUBE_SEARCH_CONFIG['max_resultados']
+    try:
+        desde = min(max(0, int(datos.get('o', 0))), tope)
+    except (TypeError, ValueError):
+        desde = 0
+
+    filas = list(queryset[desde:min(desde + tamano, tope) + 1])
+    hay_siguiente = len(filas) > tamano and desde + tamano < tope
+    numero = desde // tamano + 1
+    return PaginaCursor(
+        filas[:tamano], tamano, numero,
+        cursor_siguiente=codificar_cursor({'o': desde + tamano}) if hay_siguiente else None,
+        cursor_anterior=codificar_cursor({'o': max(0, desde - tamano)}) if desde else None,
+        total=None if total is None else min(total, tope),
+    )
+
+
+def url_pagina(request, cursor):
+    """Query string actual (buscar, por_pagina...) con otro cursor"""
+    parametros = request.GET.copy()
+    parametros['cursor'] = cursor
+    return f"?{parametros.urlencode()}"
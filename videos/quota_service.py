@@ -0,0 +1,156 @@
+from django.conf import settings  # Configuración
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import QuotaUsage, CuotaDiaria
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import threading
+import logging
+import atexit
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _ahora_cuota():
+    return timezone.now().astimezone(ZoneInfo(settings.YOUTUBE_QUOTA_CONFIG['zona_horaria']))
+
+
+def dia_cuota():
+    """Día de cuota actual (YouTube lo cuenta en hora del Pacífico)"""
+    return _ahora_cuota().date()
+
+
+def fraccion_dia():
+    """Qué parte del día de cuota ya pasó (0.0 a medianoche, 1.0 al final)"""
+    ahora = _ahora_cuota()
+    medianoche = datetime.combine(ahora.date(), datetime.min.time(), tzinfo=ahora.tzinfo)
+    return (ahora - medianoche) / timedelta(days=1)
+
+
+class ContadorCuota:
+    """
+    Contabilidad de la cuota diaria de la YouTube API
+
+    - El total del día es la fila CuotaDiaria, que cada llamada incrementa
+      con un UPDATE ... F() atómico en la BD compartida: todos los procesos
+      (gunicorn, workers) ven el mismo total y consultarlo es O(1), sin SUM
+      sobre QuotaUsage. reservar() además condiciona el UPDATE al tope, así
+      admitir y cobrar son un solo paso que dos procesos no pueden intercalar.
+    - Las filas de detalle QuotaUsage se acumulan en memoria y se guardan
+      con bulk_create cada `lote_registro` filas o `intervalo_registro` segundos.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._ultimo_vaciado = time.monotonic()
+
+    @property
+    def config(self):
+        return settings.YOUTUBE_QUOTA_CONFIG
+
+    def _sumar(self, fecha, unidades, tope=None):
+        """
+        Suma `unidades` a CuotaDiaria con un UPDATE atómico
+
+        Con tope solo suma si el total del día no lo pasa (WHERE unidades <= tope - unidades).
+
+        Returns:
+            tuple: (si se sumó, total del día ya incluida la suma)
+        """
+        filas = CuotaDiaria.objects.filter(fecha=fecha)
+        if tope is not None:
+            filas = filas.filter(unidades__lte=tope - unidades)
+        with transaction.atomic():
+            sumado = filas.update(unidades=F('unidades') + unidades, llamadas=F('llamadas') + 1) == 1
+            total = CuotaDiaria.objects.filter(fecha=fecha).values_list('unidades', flat=True).first()
+        if total is None:  # Primera llamada del día
+            CuotaDiaria.objects.get_or_create(fecha=fecha)
+            return self._sumar(fecha, unidades, tope)
+        return sumado, total
+
+    def _anotar(self, fecha, operacion, unidades, usuario, total):
+        umbral = self.config['warning_threshold']
+        if total - unidades < umbral <= total:  # Solo al cruzar el umbral, no en cada llamada
+            logger.warning(f"⚠️ Cuota casi agotada: {total}/{self.config['daily_limit']}")
+
+        with self._lock:
+            self._buffer.append(QuotaUsage(fecha=fecha, operacion=operacion, unidades=unidades, usuario=usuario))
+            lleno = len(self._buffer) >= self.config['lote_registro']
+            vencido = time.monotonic() - self._ultimo_vaciado >= self.config['intervalo_registro']
+        if lleno or vencido:
+            self.vaciar()
+
+    def reservar(self, operacion, unidades, tope, usuario=None):
+        """
+        Cobra `unidades` solo si el total del día queda en `tope` o menos
+
+        Returns:
+            tuple: (admitida, total del día); si no se admitió el total es el
+                actual, sin la llamada
+        """
+        hoy = dia_cuota()
+        admitida, total = self._sumar(hoy, unidades, tope)
+        if admitida:
+            self._anotar(hoy, operacion, unidades, usuario, total)
+        return admitida, total
+
+    def registrar(self, operacion, unidades, usuario=None):
+        """
+        Registra unidades gastadas sin tope y devuelve el total del día
+
+        Args:
+            operacion: Nombre de la operación (search.list, videos.insert, ...)
+            unidades: Costo en unidades de cuota
+            usuario: Usuario que la originó (None para workers / API key)
+        """
+        hoy = dia_cuota()
+        _, total = self._sumar(hoy, unidades)
+        self._anotar(hoy, operacion, unidades, usuario, total)
+        return total
+
+    def vaciar(self):
+        """Guarda el detalle pendiente con un bulk_create (el total ya está en CuotaDiaria)"""
+        with self._lock:
+            filas, self._buffer = self._buffer, []
+            self._ultimo_vaciado = time.monotonic()
+        if filas:
+            QuotaUsage.objects.bulk_create(filas)
+        return len(filas)
+
+    def usado_hoy(self):
+        """Unidades gastadas hoy (lectura O(1) de CuotaDiaria)"""
+        return CuotaDiaria.objects.filter(fecha=dia_cuota()).values_list('unidades', flat=True).first() or 0
+
+    def disponible(self, unidades=0):
+        """True si todavía caben `unidades` en la cuota de hoy"""
+        return self.usado_hoy() + unidades <= self.config['daily_limit']
+
+
+class ContadorEnMemoria(ContadorCuota):
+    """Mismas reglas que ContadorCuota sin tocar la BD (benchmarks contra el servidor falso)"""
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+
+    def _sumar(self, fecha, unidades, tope=None):
+        with self._lock:
+            if tope is not None and self.total + unidades > tope:
+                return False, self.total
+            self.total += unidades
+            return True, self.total
+
+    def vaciar(self):
+        with self._lock:
+            filas, self._buffer = self._buffer, []
+        return len(filas)
+
+    def usado_hoy(self):
+        return self.total
+
+
+contador_cuota = ContadorCuota()  # Uno por proceso
+atexit.register(contador_cuota.vaciar)  # No perder el detalle pendiente al apagar
@@ -0,0 +1,207 @@
+from array import array
+from bisect import bisect_left
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+from .models import Video
+import threading
+import unicodedata
+import logging
+import heapq
+import time
+import re
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = 'indice_busqueda_version'  # Se incrementa cuando cambian títulos/descripciones/etiquetas
+PESOS = {'titulo': 3, 'etiquetas': 2, 'descripcion': 1}  # Relevancia de cada campo
+LARGO_MINIMO_FULLTEXT = 3  # innodb_ft_min_token_size por defecto
+_PALABRA = re.compile(r'\w+')
+
+
+def tokenizar(texto):
+    """'Programación en Python 3' → ['programacion', 'en', 'python']"""
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [token for token in _PALABRA.findall(texto) if len(token) >= 2]
+
+
+def _por_puntaje(item):
+    documento, puntaje = item
+    return puntaje, documento
+
+
+class IndiceInvertido:
+    """
+    Índice invertido en memoria con coincidencia por prefijo
+
+    Cada término guarda sus documentos y pesos en arrays compactos (no en
+    dicts), así un millón de videos cabe en decenas de MB. Los prefijos se
+    resuelven con bisect sobre la lista ordenada de términos.
+    """
+
+    def __init__(self):
+        self._pks = array('q')  # documento -> pk de Video
+        self._postings = {}  # término -> (array de documentos, array de pesos)
+        self._terminos = None  # Términos ordenados (se arma en la primera consulta)
+
+    def __len__(self):
+        return len(self._pks)
+
+    def agregar(self, pk, titulo='', descripcion='', etiquetas=''):
+        """Agrega un video; los documentos más recientes deben agregarse al final"""
+        documento = len(self._pks)
+        self._pks.append(pk)
+
+        pesos = {}
+        for campo, texto in (('titulo', titulo), ('descripcion', descripcion), ('etiquetas', etiquetas)):
+            for token in tokenizar(texto):
+                pesos[token] = min(255, pesos.get(token, 0) + PESOS[campo])
+
+        for token, peso in pesos.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = (array('I'), array('B'))
+            posting[0].append(documento)
+            posting[1].append(peso)
+        self._terminos = None
+
+    def _expandir(self, prefijo):
+        """Términos del índice que empiezan con `prefijo`"""
+        if self._terminos is None:
+            self._terminos = sorted(self._postings)
+        terminos = self._terminos
+        i = bisect_left(terminos, prefijo)
+        while i < len(terminos) and terminos[i].startswith(prefijo):
+            yield terminos[i]
+            i += 1
+
+    def buscar(self, consulta, limite=None):
+        """
+        pks que contienen TODOS los términos (por prefijo), del más relevante al menos
+
+        Una coincidencia exacta vale el doble que una por prefijo; a igual
+        puntaje gana el documento agregado más tarde (el más reciente).
+        """
+        puntajes = None
+        for token in dict.fromkeys(tokenizar(consulta)):
+            del_token = {}
+            for termino in self._expandir(token):
+                factor = 2 if termino == token else 1
+                documentos, pesos = self._postings[termino]
+                for documento, peso in zip(documentos, pesos):
+                    del_token[documento] = del_token.get(documento, 0) + peso * factor
+
+            if puntajes is None:
+                puntajes = del_token
+            else:
+                puntajes = {d: p + del_token[d] for d, p in puntajes.items() if d in del_token}
+            if not puntajes:
+                return []
+
+        if not puntajes:
+            return []
+        if limite:
+            orden = heapq.nlargest(limite, puntajes.items(), key=_por_puntaje)
+        else:
+            orden = sorted(puntajes.items(), key=_por_puntaje, reverse=True)
+        return [self._pks[documento] for documento, _ in orden]
+
+
+_indice = None
+_indice_version = None
+_indice_creado = 0.0
+_lock = threading.Lock()
+
+
+def invalidar_indice():
+    """Avisa a todos los procesos que el texto de algún video cambió"""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+
+
+def construir_indice():
+    """Lee título, descripción y etiquetas de toda la tabla en streaming"""
+    indice = IndiceInvertido()
+    filas = Video.objects.order_by('fecha_publicacion', 'id').values_list(
+        'id', 'titulo', 'descripcion', 'etiquetas'
+    )
+    for pk, titulo, descripcion, etiquetas in filas.iterator(chunk_size=5000):
+        indice.agregar(pk, titulo, descripcion, etiquetas)
+    return indice
+
+
+def _indice_desactualizado(version):
+    vencido = time.monotonic() - _indice_creado > settings.YOUTUBE_SEARCH_CONFIG['reconstruir_cada']
+    return _indice is None or version != _indice_version or vencido
+
+
+def obtener_indice():
+    """Índice del proceso; se reconstruye si cambió la versión o venció"""
+    global _indice, _indice_version, _indice_creado
+    version = cache.get(CLAVE_VERSION, 0)
+    if _indice_desactualizado(version):
+        with _lock:
+            if _indice_desactualizado(version):
+                inicio = time.monotonic()
+                _indice = construir_indice()
+                _indice_version = version
+                _indice_creado = time.monotonic()
+                logger.info(f"🔎 Índice de búsqueda: {len(_indice)} videos en {_indice_creado - inicio:.2f}s")
+    return _indice
+
+
+def motor_busqueda():
+    motor = settings.YOUTUBE_SEARCH_CONFIG['motor']
+    if motor == 'auto':
+        return 'fulltext' if connection.vendor == 'mysql' else 'indice'
+    return motor
+
+
+def expresion_booleana(consulta):
+    """'django rest' → '+django* +rest*' (todas las palabras, por prefijo)"""
+    tokens = [t for t in tokenizar(consulta) if len(t) >= LARGO_MINIMO_FULLTEXT]
+    return ' '.join(f'+{token}*' for token in dict.fromkeys(tokens))
+
+
+def buscar_en_biblioteca(consulta, queryset=None):
+    """
+    Videos locales que coinciden con `consulta`, ordenados por relevancia
+
+    En MySQL usa el índice FULLTEXT (MATCH ... AGAINST en modo booleano);
+    en otros motores, el índice invertido en memoria. Ambos exigen todas
+    las palabras y aceptan prefijos ('djan' encuentra 'django').
+
+    Args:
+        consulta: Texto escrito por el usuario
+        queryset: Queryset base (por defecto todos los videos)
+
+    Returns:
+        QuerySet: Videos ordenados del más relevante al menos relevante
+    """
+    queryset = Video.objects.all() if queryset is None else queryset
+    limite = settings.YOUTUBE_SEARCH_CONFIG['max_resultados']
+
+    if motor_busqueda() == 'fulltext':
+        expresion = expresion_booleana(consulta)
+        if not expresion:
+            # Solo palabras más cortas que el mínimo de InnoDB: no hay índice que sirva
+            return queryset.filter(Q(titulo__icontains=consulta) | Q(descripcion__icontains=consulta))
+        tabla = Video._meta.db_table
+        relevancia = RawSQL(
+            f"MATCH({tabla}.titulo, {tabla}.descripcion, {tabla}.etiquetas) AGAINST (%s IN BOOLEAN MODE)",
+            [expresion]
+        )
+        return queryset.annotate(relevancia=relevancia).filter(relevancia__gt=0).order_by(
+            '-relevancia', '-fecha_publicacion', '-id'
+        )
+
+    pks = obtener_indice().buscar(consulta, limite=limite)
+    if not pks:
+        return queryset.none()
+    posicion = Case(*[When(pk=pk, then=i) for i, pk in enumerate(pks)], output_field=IntegerField())
+    return queryset.filter(pk__in=pks).annotate(posicion=posicion).order_by('posicion')
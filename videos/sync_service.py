@@ -0,0 +1,368 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from .models import Video, SincronizacionEstado, ResumenEstadisticas
+from .youtube_client import obtener_cliente
+from .api_gateway import ejecutar_condicional, guardar_etag, CuotaExcedida, FONDO
+from .tag_service import recalcular_totales
+from .metrics_service import CAMPOS_METRICAS, calcular_metricas, vistas_por_dia_desviada
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SYNC_ESTADISTICAS = 'estadisticas'  # Nombre del marcador en SincronizacionEstado
+CACHE_DASHBOARD = 'dashboard_estadisticas'  # Totales ya agregados para `inicio`
+
+
+TOTALES = ['total_videos', 'total_vistas', 'total_likes', 'total_comentarios']
+
+
+def recalcular_resumenes():
+    """
+    Recalcula ResumenEstadisticas (global, por canal y por usuario)
+
+    Son tres GROUP BY sobre Video y un upsert; lo ejecuta el worker después
+    de cada sincronización para que las vistas solo lean filas ya sumadas.
+    """
+    agregados = {
+        'total_videos': Count('id'),
+        'total_vistas': Sum('vistas'),
+        'total_likes': Sum('likes'),
+        'total_comentarios': Sum('comentarios'),
+    }
+
+    def fila(ambito, clave, valores):
+        return ResumenEstadisticas(ambito=ambito, clave=clave, **{t: valores[t] or 0 for t in TOTALES})
+
+    filas = [fila(ResumenEstadisticas.GLOBAL, '', Video.objects.aggregate(**agregados))]
+    for valores in Video.objects.order_by().exclude(canal_id='').values('canal_id').annotate(**agregados):
+        filas.append(fila(ResumenEstadisticas.CANAL, valores['canal_id'], valores))
+    for valores in Video.objects.order_by().exclude(agregado_por=None).values('agregado_por').annotate(**agregados):
+        filas.append(fila(ResumenEstadisticas.USUARIO, str(valores['agregado_por']), valores))
+
+    vigentes = {(f.ambito, f.clave) for f in filas}
+    with transaction.atomic():
+        ResumenEstadisticas.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            # MySQL resuelve el conflicto por cualquier UNIQUE y no acepta unique_fields
+            unique_fields=['ambito', 'clave'] if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=TOTALES + ['actualizado'],
+        )
+        sobrantes = [
+            pk for pk, ambito, clave in ResumenEstadisticas.objects.values_list('pk', 'ambito', 'clave')
+            if (ambito, clave) not in vigentes
+        ]
+        ResumenEstadisticas.objects.filter(pk__in=sobrantes).delete()  # Canales/usuarios sin videos
+    return len(filas)
+
+
+def sumar_a_resumenes(videos=0, vistas=0, likes=0, comentarios=0, canal_id='', usuario_id=None):
+    """Aplica un incremento a los resúmenes afectados con F() (videos nuevos, subidas)"""
+    ambitos = [(ResumenEstadisticas.GLOBAL, '')]
+    if canal_id:
+        ambitos.append((ResumenEstadisticas.CANAL, canal_id))
+    if usuario_id:
+        ambitos.append((ResumenEstadisticas.USUARIO, str(usuario_id)))
+
+    for ambito, clave in ambitos:
+        ResumenEstadisticas.objects.get_or_create(ambito=ambito, clave=clave)
+        ResumenEstadisticas.objects.filter(ambito=ambito, clave=clave).update(
+            total_videos=F('total_videos') + videos,
+            total_vistas=F('total_vistas') + vistas,
+            total_likes=F('total_likes') + likes,
+            total_comentarios=F('total_comentarios') + comentarios,
+            actualizado=timezone.now(),
+        )
+    cache.delete(CACHE_DASHBOARD)
+
+
+def obtener_resumen(ambito=ResumenEstadisticas.GLOBAL, clave=''):
+    """Fila de ResumenEstadisticas (lectura O(1)); la global se crea si aún no existe"""
+    resumen = ResumenEstadisticas.objects.filter(ambito=ambito, clave=clave).first()
+    if resumen is None and ambito == ResumenEstadisticas.GLOBAL:
+        recalcular_resumenes()
+        resumen = ResumenEstadisticas.objects.get(ambito=ambito, clave=clave)
+    return resumen
+
+
+def calcular_estadisticas_dashboard():
+    """Lee los totales del dashboard del resumen global y los deja en caché hasta la siguiente corrida"""
+    resumen = obtener_resumen()
+    estado = SincronizacionEstado.objects.filter(nombre=SYNC_ESTADISTICAS).first()
+
+    datos = {
+        'total_videos': resumen.total_videos,
+        'total_views': resumen.total_vistas,
+        'total_likes': resumen.total_likes,
+        'ultima_sincronizacion': estado.ultima_sincronizacion if estado else None,
+    }
+    cache.set(CACHE_DASHBOARD, datos, timeout=settings.YOUTUBE_SYNC_CONFIG['intervalo'])
+    return datos
+
+
+def obtener_estadisticas_dashboard():
+    """Lee los totales del dashboard desde caché (o los agrega si aún no existen)"""
+    datos = cache.get(CACHE_DASHBOARD)
+    if datos is None:
+        datos = calcular_estadisticas_dashboard()
+    return datos
+
+
+class SincronizadorEstadisticas:
+    """
+    Motor de sincronización de estadísticas para tablas de cualquier tamaño
+
+    Lee los IDs de la BD en streaming, los agrupa en páginas de 50 (límite de
+    videos.list), consulta varias páginas a la vez con un pool de hilos acotado
+    y escribe los resultados con bulk_update en lotes grandes.
+
+    Las páginas se piden con If-None-Match: si YouTube responde 304 ninguno
+    de esos 50 videos cambió y la página no se parsea ni se escribe. Para
+    que la misma página tenga la misma firma entre corridas, los IDs se
+    leen en orden de pk. El ETag de una página se guarda recién cuando sus
+    filas ya están escritas: si la escritura falla, la próxima corrida la
+    vuelve a recibir completa en vez de un 304.
+
+    Las páginas que sí cambiaron se comparan video por video contra los
+    valores que ya tiene la fila: solo se escriben los videos con vistas,
+    likes o comentarios distintos, o cuyo vistas_por_dia guardado se alejó
+    más de `tolerancia_vistas_por_dia` (envejece aunque las vistas no se
+    muevan). En un catálogo estable casi no hay escrituras.
+    """
+
+    IDS_POR_PAGINA = 50  # Máximo de IDs que acepta videos.list
+
+    def __init__(self, credentials=None, workers=None, lote_escritura=None, videos=None):
+        config = settings.YOUTUBE_SYNC_CONFIG
+        self.credentials = credentials
+        self.videos = videos if videos is not None else Video.objects.all()  # Queryset a sincronizar
+        self.workers = workers or config['workers']
+        self.lote_escritura = lote_escritura or config['lote_escritura']
+
+    def _cliente(self):
+        """Cliente de YouTube del hilo actual (la fábrica mantiene uno por hilo)"""
+        return obtener_cliente(self.credentials)
+
+    def _paginas(self):
+        """
+        Genera páginas de {youtube_id: (pk, fecha_publicacion, vistas, likes,
+        comentarios, vistas_por_dia)} leyendo la BD en bloques de 2000 por pk
+
+        Cada bloque es una consulta completa (pk > último) y no un cursor
+        abierto con iterator(): en SQLite un cursor abierto bloquea los UPDATE
+        de CuotaDiaria que hacen los hilos del pool al cobrar cada página.
+        """
+        pagina = {}
+        filas = self.videos.order_by('pk').values_list(
+            'id', 'youtube_id', 'fecha_publicacion', 'vistas', 'likes', 'comentarios', 'vistas_por_dia'
+        )
+        ultimo = 0
+        while bloque := list(filas.filter(pk__gt=ultimo)[:2000]):
+            ultimo = bloque[-1][0]
+            for pk, youtube_id, *actuales in bloque:
+                pagina[youtube_id] = (pk, *actuales)
+                if len(pagina) == self.IDS_POR_PAGINA:
+                    yield pagina
+                    pagina = {}
+        if pagina:
+            yield pagina
+
+    def _cambio(self, video, vistas, likes, comentarios, vistas_por_dia):
+        """True si la fila guardada (valores de _paginas) difiere de lo que trajo la API"""
+        if (video.vistas, video.likes, video.comentarios) != (vistas, likes, comentarios):
+            return True
+        return vistas_por_dia_desviada(vistas_por_dia, video.vistas_por_dia)
+
+    def _consultar_pagina(self, pagina):
+        """
+        Consulta una página de IDs y se queda con los videos que cambiaron
+
+        Returns:
+            tuple: (instancias para bulk_update, videos sin cambios, (uri, respuesta)
+                para guardar_etag tras escribirlas); las instancias y el ETag son
+                None si la página entera no cambió (304)
+        """
+        request = self._cliente().videos().list(
+            part='statistics',
+            id=','.join(pagina),
+            maxResults=self.IDS_POR_PAGINA
+        )
+        response, modificada = ejecutar_condicional(request, prioridad=FONDO, guardar=False)
+        if not modificada:
+            return None, len(pagina), None
+
+        videos = []
+        for item in response.get('items', []):
+            if item['id'] not in pagina:
+                continue
+            stats = item.get('statistics', {})
+            pk, fecha, *_ = pagina[item['id']]
+            videos.append(Video(
+                pk=pk,
+                fecha_publicacion=fecha,
+                youtube_id=item['id'],
+                vistas=int(stats.get('viewCount', 0)),
+                likes=int(stats.get('likeCount', 0)),
+                comentarios=int(stats.get('commentCount', 0)),
+            ))
+
+        calcular_metricas(videos)  # Toda la página de una vez: vistas_por_dia entra en la comparación
+        cambiados = [video for video in videos if self._cambio(video, *pagina[video.youtube_id][2:])]
+        return cambiados, len(videos) - len(cambiados), (request.uri, response)
+
+    def _consultar_en_pool(self, pagina):
+        """_consultar_pagina desde un hilo del pool, que no tiene quien cierre su conexión a la BD"""
+        try:
+            return self._consultar_pagina(pagina)
+        finally:
+            connection.close()  # La abrió al cobrar la cuota; con CONN_MAX_AGE quedaría abierta
+
+    def _escribir(self, videos, etags):
+        """Escribe el lote y, ya escrito, guarda los ETags de las páginas de las que salió"""
+        Video.objects.bulk_update(
+            videos, ['vistas', 'likes', 'comentarios'] + CAMPOS_METRICAS, batch_size=self.lote_escritura
+        )
+        for uri, respuesta in etags:
+            guardar_etag(uri, respuesta)
+
+    def ejecutar(self):
+        """
+        Ejecuta la sincronización completa
+
+        Si el gateway deja de admitir llamadas (cuota) la corrida se corta:
+        se guarda lo ya consultado y `diferido` trae la CuotaExcedida.
+
+        Returns:
+            dict: videos (consultados), escritos, omitidos (sin cambios, incluidos
+                los de páginas 304), paginas, paginas_sin_cambios (304),
+                segundos, videos_por_segundo y diferido
+        """
+        inicio = time.monotonic()
+        pendientes = []  # Resultados esperando a completar un lote de escritura
+        etags = []  # (uri, respuesta) de las páginas de `pendientes`
+        escritos = 0
+        omitidos = 0
+        total_paginas = 0
+        sin_cambios = 0
+        en_vuelo = set()
+        max_en_vuelo = self.workers * 2  # Acota la memoria: no se lee toda la tabla de golpe
+        diferido = None
+
+        def recoger(terminados):
+            nonlocal escritos, omitidos, total_paginas, sin_cambios, pendientes, etags, diferido
+            for futuro in terminados:
+                try:
+                    videos, iguales, etag = futuro.result()
+                except CuotaExcedida as e:
+                    diferido = e
+                    continue
+                total_paginas += 1
+                omitidos += iguales
+                if videos is None:
+                    sin_cambios += 1  # 304: nada que parsear ni escribir
+                    continue
+                escritos += len(videos)
+                pendientes.extend(videos)
+                etags.append(etag)
+            if len(pendientes) >= self.lote_escritura:
+                self._escribir(pendientes, etags)  # Las escrituras van en el hilo principal
+                pendientes, etags = [], []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for pagina in self._paginas():
+                if len(en_vuelo) >= max_en_vuelo:
+                    terminados, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    recoger(terminados)
+                if diferido:
+                    break  # Sin cuota para segundo plano: el resto espera a la próxima corrida
+                en_vuelo.add(pool.submit(self._consultar_en_pool, pagina))
+
+            terminados, _ = wait(en_vuelo)
+            recoger(terminados)
+
+        if pendientes or etags:
+            self._escribir(pendientes, etags)
+
+        segundos = time.monotonic() - inicio
+        total_videos = escritos + omitidos
+        return {
+            'videos': total_videos,
+            'escritos': escritos,
+            'omitidos': omitidos,
+            'paginas': total_paginas,
+            'paginas_sin_cambios': sin_cambios,
+            'segundos': segundos,
+            'videos_por_segundo': total_videos / segundos if segundos else 0.0,
+            'diferido': diferido,
+        }
+
+
+def sincronizar_estadisticas(credentials=None):
+    """
+    Ejecuta una corrida de sincronización de estadísticas y registra el marcador
+
+    Args:
+        credentials: Credenciales OAuth opcionales (por defecto se usa la API key)
+
+    Returns:
+        SincronizacionEstado: Marcador actualizado
+    """
+    estado, _ = SincronizacionEstado.objects.get_or_create(nombre=SYNC_ESTADISTICAS)
+    inicio = time.monotonic()
+
+    try:
+        resultado = SincronizadorEstadisticas(credentials).ejecutar()
+    except Exception as e:
+        logger.exception("Error sincronizando estadísticas")
+        estado.error = str(e)
+        estado.duracion_segundos = time.monotonic() - inicio
+        estado.save(update_fields=['error', 'duracion_segundos'])
+        raise
+
+    recalcular_resumenes()  # También tras una corrida parcial: lo escrito ya cambió los totales
+    recalcular_totales()  # Corrige total_videos de las etiquetas tras videos borrados en cascada
+
+    estado.videos_procesados = resultado['videos']
+    estado.videos_escritos = resultado['escritos']
+    estado.duracion_segundos = time.monotonic() - inicio
+    if resultado['diferido']:
+        # Corrida parcial: no cuenta como sincronización completa (detalle_service la usa como frescura)
+        estado.error = str(resultado['diferido'])
+        estado.save(update_fields=['videos_procesados', 'videos_escritos', 'duracion_segundos', 'error'])
+        logger.warning(f"⛽ Sincronización diferida por cuota tras {resultado['videos']} videos")
+        calcular_estadisticas_dashboard()
+        return estado
+
+    estado.ultima_sincronizacion = timezone.now()
+    estado.error = ''
+    estado.save()
+
+    calcular_estadisticas_dashboard()  # Refresca los totales que lee `inicio`
+    logger.info(
+        f"🔄 Estadísticas sincronizadas: {resultado['videos']} videos en "
+        f"{resultado['segundos']:.2f}s ({resultado['videos_por_segundo']:.1f} videos/s), "
+        f"{resultado['escritos']} escritos y {resultado['omitidos']} sin cambios, "
+        f"{resultado['paginas_sin_cambios']} de {resultado['paginas']} páginas sin cambios (304)"
+    )
+    return estado
+
+
+def ejecutar_worker(intervalo=None, max_corridas=None):
+    """Bucle del worker: sincroniza cada `intervalo` segundos hasta `max_corridas`"""
+    intervalo = intervalo or settings.YOUTUBE_SYNC_CONFIG['intervalo']
+    corridas = 0
+
+    while max_corridas is None or corridas < max_corridas:
+        close_old_connections()  # Fuera del ciclo de peticiones nadie aplica CONN_MAX_AGE / health checks
+        try:
+            sincronizar_estadisticas()
+        except Exception:
+            pass  # Ya quedó registrado en el marcador; el worker sigue vivo
+        corridas += 1
+        if max_corridas is None or corridas < max_corridas:
+            time.sleep(intervalo)
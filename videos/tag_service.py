@@ -0,0 +1,191 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Etiqueta, VideoEtiqueta
+from .pagination_service import tamano_pagina
+import unicodedata
+import math
+import re
+
+CLAVE_VERSION = 'etiquetas_version'  # Se incrementa cuando cambian los vínculos video ↔ tag
+CACHE_NUBE = 'nube_etiquetas_{version}_{limite}'  # Nube ya calculada para esa versión
+LARGO_MAXIMO = Etiqueta._meta.get_field('nombre').max_length
+LOTE = 500  # Valores por IN (...): lejos del límite de variables de SQLite
+_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar_etiqueta(texto):
+    """
+    '  Música  EN vivo ' → 'musica en vivo'
+
+    Sin tildes ni mayúsculas: la collation de MySQL (utf8mb4, *_ai_ci) ya
+    trata 'música' y 'Musica' como el mismo valor del índice único.
+    """
+    texto = unicodedata.normalize('NFKD', _ESPACIOS.sub(' ', texto or '').strip())
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold()[:LARGO_MAXIMO]
+
+
+def normalizar_lista(etiquetas):
+    """Lista de tags (o texto separado por comas) → nombres normalizados sin repetir, en orden"""
+    if isinstance(etiquetas, str):
+        etiquetas = etiquetas.split(',')
+    return list(dict.fromkeys(n for n in map(normalizar_etiqueta, etiquetas) if n))
+
+
+def _lotes(valores):
+    valores = list(valores)
+    for i in range(0, len(valores), LOTE):
+        yield valores[i:i + LOTE]
+
+
+def _leer_ids(nombres):
+    """{nombre normalizado: id}; la BD puede devolver la fila con otra grafía que su collation iguala"""
+    ids = {}
+    for lote in _lotes(nombres):
+        ids.update(
+            (normalizar_etiqueta(nombre), pk) for nombre, pk in
+            Etiqueta.objects.filter(nombre__in=lote).values_list('nombre', 'id')
+        )
+    return ids
+
+
+def _ids_de(nombres):
+    """{nombre: id} creando en bloque las etiquetas que no existan"""
+    ids = _leer_ids(nombres)
+    faltantes = [n for n in nombres if n not in ids]
+    if faltantes:
+        Etiqueta.objects.bulk_create([Etiqueta(nombre=n) for n in faltantes], ignore_conflicts=True)
+        ids.update(_leer_ids(faltantes))  # ignore_conflicts no devuelve pk: se releen
+    for nombre in [n for n in nombres if n not in ids]:
+        # La collation iguala dos nombres que normalizar_etiqueta distingue: es la misma fila
+        ids[nombre] = Etiqueta.objects.filter(nombre=nombre).values_list('id', flat=True).get()
+    return ids
+
+
+def guardar_etiquetas(por_video):
+    """
+    Sincroniza la tabla intermedia con los tags de varios videos a la vez
+
+    Lee los vínculos actuales con una consulta por lote, crea solo los que
+    faltan (bulk_create) y borra solo los que sobran; `total_videos` de
+    cada etiqueta se ajusta con F() en vez de recontar.
+
+    Args:
+        por_video: {pk de Video: lista de tags o texto separado por comas}
+
+    Returns:
+        tuple: (vínculos creados, vínculos borrados)
+    """
+    deseados = {pk: normalizar_lista(tags) for pk, tags in por_video.items()}
+    ids = _ids_de({n for nombres in deseados.values() for n in nombres})
+    pares_deseados = {(pk, ids[n]) for pk, nombres in deseados.items() for n in nombres}
+
+    actuales = {}
+    for lote in _lotes(deseados):
+        actuales.update({
+            (video_id, etiqueta_id): pk for pk, video_id, etiqueta_id in
+            VideoEtiqueta.objects.filter(video_id__in=lote).values_list('id', 'video_id', 'etiqueta_id')
+        })
+
+    crear = pares_deseados - actuales.keys()
+    borrar = [actuales[par] for par in actuales.keys() - pares_deseados]
+    if not crear and not borrar:
+        return 0, 0
+
+    delta = {}
+    for _, etiqueta_id in crear:
+        delta[etiqueta_id] = delta.get(etiqueta_id, 0) + 1
+    for par in actuales.keys() - pares_deseados:
+        delta[par[1]] = delta.get(par[1], 0) - 1
+
+    with transaction.atomic():
+        VideoEtiqueta.objects.bulk_create(
+            [VideoEtiqueta(video_id=v, etiqueta_id=e) for v, e in crear], batch_size=LOTE, ignore_conflicts=True
+        )
+        for lote in _lotes(borrar):
+            VideoEtiqueta.objects.filter(pk__in=lote).delete()
+        # Un UPDATE por valor distinto de delta (casi siempre +1 / -1), no uno por etiqueta
+        por_delta = {}
+        for etiqueta_id, cambio in delta.items():
+            if cambio:
+                por_delta.setdefault(cambio, []).append(etiqueta_id)
+        for cambio, etiqueta_ids in por_delta.items():
+            for lote in _lotes(etiqueta_ids):
+                Etiqueta.objects.filter(pk__in=lote).update(total_videos=F('total_videos') + cambio)
+
+    invalidar_nube()
+    return len(crear), len(borrar)
+
+
+def recalcular_totales():
+    """Recuenta total_videos de todas las etiquetas (tras borrar videos en cascada)"""
+    conteo = VideoEtiqueta.objects.filter(etiqueta=OuterRef('pk')).order_by().values('etiqueta').annotate(
+        n=Count('id')
+    ).values('n')
+    actualizadas = Etiqueta.objects.update(total_videos=Coalesce(Subquery(conteo), Value(0)))
+    Etiqueta.objects.filter(total_videos=0).delete()  # Tags que ya no usa ningún video
+    invalidar_nube()
+    return actualizadas
+
+
+def invalidar_nube():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+
+
+def nube_etiquetas(limite=50):
+    """
+    Tags más usados con su cantidad de videos
+
+    Lee `total_videos` por su índice (ORDER BY ... LIMIT), sin GROUP BY
+    sobre la tabla intermedia.
+
+    Returns:
+        list: [{'nombre': str, 'total': int}, ...] de mayor a menor
+    """
+    clave = CACHE_NUBE.format(version=cache.get(CLAVE_VERSION, 0), limite=limite)
+    nube = cache.get(clave)
+    if nube is None:
+        nube = [
+            {'nombre': nombre, 'total': total}
+            for nombre, total in Etiqueta.objects.filter(total_videos__gt=0)
+            .order_by('-total_videos', 'nombre').values_list('nombre', 'total_videos')[:limite]
+        ]
+        cache.set(clave, nube)
+    return nube
+
+
+def filtrar_por_etiquetas(queryset, nombres, tamano=None):
+    """
+    Videos de `queryset` que tienen TODOS los tags de `nombres`
+
+    El plan depende de cuán común es el tag (total_videos):
+    - Raro: JOIN por (etiqueta, video) y ordenar esos pocos videos.
+    - Común: EXISTS contra (video, etiqueta) mientras se recorre el índice
+      por fecha; la página se llena enseguida sin ordenar miles de filas.
+    El corte está en ~sqrt(tamaño de página × videos totales), donde ambos
+    planes leen la misma cantidad de filas.
+    """
+    nombres = normalizar_lista(nombres)
+    if not nombres:
+        return queryset
+    etiquetas = list(Etiqueta.objects.filter(nombre__in=nombres).values_list('id', 'total_videos'))
+    if len(etiquetas) < len(nombres):
+        return queryset.none()  # Algún tag no existe: nada los tiene todos
+
+    from .sync_service import obtener_resumen  # Import diferido: sync_service importa este módulo
+    umbral = math.sqrt((tamano or tamano_pagina()) * max(1, obtener_resumen().total_videos))
+
+    etiquetas.sort(key=lambda par: par[1])  # El más raro primero: es el que más filtra
+    rara_id, rara_total = etiquetas[0]
+    if rara_total < umbral:
+        queryset = queryset.filter(videoetiqueta__etiqueta_id=rara_id)
+        etiquetas = etiquetas[1:]
+    for etiqueta_id, _ in etiquetas:
+        queryset = queryset.filter(
+            Exists(VideoEtiqueta.objects.filter(video_id=OuterRef('pk'), etiqueta_id=etiqueta_id))
+        )
+    return queryset
@@ -1,3 +1,586 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from cryptography.fernet import Fernet
+from google.oauth2.credentials import Credentials
+from unittest import mock
+from . import credentials_service, detalle_service, search_service, youtube_client
+from .api_gateway import CuotaExcedida, INTERACTIVA, cobrar, cuota_simulada
+from .cache_service import CacheYouTube
+from .youtube_async import ClienteYouTubeAsync, cerrar_http
+from .detalle_service import obtener_detalle_video
+from .fake_api import ServidorFalso
+from .models import CuotaDiaria, Etiqueta, TrabajoSubida, Video
+from .pagination_service import codificar_cursor, decodificar_cursor, paginar_por_fecha
+from .quota_service import dia_cuota
+from .search_service import IndiceInvertido, buscar_en_biblioteca, expresion_booleana
+from .sync_service import SincronizadorEstadisticas
+from .tag_service import guardar_etiquetas
+from .youtube_service import YouTubeService2026
+from .upload_queue import crear_trabajo, procesar_trabajo
+from .upload_service import SesionArchivo, YouTubeUploadService
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+import httpx
+import threading
+import tempfile
+import shutil
+import time
 
-# Create your tests here.
+
+class SpoolSubidasTests(TestCase):
+    """Los videos recibidos no se quedan en el spool si no llegan a ser un TrabajoSubida"""
+
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool, ignore_errors=True)
+        config = {**settings.YOUTUBE_UPLOAD_CONFIG, 'directorio_spool': self.spool, 'pool_en_proceso': False}
+        ajustes = override_settings(YOUTUBE_UPLOAD_CONFIG=config)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _subir(self):
+        video = SimpleUploadedFile('clip.mp4', b'\x00' * 4096, content_type='video/mp4')
+        return self.client.post(reverse('videos:procesar_subida'), {'video': video, 'titulo': 'Clip'})
+
+    def _en_spool(self):
+        return list(Path(self.spool).iterdir())
+
+    def test_sin_credenciales_no_deja_archivos(self):
+        respuesta = self._subir()
+        self.assertRedirects(respuesta, reverse('videos:oauth_authorize'), fetch_redirect_response=False)
+        self.assertEqual(self._en_spool(), [])
+
+    def test_error_al_crear_trabajo_no_deja_archivos(self):
+        with mock.patch('videos.views.gestor_credenciales.para_sesion', return_value=object()), \
+                mock.patch('videos.views.crear_trabajo', side_effect=RuntimeError('BD caída')):
+            respuesta = self._subir()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._en_spool(), [])
+
+    def test_trabajo_creado_conserva_el_archivo(self):
+        with mock.patch('videos.views.gestor_credenciales.para_sesion', return_value=object()), \
+                mock.patch('videos.views.crear_trabajo', return_value=mock.Mock(pk=1)) as crear:
+            self._subir()
+        self.assertEqual(self._en_spool(), [Path(crear.call_args.kwargs['archivo'])])
+
+
+class ColaSubidasTests(TestCase):
+    """upload_queue libera el spool cuando el trabajo termina, también si falla"""
+
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool, ignore_errors=True)
+        config = {**settings.YOUTUBE_UPLOAD_CONFIG, 'directorio_spool': self.spool, 'pool_en_proceso': False}
+        ajustes = override_settings(YOUTUBE_UPLOAD_CONFIG=config)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # El cifrador se construye una vez por proceso con las FERNET_KEYS de ese momento
+        credentials_service._cifrador = None
+        self.addCleanup(setattr, credentials_service, '_cifrador', None)
+
+    @override_settings(FERNET_KEYS=[Fernet.generate_key().decode()])
+    def test_trabajo_fallido_borra_el_archivo(self):
+        ruta = Path(self.spool) / 'clip.mp4'
+        ruta.write_bytes(b'\x00' * 1024)
+        trabajo = crear_trabajo(Credentials(token='x'), str(ruta), 'Clip', '')
+
+        with mock.patch('videos.upload_queue.YouTubeUploadService.subir_video', side_effect=RuntimeError('403')), \
+                self.assertLogs('videos.upload_queue', 'ERROR'):
+            procesar_trabajo(trabajo.pk)
+
+        self.assertEqual(TrabajoSubida.objects.get(pk=trabajo.pk).estado, TrabajoSubida.FALLIDO)
+        self.assertFalse(ruta.exists())
+
+
+    @override_settings(FERNET_KEYS=[Fernet.generate_key().decode()])
+    def test_trabajo_con_avance_reciente_no_se_recupera(self):
+        ruta = Path(self.spool) / 'clip.mp4'
+        ruta.write_bytes(b'\x00' * 1024)
+        trabajo = crear_trabajo(Credentials(token='x'), str(ruta), 'Clip', '')
+        estados = []
+
+        def subir_video(**kwargs):
+            # Lleva una hora subiendo, pero la última parte acaba de confirmarse
+            TrabajoSubida.objects.filter(pk=trabajo.pk).update(actualizado=timezone.now() - timedelta(hours=1))
+            kwargs['al_progreso']({'bytes_enviados': 512, 'bytes_totales': 1024, 'porcentaje': 50.0,
+                                   'bytes_por_segundo': 1.0})
+            call_command('procesar_subidas', recuperar=5, stdout=StringIO())
+            estados.append(TrabajoSubida.objects.get(pk=trabajo.pk).estado)
+            return {'id': 'nuevo1'}
+
+        with mock.patch('videos.upload_queue.YouTubeUploadService.subir_video', side_effect=subir_video), \
+                mock.patch('videos.upload_queue._esperar_procesamiento'), \
+                mock.patch('videos.management.commands.procesar_subidas.procesar_pendientes', return_value=[]):
+            procesar_trabajo(trabajo.pk)
+
+        self.assertEqual(estados, [TrabajoSubida.SUBIENDO])
+
+class EstadoSubidaTests(TestCase):
+    """estado_subida solo responde al dueño del trabajo"""
+
+    def _trabajo(self, **dueno):
+        return TrabajoSubida.objects.create(archivo='x.mp4', titulo='Privado', credenciales='', **dueno)
+
+    def test_trabajo_de_otra_sesion_da_404(self):
+        propio = self._trabajo(sesion=self.client.session.session_key)
+        ajeno = self._trabajo(sesion='otra-sesion')
+
+        respuesta = self.client.get(reverse('videos:estado_subida', args=[propio.pk]))
+        self.assertEqual(respuesta.json()['titulo'], 'Privado')
+        self.assertEqual(self.client.get(reverse('videos:estado_subida', args=[ajeno.pk])).status_code, 404)
+
+    def test_trabajo_de_otro_usuario_da_404(self):
+        duena, otro = User.objects.create_user('duena'), User.objects.create_user('otro')
+        trabajo = self._trabajo(usuario=duena)
+
+        self.client.force_login(otro)
+        self.assertEqual(self.client.get(reverse('videos:estado_subida', args=[trabajo.pk])).status_code, 404)
+        self.client.force_login(duena)
+        self.assertEqual(self.client.get(reverse('videos:estado_subida', args=[trabajo.pk])).status_code, 200)
+
+
+def usar_servidor_falso(test, latencia=0.0, **ajustes):
+    """Apunta los clientes de YouTube a un ServidorFalso (con caché en memoria) durante el test"""
+    servidor = ServidorFalso(latencia=latencia).iniciar()
+    test.addCleanup(servidor.server_close)
+    test.addCleanup(servidor.shutdown)
+    ajustes = override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        YOUTUBE_CLIENT_CONFIG={**settings.YOUTUBE_CLIENT_CONFIG, 'api_endpoint': servidor.url},
+        **ajustes
+    )
+    ajustes.enable()
+    test.addCleanup(ajustes.disable)
+    # El discovery se parsea una vez por proceso con el endpoint de ese momento
+    youtube_client._documento = None
+    test.addCleanup(setattr, youtube_client, '_documento', None)
+    return servidor
+
+
+
+def conexiones_de_otros_hilos(test):
+    """{conexión: si se cerró} de las conexiones a la BD que abren otros hilos durante el test"""
+    abiertas = {}
+    clase = type(connections['default'])
+    connect, close = clase.connect, clase.close
+
+    def registrar_connect(self):
+        if threading.current_thread() is not threading.main_thread():
+            abiertas[self] = False
+        return connect(self)
+
+    def registrar_close(self):
+        if self in abiertas:
+            abiertas[self] = True
+        return close(self)
+
+    for nombre, funcion in (('connect', registrar_connect), ('close', registrar_close)):
+        parche = mock.patch.object(clase, nombre, funcion)
+        parche.start()
+        test.addCleanup(parche.stop)
+    return abiertas
+
+class SincronizacionEtagTests(TransactionTestCase):
+    """El ETag de una página se guarda solo cuando sus filas ya están en la BD"""
+
+    def setUp(self):
+        usar_servidor_falso(self)
+        Video.objects.bulk_create(
+            Video(youtube_id=f"etg{i}", titulo=f"Video {i}", fecha_publicacion=timezone.now()) for i in range(3)
+        )
+
+    def test_escritura_fallida_no_deja_etag(self):
+        with mock.patch('videos.sync_service.Video.objects.bulk_update', side_effect=DatabaseError('caída')):
+            with self.assertRaises(DatabaseError):
+                SincronizadorEstadisticas(workers=1).ejecutar()
+
+        resultado = SincronizadorEstadisticas(workers=1).ejecutar()
+        self.assertEqual(resultado['paginas_sin_cambios'], 0)
+        self.assertEqual(resultado['escritos'], 3)
+        self.assertEqual(set(Video.objects.values_list('vistas', flat=True)), {100})
+
+        resultado = SincronizadorEstadisticas(workers=1).ejecutar()
+        self.assertEqual(resultado['paginas_sin_cambios'], 1)  # Ya escrita: ahora sí 304
+
+    def test_hilos_del_pool_cierran_su_conexion(self):
+        conexiones = conexiones_de_otros_hilos(self)
+        SincronizadorEstadisticas(workers=2).ejecutar()
+        self.assertTrue(conexiones)  # Cobrar la cuota abre una en el hilo del pool
+        self.assertTrue(all(conexiones.values()))
+
+
+class CuotaTests(TestCase):
+    """La admisión se decide sobre CuotaDiaria, el total que comparten todos los procesos"""
+
+    def test_admision_con_el_total_de_otros_procesos(self):
+        limite = settings.YOUTUBE_QUOTA_CONFIG['daily_limit']
+        # Lo que ya gastó otro proceso: este no tiene nada en su caché ni en su buffer
+        CuotaDiaria.objects.create(fecha=dia_cuota(), unidades=limite - 50)
+
+        with self.assertRaises(CuotaExcedida):
+            cobrar('search.list', INTERACTIVA)
+        self.assertEqual(CuotaDiaria.objects.get(fecha=dia_cuota()).unidades, limite - 50)  # No se cobró
+
+        cobrar('videos.list', INTERACTIVA)
+        self.assertEqual(CuotaDiaria.objects.get(fecha=dia_cuota()).unidades, limite - 49)
+
+
+    def test_cuota_simulada_no_toca_la_del_dia(self):
+        with cuota_simulada() as simulada:
+            cobrar('search.list', INTERACTIVA)
+        self.assertEqual(simulada.usado_hoy(), 100)
+        self.assertFalse(CuotaDiaria.objects.exists())
+
+        cobrar('videos.list', INTERACTIVA)  # Fuera del bloque vuelve la cuota real
+        self.assertEqual(CuotaDiaria.objects.get(fecha=dia_cuota()).unidades, 1)
+
+class DetallesVencidosTests(TransactionTestCase):
+    """obtener_detalles_videos sirve al instante lo vencido y lo refresca en segundo plano"""
+
+    def setUp(self):
+        cuota = {**settings.YOUTUBE_QUOTA_CONFIG, 'cache_soft_ttl': 0}  # Todo vence en cuanto se guarda
+        self.servidor = usar_servidor_falso(self, latencia=0.5, YOUTUBE_QUOTA_CONFIG=cuota)
+
+    def _llamadas(self):
+        return self.servidor.llamadas.get('/youtube/v3/videos', 0)
+
+    def test_vencidos_no_bloquean(self):
+        servicio = YouTubeService2026(api_key='test')
+        self.assertEqual(len(list(servicio.obtener_detalles_videos(['a', 'b']))), 2)
+        self.assertEqual(self._llamadas(), 1)
+
+        inicio = time.monotonic()
+        videos = list(servicio.obtener_detalles_videos(['a', 'b']))
+        self.assertEqual([v['youtube_id'] for v in videos], ['a', 'b'])
+        self.assertLess(time.monotonic() - inicio, 0.4)  # No esperó a la API (latencia 0.5 s)
+
+        limite = time.monotonic() + 5
+        while CacheYouTube._en_vuelo and time.monotonic() < limite:
+            time.sleep(0.05)  # Espera a que termine el refresco
+        self.assertEqual(self._llamadas(), 2)  # Un solo videos.list para refrescar ambos
+
+    def test_hilos_cierran_su_conexion(self):
+        conexiones = conexiones_de_otros_hilos(self)
+        servicio = YouTubeService2026(api_key='test')
+        list(servicio.obtener_detalles_videos(['c', 'd']))  # En el pool de detalles
+        list(servicio.obtener_detalles_videos(['c', 'd']))  # Vencidas: se refrescan en otro hilo
+
+        limite = time.monotonic() + 5
+        while CacheYouTube._en_vuelo and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.assertEqual(self._llamadas(), 2)
+        self.assertTrue(conexiones)
+        self.assertTrue(all(conexiones.values()))
+
+
+class ResumenCanalesTests(TransactionTestCase):
+    """Los loops que terminan (vista bajo WSGI, hilo de refresco) no dejan clientes httpx abiertos"""
+
+    def setUp(self):
+        self.servidor = usar_servidor_falso(self)
+        self.servidor.videos_playlist = 3
+
+    def test_cierra_el_cliente_http(self):
+        creados = []
+
+        class ClienteRegistrado(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                creados.append(self)
+
+        with mock.patch('videos.youtube_async.httpx.AsyncClient', ClienteRegistrado):
+            respuesta = self.client.get(reverse('videos:api_resumen_canales'), {'canal': ['UCa', 'UCb']})
+
+        self.assertEqual(len(respuesta.json()['canales']), 2)
+        self.assertTrue(creados)
+        self.assertTrue(all(cliente.is_closed for cliente in creados))
+
+
+    def test_refresco_en_segundo_plano_cierra_su_cliente(self):
+        cuota = {**settings.YOUTUBE_QUOTA_CONFIG, 'cache_soft_ttl': 0}  # Vence en cuanto se guarda
+        ajustes = override_settings(YOUTUBE_QUOTA_CONFIG=cuota)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        creados = []
+
+        class ClienteRegistrado(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                creados.append(self)
+
+        async def pedir():
+            try:
+                return await CacheYouTube('prueba').aobtener_o_calcular(
+                    'prueba_a', lambda: ClienteYouTubeAsync(api_key='test').videos(id='a', part='snippet')
+                )
+            finally:
+                await cerrar_http()  # El de esta petición lo cierra la vista; aquí lo hace el test
+
+        with mock.patch('videos.youtube_async.httpx.AsyncClient', ClienteRegistrado):
+            async_to_sync(pedir)()
+            async_to_sync(pedir)()  # Vencida: se sirve y se refresca en otro hilo con su propio loop
+            limite = time.monotonic() + 5
+            while CacheYouTube._en_vuelo and time.monotonic() < limite:
+                time.sleep(0.05)
+
+        self.assertEqual(self.servidor.llamadas.get('/youtube/v3/videos'), 2)
+        self.assertEqual(len(creados), 2)
+        self.assertTrue(all(cliente.is_closed for cliente in creados))
+
+class DetalleSinCambiosTests(TestCase):
+    """Refrescar un detalle que no cambió no escribe la fila"""
+
+    def setUp(self):
+        usar_servidor_falso(self)
+
+    def _refrescar(self, video):
+        cache.clear()
+        Video.objects.filter(pk=video.pk).update(actualizado=timezone.now() - timedelta(days=1))  # Vencida
+        with CaptureQueriesContext(connection) as consultas:
+            obtener_detalle_video(video.youtube_id)
+        return [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE "videos_video"')]
+
+    def test_sin_cambios_no_escribe(self):
+        video = Video.objects.create(youtube_id='det1', titulo='Viejo', fecha_publicacion=timezone.now())
+        self.assertEqual(len(self._refrescar(video)), 1)  # Trae los datos de YouTube
+        self.assertEqual(self._refrescar(video), [])  # YouTube devolvió lo mismo: nada que escribir
+
+
+class SubidaReanudableTests(TestCase):
+    """Una sesión guardada se reanuda desde el último byte que confirma el servidor"""
+
+    PARTE = 256 * 1024
+
+    def setUp(self):
+        config = {**settings.YOUTUBE_UPLOAD_CONFIG, 'chunk_size': self.PARTE, 'espera_maxima': 0.01}
+        self.servidor = usar_servidor_falso(self, YOUTUBE_UPLOAD_CONFIG=config)
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.ruta = Path(directorio) / 'clip.mp4'
+        self.ruta.write_bytes(b'\x00' * 3 * self.PARTE)
+
+    def _subir(self, sesion):
+        SesionArchivo(str(self.ruta)).guardar(f"{self.servidor.url}/upload/sesion/{sesion}")
+        progreso = []
+        respuesta = YouTubeUploadService().subir_video(
+            Credentials(token='x'), str(self.ruta), 'Clip', '', al_progreso=progreso.append
+        )
+        return respuesta, [p['bytes_enviados'] for p in progreso]
+
+    def _sesiones_abiertas(self):
+        return self.servidor.llamadas.get('/upload/youtube/v3/videos', 0)
+
+    def test_reanuda_desde_los_bytes_confirmados(self):
+        self.servidor.subidas['previa'] = self.PARTE  # Lo que llegó antes de cortarse
+
+        respuesta, enviados = self._subir('previa')
+        self.assertEqual(respuesta['id'], 'falsoprevia')
+        self.assertEqual(enviados, [2 * self.PARTE, 3 * self.PARTE])
+        self.assertEqual(self._sesiones_abiertas(), 0)  # No abrió (ni cobró) una sesión nueva
+        self.assertFalse(Path(f"{self.ruta}.sesion.json").exists())
+
+    def test_sesion_expirada_empieza_de_nuevo(self):
+        respuesta, enviados = self._subir('expirada')
+        self.assertTrue(respuesta['id'].startswith('falso'))
+        self.assertEqual(enviados, [self.PARTE, 2 * self.PARTE, 3 * self.PARTE])
+        self.assertEqual(self._sesiones_abiertas(), 1)
+
+
+class DetallePrivadoTests(TestCase):
+    """Lo consultado con credenciales no llega a los anónimos; sin credenciales vale la fila local"""
+
+    def setUp(self):
+        usar_servidor_falso(self)
+
+    def test_detalle_con_credenciales_no_se_sirve_a_anonimos(self):
+        with mock.patch('videos.detalle_service._consultar_api', wraps=detalle_service._consultar_api) as api:
+            privado = obtener_detalle_video('priv1', Credentials(token='x', refresh_token='dueno'))
+            self.assertEqual(privado['youtube_id'], 'priv1')
+            self.assertEqual(obtener_detalle_video('priv1', Credentials(token='y', refresh_token='dueno')), privado)
+            self.assertEqual(api.call_count, 1)  # La segunda visita del dueño sale de su caché
+
+            with mock.patch('videos.detalle_service._consultar_api', return_value=None):
+                self.assertIsNone(obtener_detalle_video('priv1'))  # Para la API key no existe
+
+    def test_fila_vencida_que_la_api_no_devuelve(self):
+        video = Video.objects.create(youtube_id='priv2', titulo='Solo en la biblioteca',
+                                     fecha_publicacion=timezone.now())
+        Video.objects.filter(pk=video.pk).update(actualizado=timezone.now() - timedelta(days=1))
+
+        with mock.patch('videos.detalle_service._consultar_api', return_value=None):
+            datos = obtener_detalle_video('priv2')
+        self.assertEqual(datos['titulo'], 'Solo en la biblioteca')
+
+class EtiquetasTests(TestCase):
+    """Las grafías que la collation de MySQL iguala son una sola etiqueta"""
+
+    def test_variantes_de_tildes_y_mayusculas(self):
+        uno, dos = (
+            Video.objects.create(youtube_id=f"tag{i}", titulo='Con tags', fecha_publicacion=timezone.now())
+            for i in range(2)
+        )
+        self.assertEqual(guardar_etiquetas({uno.pk: ['Música', 'musica', ' MÚSICA  en Vivo'],
+                                            dos.pk: 'MUSICA, Canción'}), (4, 0))
+
+        self.assertEqual(
+            dict(Etiqueta.objects.values_list('nombre', 'total_videos')),
+            {'musica': 2, 'musica en vivo': 1, 'cancion': 1}
+        )
+        self.assertEqual(guardar_etiquetas({dos.pk: ['música', 'cancion']}), (0, 0))  # Nada cambió
+
+
+class PaginacionCursorTests(TestCase):
+    """El cursor (fecha_publicacion, id) recorre todo sin saltos ni repetidos, aun con fechas empatadas"""
+
+    def setUp(self):
+        fecha = timezone.now()
+        # Fechas repetidas de a 3: el desempate es el id
+        for i in range(8):
+            Video.objects.create(youtube_id=f"pag{i}", titulo=f"Video {i}",
+                                 fecha_publicacion=fecha - timedelta(minutes=i // 3))
+        self.orden = list(Video.objects.order_by('-fecha_publicacion', '-id').values_list('youtube_id', flat=True))
+
+    def _ids(self, pagina):
+        return [video.youtube_id for video in pagina]
+
+    def test_codificar_y_decodificar(self):
+        datos = {'c': 'fecha_publicacion', 'd': 'sig', 'f': '2026-01-01T00:00:00+00:00', 'id': 7, 'p': 2}
+        token = codificar_cursor(datos)
+        self.assertNotIn('=', token)  # Va en la URL sin relleno
+        self.assertEqual(decodificar_cursor(token), datos)
+        self.assertIsNone(decodificar_cursor(''))
+
+    def test_ida_y_vuelta_con_empates(self):
+        paginas, cursor = [], None
+        while True:
+            pagina = paginar_por_fecha(Video.objects.all(), cursor, 3)
+            paginas.append(pagina)
+            if not pagina.hay_siguiente:
+                break
+            cursor = pagina.cursor_siguiente
+        self.assertEqual([video for pagina in paginas for video in self._ids(pagina)], self.orden)
+        self.assertEqual([pagina.numero for pagina in paginas], [1, 2, 3])
+
+        atras = paginar_por_fecha(Video.objects.all(), paginas[-1].cursor_anterior, 3)
+        self.assertEqual(self._ids(atras), self._ids(paginas[1]))
+        self.assertEqual(atras.numero, 2)
+        primera = paginar_por_fecha(Video.objects.all(), atras.cursor_anterior, 3)
+        self.assertEqual(self._ids(primera), self.orden[:3])
+        self.assertFalse(primera.hay_anterior)
+
+    def test_cursor_alterado_vuelve_a_la_primera_pagina(self):
+        valido = paginar_por_fecha(Video.objects.all(), None, 3).cursor_siguiente
+        alterados = [
+            valido[:-4] + '!!!!',  # No es base64
+            codificar_cursor({'d': 'sig', 'f': 'ayer', 'id': 1}),  # Fecha ilegible
+            codificar_cursor({'d': 'sig', 'f': '2026-01-01T00:00:00', 'id': 'x'}),  # id no numérico
+            codificar_cursor({'c': 'vistas', 'd': 'sig', 'f': 10, 'id': 1}),  # De otro orden
+        ]
+        for cursor in alterados:
+            with self.subTest(cursor=cursor):
+                pagina = paginar_por_fecha(Video.objects.all(), cursor, 3)
+                self.assertEqual(self._ids(pagina), self.orden[:3])
+                self.assertEqual(pagina.numero, 1)
+                self.assertFalse(pagina.hay_anterior)
+
+
+class SingleFlightTests(TestCase):
+    """Los fallos de caché simultáneos de una misma clave hacen una sola llamada a la API"""
+
+    def setUp(self):
+        ajustes = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        cache.clear()  # La locmem se comparte entre tests del proceso
+        self.addCleanup(cache.clear)
+        self.cache = CacheYouTube('prueba')
+
+    def test_hilos_del_mismo_proceso_esperan_al_lider(self):
+        llamadas = []
+        barrera = threading.Barrier(5)
+
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.2)  # Los demás llegan mientras tanto
+            return ['resultado']
+
+        resultados = []
+
+        def pedir():
+            barrera.wait()
+            resultados.append(self.cache.obtener_o_calcular('prueba_sf', calcular))
+
+        hilos = [threading.Thread(target=pedir) for _ in range(5)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, [['resultado']] * 5)
+        self.assertFalse(CacheYouTube._en_vuelo)
+
+    def test_espera_el_valor_que_pide_otro_proceso(self):
+        cache.add('prueba_sf_lock', 1)  # Otro proceso ya está llamando a la API
+        threading.Timer(0.2, self.cache.guardar, args=('prueba_sf', ['del otro proceso'])).start()
+
+        calcular = mock.Mock(return_value=['propio'])
+        self.assertEqual(self.cache.obtener_o_calcular('prueba_sf', calcular), ['del otro proceso'])
+        calcular.assert_not_called()
+
+    def test_el_error_del_lider_llega_a_quien_espera(self):
+        with mock.patch.dict(CacheYouTube._en_vuelo):
+            futuro = CacheYouTube._en_vuelo['prueba_sf'] = Future()  # Un líder en vuelo en este proceso
+            futuro.set_exception(RuntimeError('API caída'))
+            with self.assertRaises(RuntimeError):
+                self.cache.obtener_o_calcular('prueba_sf', mock.Mock())
+
+
+class BusquedaPrefijoTests(TestCase):
+    """El índice invertido exige todas las palabras y las acepta por prefijo"""
+
+    def test_indice_por_prefijo(self):
+        indice = IndiceInvertido()
+        indice.agregar(1, titulo='Programación en Python', etiquetas='tutorial')
+        indice.agregar(2, titulo='Django REST', descripcion='Programa de ejemplo')
+        indice.agregar(3, titulo='Python para data science')
+
+        self.assertEqual(indice.buscar('progr'), [1, 2])  # En el título pesa más que en la descripción
+        self.assertEqual(indice.buscar('PROGRAMACIÓN'), [1])  # Sin tildes ni mayúsculas
+        self.assertEqual(indice.buscar('pyth prog'), [1])  # Todas las palabras
+        self.assertEqual(indice.buscar('python'), [3, 1])  # Empate: el agregado más tarde primero
+        self.assertEqual(indice.buscar('rust'), [])
+
+    def test_coincidencia_exacta_antes_que_prefijo(self):
+        indice = IndiceInvertido()
+        indice.agregar(1, titulo='Djangonauts')
+        indice.agregar(2, titulo='Django')
+        indice.agregar(3, titulo='Djangonauts en vivo')
+        self.assertEqual(indice.buscar('django'), [2, 3, 1])
+
+    @override_settings(YOUTUBE_SEARCH_CONFIG={**settings.YOUTUBE_SEARCH_CONFIG, 'motor': 'indice'})
+    def test_buscar_en_biblioteca(self):
+        search_service._indice = None  # El índice del proceso se arma con los videos de este test
+        self.addCleanup(setattr, search_service, '_indice', None)
+        ahora = timezone.now()
+        for i, titulo in enumerate(['Curso de Django', 'Djangonauts', 'Cocina italiana']):
+            Video.objects.create(youtube_id=f"bus{i}", titulo=titulo, fecha_publicacion=ahora - timedelta(days=i))
+
+        resultados = buscar_en_biblioteca('djan')
+        self.assertEqual([video.youtube_id for video in resultados], ['bus0', 'bus1'])
+        self.assertFalse(buscar_en_biblioteca('djan coc').exists())
+
+    def test_expresion_booleana_para_fulltext(self):
+        self.assertEqual(expresion_booleana('Django  REST django'), '+django* +rest*')
+        self.assertEqual(expresion_booleana('de la ñu'), '')  # Más cortas que innodb_ft_min_token_size
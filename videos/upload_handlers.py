@@ -0,0 +1,132 @@
+from django.conf import settings  # Configuración
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.core.files.move import file_move_safe
+from contextlib import contextmanager
+from pathlib import Path
+import uuid
+import os
+
+
+def _directorio_spool():
+    directorio = Path(settings.YOUTUBE_UPLOAD_CONFIG['directorio_spool'])
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _ruta_nueva(nombre):
+    """Ruta única dentro del spool (el nombre original solo es informativo)"""
+    return str(_directorio_spool() / f"{uuid.uuid4().hex}_{os.path.basename(nombre)}")
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+class VideoEnSpool(UploadedFile):
+    """
+    Video ya escrito en el spool: el worker de subida lo lee desde esta ruta
+
+    Como los archivos temporales de Django, se borra al cerrarse (Django
+    cierra request.FILES al terminar la petición) salvo que se haya
+    entregado a un TrabajoSubida con entregar_al_spool.
+    """
+
+    def __init__(self, archivo, nombre, content_type, tamano, charset, content_type_extra=None):
+        super().__init__(archivo, nombre, content_type, tamano, charset, content_type_extra)
+        self.ruta_spool = archivo.name
+        self.entregado = False  # True cuando ya es de un TrabajoSubida
+
+    def temporary_file_path(self):
+        return self.ruta_spool
+
+    def close(self):
+        super().close()
+        if not self.entregado:
+            _borrar(self.ruta_spool)  # Petición rechazada o fallida: no queda basura en el spool
+
+
+class VideoSpoolUploadHandler(FileUploadHandler):
+    """
+    Escribe los chunks de los archivos video/* directamente en el spool
+
+    Así el video se guarda en disco una sola vez (mientras llega la
+    petición) y la subida a YouTube lo lee desde ahí por partes. Los demás
+    archivos pasan intactos al siguiente handler de FILE_UPLOAD_HANDLERS.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.archivo = None
+        if (self.content_type or '').startswith('video/'):
+            self.archivo = open(_ruta_nueva(self.file_name), 'wb+')
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.archivo is None:
+            return raw_data  # No es un video: que lo maneje el siguiente handler
+        self.archivo.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.archivo is None:
+            return None
+        self.archivo.flush()
+        self.archivo.seek(0)
+        archivo, self.archivo = self.archivo, None
+        return VideoEnSpool(
+            archivo, self.file_name, self.content_type, file_size,
+            self.charset, self.content_type_extra
+        )
+
+    def upload_interrupted(self):
+        if getattr(self, 'archivo', None) is not None:
+            self.archivo.close()
+            os.remove(self.archivo.name)  # Subida incompleta: no se deja basura en el spool
+            self.archivo = None
+
+
+def ruta_en_spool(archivo):
+    """
+    Ruta en disco del video recibido, sin copiarlo si ya está en el spool
+
+    Los videos con content-type distinto de video/* (p. ej. octet-stream)
+    llegan por los handlers de Django: el archivo temporal se mueve al
+    spool y solo los que quedaron en memoria se escriben.
+    """
+    ruta = getattr(archivo, 'ruta_spool', None)
+    if ruta:
+        return ruta
+
+    ruta = _ruta_nueva(archivo.name)
+    if hasattr(archivo, 'temporary_file_path'):
+        file_move_safe(archivo.temporary_file_path(), ruta)  # Mismo disco: solo se renombra
+        return ruta
+
+    with open(ruta, 'wb') as destino:
+        for chunk in archivo.chunks():
+            destino.write(chunk)
+    return ruta
+
+
+@contextmanager
+def entregar_al_spool(archivo):
+    """
+    Ruta en el spool del video para crear su TrabajoSubida
+
+    Si el bloque termina bien el archivo pasa a ser del trabajo (lo borra
+    upload_queue al terminar); si lanza una excepción se borra aquí.
+
+        with entregar_al_spool(request.FILES['video']) as ruta:
+            crear_trabajo(..., archivo=ruta)
+    """
+    ruta = ruta_en_spool(archivo)
+    try:
+        yield ruta
+    except BaseException:
+        _borrar(ruta)
+        raise
+    if isinstance(archivo, VideoEnSpool):
+        archivo.entregado = True
+        archivo.close()
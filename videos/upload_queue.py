@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings  # Configuración
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import TrabajoSubida
+from .upload_service import YouTubeUploadService
+from .youtube_client import obtener_cliente
+from .credentials_service import cifrar, descifrar, credenciales_a_datos, credenciales_desde_datos
+from .api_gateway import ejecutar, CuotaExcedida, FONDO
+import threading
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+_pool = None  # Pool de workers de este proceso (se crea al primer uso)
+_lock = threading.Lock()
+
+
+class SesionTrabajo:
+    """Persiste la URI reanudable en el propio TrabajoSubida"""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+
+    def cargar(self):
+        return self.trabajo.sesion_uri or None
+
+    def guardar(self, uri):
+        self.trabajo.sesion_uri = uri
+        TrabajoSubida.objects.filter(pk=self.trabajo.pk).update(sesion_uri=uri, actualizado=timezone.now())
+
+    def borrar(self):
+        self.guardar('')
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.YOUTUBE_UPLOAD_CONFIG['workers'],
+                    thread_name_prefix='subidas'
+                )
+    return _pool
+
+
+def crear_trabajo(credentials, archivo, titulo, descripcion, categoria='22', privacidad='private',
+                  usuario=None, sesion=''):
+    """
+    Registra la subida y la entrega al pool (si está habilitado en este proceso)
+
+    `usuario` / `sesion` identifican al dueño: solo él puede consultar su estado.
+    """
+    trabajo = TrabajoSubida.objects.create(
+        usuario=usuario,
+        sesion=sesion or '',
+        archivo=archivo,
+        titulo=titulo,
+        descripcion=descripcion or '',
+        categoria=categoria,
+        privacidad=privacidad,
+        credenciales=cifrar(json.dumps(credenciales_a_datos(credentials))),
+        bytes_totales=os.path.getsize(archivo),
+    )
+    if settings.YOUTUBE_UPLOAD_CONFIG['pool_en_proceso']:
+        encolar(trabajo.pk)
+    return trabajo
+
+
+def encolar(trabajo_id):
+    return _obtener_pool().submit(procesar_trabajo, trabajo_id)
+
+
+def _reclamar(trabajo_id):
+    """Pasa el trabajo a 'subiendo' de forma atómica: solo un worker lo obtiene"""
+    return TrabajoSubida.objects.filter(
+        pk=trabajo_id, estado=TrabajoSubida.EN_COLA
+    ).update(estado=TrabajoSubida.SUBIENDO, actualizado=timezone.now()) == 1
+
+
+def _esperar_procesamiento(credentials, youtube_id):
+    """Consulta processingStatus hasta que YouTube termine (o se agote la espera)"""
+    config = settings.YOUTUBE_UPLOAD_CONFIG
+    limite = time.monotonic() + config['espera_procesamiento']
+    youtube = obtener_cliente(credentials)
+
+    while time.monotonic() < limite:
+        try:
+            res = ejecutar(youtube.videos().list(part='processingDetails', id=youtube_id), prioridad=FONDO)
+        except CuotaExcedida:
+            return  # El video ya se subió; solo dejamos de vigilar su procesamiento
+        items = res.get('items', [])
+        estado = items[0].get('processingDetails', {}).get('processingStatus') if items else None
+        if estado == 'failed':
+            raise RuntimeError('YouTube no pudo procesar el video')
+        if estado != 'processing':
+            return  # succeeded, terminated o sin información: no hay nada más que esperar
+        time.sleep(config['intervalo_procesamiento'])
+
+
+def _borrar_archivo(ruta):
+    """El video ya no hace falta en el spool (subido o fallido sin vuelta atrás)"""
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def procesar_trabajo(trabajo_id):
+    """Ejecuta un TrabajoSubida de principio a fin (corre en un hilo del pool)"""
+    close_old_connections()
+    try:
+        if not _reclamar(trabajo_id):
+            return  # Otro worker ya lo tomó
+
+        trabajo = TrabajoSubida.objects.get(pk=trabajo_id)
+        credentials = credenciales_desde_datos(json.loads(descifrar(trabajo.credenciales)))
+
+        def al_progreso(progreso):
+            TrabajoSubida.objects.filter(pk=trabajo_id).update(
+                bytes_enviados=progreso['bytes_enviados'],
+                bytes_totales=progreso['bytes_totales'],
+                porcentaje=progreso['porcentaje'],
+                bytes_por_segundo=progreso['bytes_por_segundo'],
+                actualizado=timezone.now(),  # update() no toca auto_now: es el latido que mira --recuperar
+            )
+
+        try:
+            response = YouTubeUploadService().subir_video(
+                credentials=credentials,
+                archivo_path=trabajo.archivo,
+                titulo=trabajo.titulo,
+                descripcion=trabajo.descripcion,
+                categoria=trabajo.categoria,
+                privacidad=trabajo.privacidad,
+                al_progreso=al_progreso,
+                sesion=SesionTrabajo(trabajo),
+            )
+            TrabajoSubida.objects.filter(pk=trabajo_id).update(
+                estado=TrabajoSubida.PROCESANDO, youtube_id=response['id'], actualizado=timezone.now()
+            )
+            _esperar_procesamiento(credentials, response['id'])
+        except Exception as e:
+            logger.exception(f"❌ Falló la subida {trabajo_id}")
+            TrabajoSubida.objects.filter(pk=trabajo_id).update(
+                estado=TrabajoSubida.FALLIDO, error=str(e), actualizado=timezone.now()
+            )
+            _borrar_archivo(trabajo.archivo)  # FALLIDO es definitivo: subir_video ya agotó sus reintentos
+            return
+
+        TrabajoSubida.objects.filter(pk=trabajo_id).update(estado=TrabajoSubida.TERMINADO, actualizado=timezone.now())
+        _borrar_archivo(trabajo.archivo)
+        logger.info(f"✅ Subida {trabajo_id} terminada: {response['id']}")
+    finally:
+        close_old_connections()
+
+
+def procesar_pendientes():
+    """Entrega al pool todos los trabajos que siguen en cola"""
+    pendientes = list(TrabajoSubida.objects.filter(estado=TrabajoSubida.EN_COLA).values_list('pk', flat=True))
+    return [encolar(pk) for pk in pendientes]
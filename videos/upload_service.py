@@ -1,11 +1,47 @@
 from google_auth_oauthlib.flow import Flow  # Flujo OAuth
-from googleapiclient.discovery import build  # Constructor servicio
 from googleapiclient.http import MediaFileUpload  # Para subir archivos
+from googleapiclient.errors import HttpError
 from django.conf import settings  # Settings
 from datetime import datetime
 from .models import Video  # Importamos tu modelo local
+from .youtube_client import obtener_cliente  # Cliente reutilizable por proceso
+from .api_gateway import cobrar
+from .sync_service import sumar_a_resumenes
+from .search_service import invalidar_indice
+import httplib2
+import logging
+import random
+import json
+import time
+import os
 # from django.views import youtube
 
+logger = logging.getLogger(__name__)
+
+ERRORES_REINTENTABLES = (500, 502, 503, 504)  # Errores del servidor que vale la pena reintentar
+
+
+class SesionArchivo:
+    """Guarda la URI de la sesión reanudable junto al archivo (<video>.sesion.json)"""
+
+    def __init__(self, archivo_path):
+        self.ruta = f"{archivo_path}.sesion.json"
+
+    def cargar(self):
+        try:
+            with open(self.ruta) as f:
+                return json.load(f).get('uri')
+        except (OSError, ValueError):
+            return None
+
+    def guardar(self, uri):
+        with open(self.ruta, 'w') as f:
+            json.dump({'uri': uri}, f)
+
+    def borrar(self):
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
 
 class YouTubeUploadService:
     """Servicio para subir videos a YouTube con OAuth"""
@@ -35,9 +71,10 @@ class YouTubeUploadService:
         
         return authorization_url, state  # Retorna URL y state (para validación)
     
-    def subir_video(self, credentials, archivo_path, titulo, descripcion, categoria='22', privacidad='private'):
+    def subir_video(self, credentials, archivo_path, titulo, descripcion, categoria='22', privacidad='private',
+                    al_progreso=None, sesion=None):
         """
-        Sube un video a YouTube
+        Sube un video a YouTube por partes (reanudable)
         
         Args:
             credentials: Credenciales OAuth del usuario
@@ -46,17 +83,15 @@ class YouTubeUploadService:
             descripcion: Descripción del video
             categoria: ID de categoría (22=People & Blogs, 27=Education)
             privacidad: public, private, unlisted
+            al_progreso: Función opcional que recibe el dict de progreso de cada parte
+            sesion: Dónde persistir la URI reanudable (por defecto SesionArchivo)
         
         Returns:
             dict: Información del video subido
         """
         
         # Crear servicio YouTube con credenciales del usuario
-        youtube = build(  # Construye servicio autenticado
-            'youtube', 
-            'v3', 
-            credentials=credentials  # Usa credentials del usuario
-        )
+        youtube = obtener_cliente(credentials)  # Servicio autenticado con las credenciales del usuario
         
         # Metadata del video
         body = {
@@ -73,7 +108,7 @@ class YouTubeUploadService:
         # Preparar archivo para upload
         media = MediaFileUpload(  # Crea objeto de media
             archivo_path,  # Ruta del archivo
-            chunksize=-1,  # Subir todo de una vez
+            chunksize=settings.YOUTUBE_UPLOAD_CONFIG['chunk_size'],  # Se sube por partes
             resumable=True  # Permite reanudar si falla
         )
         
@@ -84,7 +119,13 @@ class YouTubeUploadService:
             media_body=media  # Archivo de video
         )
         
-        response = request.execute()  # Ejecuta upload (puede tomar tiempo)
+        sesion = sesion or SesionArchivo(archivo_path)
+        if not sesion.cargar():
+            cobrar('videos.insert')  # Se cobra al abrir la sesión, no al reanudarla
+
+        response = self._subir_por_partes(  # Ejecuta upload parte por parte
+            request, sesion, al_progreso
+        )
         
 #
         if 'id' in response:
@@ -94,31 +135,129 @@ class YouTubeUploadService:
                 descripcion=descripcion,
                 fecha_publicacion=datetime.now()
             )
+            sumar_a_resumenes(videos=1)
+            invalidar_indice()
 
         return response  # Retorna respuesta con ID del video subido
     
-    def actualizar_estadisticas_locales(self, credentials):
-        youtube = build('youtube', 'v3', credentials=credentials)
-        
-        # 1. Traemos todos los IDs de videos que tenemos en MySQL
-        videos_locales = Video.objects.all()
-        if not videos_locales.exists():
-            return
-
-        ids_para_api = [v.youtube_id for v in videos_locales]
-
-        # 2. Consultamos a YouTube por esos IDs (máximo 50 por llamada)
-        response = youtube.videos().list(
-            part="statistics",
-            id=",".join(ids_para_api)
-        ).execute()
-
-        # 3. Guardamos los nuevos números en nuestra base de datos
-        for item in response.get('items', []):
-            Video.objects.filter(youtube_id=item['id']).update(
-                vistas=int(item['statistics'].get('viewCount', 0)),
-                likes=int(item['statistics'].get('likeCount', 0))
-            )
+    def _subir_por_partes(self, request, sesion, al_progreso=None):
+        """
+        Bucle de next_chunk() con reintentos y reanudación
+
+        Cada parte se reintenta con backoff exponencial. La URI de la sesión se
+        persiste en cuanto existe, así una subida interrumpida (incluso por un
+        reinicio del proceso) continúa desde el último byte confirmado.
+        """
+        config = settings.YOUTUBE_UPLOAD_CONFIG
+
+        uri_previa = sesion.cargar()
+        reanudar = bool(uri_previa)  # Antes de enviar nada se pregunta al servidor cuántos bytes tiene
+        if reanudar:
+            logger.info("⏯️ Reanudando subida desde la sesión guardada")
+
+        inicio = time.monotonic()
+        bytes_iniciales = 0
+        intento = 0
+        response = None
+
+        while response is None:
+            try:
+                if reanudar:
+                    bytes_iniciales, response = self._bytes_confirmados(request, uri_previa)
+                    request.resumable_uri = uri_previa
+                    request.resumable_progress = bytes_iniciales
+                    reanudar = False
+                    intento = 0
+                    continue
+                status, response = request.next_chunk()
+            except HttpError as e:
+                if e.resp.status in (404, 410) and (reanudar or request.resumable_uri):
+                    # La sesión expiró en YouTube: se empieza una nueva
+                    sesion.borrar()
+                    cobrar('videos.insert')
+                    uri_previa = request.resumable_uri = None
+                    request.resumable_progress = bytes_iniciales = 0
+                    reanudar = False
+                    continue
+                if e.resp.status not in ERRORES_REINTENTABLES:
+                    raise
+                intento = self._esperar_reintento(intento, config, e)
+                continue
+            except (httplib2.HttpLib2Error, ConnectionError, TimeoutError) as e:
+                intento = self._esperar_reintento(intento, config, e)
+                continue
+
+            intento = 0
+            if request.resumable_uri and request.resumable_uri != uri_previa:
+                sesion.guardar(request.resumable_uri)
+                uri_previa = request.resumable_uri
+
+            if status is not None and al_progreso:
+                al_progreso(self._progreso(status, inicio, bytes_iniciales))
+
+        sesion.borrar()
+        if al_progreso:
+            total = request.resumable.size()
+            al_progreso({'bytes_enviados': total, 'bytes_totales': total, 'porcentaje': 100.0,
+                         'bytes_por_segundo': total / max(time.monotonic() - inicio, 1e-6)})
+        return response
+
+    @staticmethod
+    def _bytes_confirmados(request, uri):
+        """
+        Consulta de estado de una sesión reanudable (PUT vacío con Content-Range: bytes */N)
+
+        Returns:
+            tuple: (bytes que el servidor ya tiene, respuesta final si la subida ya había terminado)
+        """
+        total = request.resumable.size()
+        resp, contenido = request.http.request(uri, 'PUT', headers={
+            'Content-Length': '0',
+            'Content-Range': f"bytes */{total}",
+        })
+        if resp.status in (200, 201):
+            return total, request.postproc(resp, contenido)
+        if resp.status == 308:
+            rango = resp.get('range')  # bytes=0-N; sin cabecera el servidor no tiene nada
+            return (int(rango.rsplit('-', 1)[-1]) + 1 if rango else 0), None
+        raise HttpError(resp, contenido, uri=uri)
+
+    @staticmethod
+    def _esperar_reintento(intento, config, error):
+        """Backoff exponencial con jitter; relanza el error si se agotan los intentos"""
+        intento += 1
+        if intento > config['max_reintentos']:
+            raise error
+        espera = min(2 ** intento + random.random(), config['espera_maxima'])
+        logger.warning(f"⚠️ Error subiendo parte ({error}); reintento {intento} en {espera:.1f}s")
+        time.sleep(espera)
+        return intento
+
+    @staticmethod
+    def _progreso(status, inicio, bytes_iniciales):
+        """Progreso de la subida: bytes, porcentaje y velocidad de esta ejecución"""
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        return {
+            'bytes_enviados': status.resumable_progress,
+            'bytes_totales': status.total_size,
+            'porcentaje': round(status.progress() * 100, 1),
+            'bytes_por_segundo': (status.resumable_progress - bytes_iniciales) / transcurrido,
+        }
+    
+    def actualizar_estadisticas_locales(self, credentials=None):
+        """
+        Refresca vistas, likes y comentarios de los videos guardados en la base de datos
+
+        Args:
+            credentials: Credenciales OAuth (opcional). Sin ellas se usa la API key,
+                ya que las estadísticas son públicas.
+
+        Returns:
+            int: Cantidad de videos actualizados (los que no cambiaron no se escriben)
+        """
+        from .sync_service import SincronizadorEstadisticas  # Evita import circular
+
+        return SincronizadorEstadisticas(credentials).ejecutar()['escritos']
 
     # def subir_video_con_thumbnail(video_file, thumbnail_file, metadata):
     #     # 1. Subir video
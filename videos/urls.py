@@ -20,4 +20,12 @@ urlpatterns = [
     # ========== SUBIR VIDEOS ==========
     path('subir/', views.subir_video, name='subir_video'),
     path('subir/procesar/', views.procesar_subida, name='procesar_subida'),
+    path('subida/<int:pk>/estado/', views.estado_subida, name='estado_subida'),
+
+    # ========== API DE ETIQUETAS ==========
+    path('api/etiquetas/', views.api_nube_etiquetas, name='api_nube_etiquetas'),
+    path('api/etiquetas/videos/', views.api_videos_por_etiqueta, name='api_videos_por_etiqueta'),
+
+    # ========== API DE CANALES (vista async) ==========
+    path('api/canales/resumen/', views.api_resumen_canales, name='api_resumen_canales'),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.http import JsonResponse
 from django.contrib import messages
 from django.conf import settings
@@ -7,105 +8,115 @@ import os
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
 # Google API Client
-from google.oauth2.credentials import Credentials
-from django.db.models import Sum, Q
+from django.db.models import Count, Sum
 from google_auth_oauthlib.flow import Flow
 from .youtube_service import YouTubeService2026
-from .upload_service import YouTubeUploadService
-from django.core.files.storage import default_storage
+from .youtube_async import YouTubeServiceAsync, cerrar_http
+from .upload_queue import crear_trabajo
+from .upload_handlers import entregar_al_spool
+from .sync_service import obtener_estadisticas_dashboard, obtener_resumen
+from .ingest_service import IngestaCanal, reservar_ingesta
+from .detalle_service import obtener_detalle_video
+from .search_service import buscar_en_biblioteca
+from .tag_service import filtrar_por_etiquetas, normalizar_lista, nube_etiquetas
+from .pagination_service import paginar_por_campo, paginar_por_fecha, paginar_por_posicion, tamano_pagina, url_pagina
+from .metrics_service import ORDENES, filtrar_shorts
+from .api_gateway import CuotaExcedida
+from .credentials_service import gestor_credenciales
+from .youtube_client import obtener_cliente
 
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 
 
 from datetime import datetime
 
-from .models import Video
+from .models import Video, TrabajoSubida, Etiqueta
 
 def inicio(request):
     """Dashboard principal con estadísticas globales de la base de datos"""
-    # 1. Obtenemos los últimos 12 para mostrar en la galería
+    # Los números los mantiene el worker `sincronizar_estadisticas`;
+    # aquí solo leemos los totales ya agregados (caché o BD)
     videos_recientes = Video.objects.all().order_by('-fecha_publicacion')[:12]
-    
-    creds_data = request.session.get('youtube_credentials')
-        
-    # Si hay sesión iniciada, refrescamos datos antes de mostrar el dashboard
-    if creds_data:
-        from google.oauth2.credentials import Credentials
-        service = YouTubeUploadService()
-        service.actualizar_estadisticas_locales(Credentials(**creds_data))
-
-    # Ahora sí, leemos de la base de datos ya actualizada
-    videos_recientes = Video.objects.all().order_by('-fecha_publicacion')[:12]
-    stats_globales = Video.objects.aggregate(
-        total_vistas=Sum('vistas'),
-        total_likes=Sum('likes')
-    )
+    estadisticas = obtener_estadisticas_dashboard()
 
     contexto = {
         'videos': videos_recientes,
-        'total_videos': Video.objects.count(),
-        'total_views': stats_globales['total_vistas'] or 0,
-        'total_likes': stats_globales['total_likes'] or 0,
+        'total_videos': estadisticas['total_videos'],
+        'total_views': estadisticas['total_views'],
+        'total_likes': estadisticas['total_likes'],
+        'ultima_sincronizacion': estadisticas['ultima_sincronizacion'],
     }
     return render(request, 'videos/inicio.html', contexto)
 
 
 def mis_videos(request):
-    creds_data = request.session.get('youtube_credentials')
-    if not creds_data:
+    credentials = gestor_credenciales.para_sesion(request)
+    if credentials is None:
         return redirect('videos:oauth_authorize')
 
     try:
-        credentials = Credentials(**creds_data)
-        youtube = build('youtube', 'v3', credentials=credentials)
-
         # 1. SINCRONIZACIÓN: Traemos de YouTube y guardamos en MySQL
-        # Esto asegura que el buscador TENGA algo que buscar
-        canal_res = youtube.channels().list(part="contentDetails", mine=True).execute()
-        uploads_id = canal_res['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-        
-        videos_api = youtube.playlistItems().list(
-            part="snippet,contentDetails",
-            playlistId=uploads_id,
-            maxResults=50
-        ).execute()
-
-        for item in videos_api.get('items', []):
-            v_id = item['contentDetails']['videoId']
-            thumbnails = item['snippet'].get('thumbnails', {})
-            url_thumb = (thumbnails.get('high') or thumbnails.get('medium') or thumbnails.get('default', {})).get('url', '')
-
-            # Guardamos o actualizamos en MySQL
-            Video.objects.update_or_create(
-                youtube_id=v_id,
-                defaults={
-                    'titulo': item['snippet']['title'],
-                    'descripcion': item['snippet']['description'],
-                    'url_thumbnail': url_thumb,
-                    'fecha_publicacion': item['snippet']['publishedAt'],
-                    # Nota: Aquí podrías llamar a las stats solo una vez para todos los IDs
-                }
-            )
+        # Esto asegura que el buscador TENGA algo que buscar.
+        # Es incremental (se detiene en la primera página ya sincronizada) y
+        # no se repite en cada visita: a lo sumo una vez por intervalo_ingesta
+        if reservar_ingesta(request.session.session_key):
+            try:
+                IngestaCanal(obtener_cliente(credentials)).ejecutar()
+            except CuotaExcedida:
+                messages.warning(request, "⛽ Cuota diaria de YouTube agotada: se muestran los videos guardados")
 
         # 2. LÓGICA DE DJANGO (Buscador y Filtros sobre MySQL)
-        queryset = Video.objects.all().order_by('-fecha_publicacion')
+        queryset = Video.objects.all()
         
         query = request.GET.get('buscar')
         if query:
-            queryset = queryset.filter(Q(titulo__icontains=query) | Q(descripcion__icontains=query))
-
-        # 3. ESTADÍSTICAS GLOBALES (Sobre los videos filtrados)
-        stats = queryset.aggregate(
-            v_vistas=Sum('vistas'),
-            v_likes=Sum('likes')
-        )
+            queryset = buscar_en_biblioteca(query, queryset)  # FULLTEXT / índice invertido, por relevancia
+
+        etiquetas = normalizar_lista(request.GET.getlist('etiqueta'))
+        tamano = tamano_pagina(request.GET.get('por_pagina'))
+        if etiquetas:
+            queryset = filtrar_por_etiquetas(queryset, etiquetas, tamano)  # JOIN / EXISTS según lo común del tag
+
+        shorts = request.GET.get('shorts')  # 'solo' | 'sin' | vacío
+        if shorts in ('solo', 'sin'):
+            queryset = filtrar_shorts(queryset, shorts == 'solo')  # Igualdad sobre es_short (índice con la fecha)
+
+        orden = request.GET.get('orden') if request.GET.get('orden') in ORDENES else 'recientes'
+
+        # 3. ESTADÍSTICAS (sin filtro salen del resumen global; con filtro hay que agregar)
+        if query or etiquetas or shorts in ('solo', 'sin'):
+            stats = queryset.aggregate(
+                v_vistas=Sum('vistas'),
+                v_likes=Sum('likes'),
+                v_comentarios=Sum('comentarios'),
+                v_total=Count('id'),
+            )
+        else:
+            resumen = obtener_resumen()
+            stats = {'v_vistas': resumen.total_vistas, 'v_likes': resumen.total_likes,
+                     'v_comentarios': resumen.total_comentarios, 'v_total': resumen.total_videos}
+            if not settings.YOUTUBE_PAGINATION_CONFIG['conteo_aproximado']:
+                stats['v_total'] = queryset.count()
+
+        # 4. PAGINACIÓN por cursor: solo se leen los videos de esta página
+        cursor = request.GET.get('cursor')
+        if query:
+            pagina = paginar_por_posicion(queryset, cursor, tamano, total=stats['v_total'])
+        else:
+            # Cada orden tiene su índice (-campo, -id): ordenar es recorrerlo, no calcular
+            pagina = paginar_por_campo(queryset, ORDENES[orden], cursor, tamano, total=stats['v_total'])
 
         return render(request, 'videos/mis_videos.html', {
-            'videos': queryset, # Enviamos el QuerySet de MySQL
+            'videos': pagina,
+            'url_siguiente': url_pagina(request, pagina.cursor_siguiente) if pagina.hay_siguiente else None,
+            'url_anterior': url_pagina(request, pagina.cursor_anterior) if pagina.hay_anterior else None,
             'total_views': stats['v_vistas'] or 0,
             'total_likes': stats['v_likes'] or 0,
-            'total_videos': queryset.count(),
+            'total_comments': stats['v_comentarios'] or 0,
+            'total_videos': stats['v_total'],
+            'etiquetas_activas': etiquetas,
+            'nube': nube_etiquetas(20),
+            'orden': orden,
+            'shorts': shorts,
         })
 
     except Exception as e:
@@ -129,6 +140,15 @@ def oauth_authorize(request):
     request.session['oauth_state'] = state
     return redirect(authorization_url)
 
+def _dueno(request):
+    """usuario / sesion con los que se guarda un TrabajoSubida (ver estado_subida)"""
+    if request.user.is_authenticated:
+        return {'usuario': request.user}
+    if request.session.session_key is None:
+        request.session.save()  # Que la sesión tenga clave antes de asociarle el trabajo
+    return {'sesion': request.session.session_key}
+
+
 def subir_video(request):
     # UNIFICADO: usamos 'youtube_credentials'
     if 'youtube_credentials' not in request.session:
@@ -142,30 +162,18 @@ def subir_video(request):
         archivo = request.FILES.get('video')
 
         if archivo:
-            path_temporal = default_storage.save(f'tmp/{archivo.name}', archivo)
-            ruta_completa = os.path.join(settings.MEDIA_ROOT, path_temporal)
-
-            try:
-                creds_data = request.session.get('youtube_credentials')
-                credentials = Credentials(**creds_data)
-                uploader = YouTubeUploadService()
-
-                uploader.subir_video(
-                    credentials=credentials,
-                    archivo_path=ruta_completa,
+            # El video ya está en el spool (VideoSpoolUploadHandler); el pool lo sube desde ahí
+            with entregar_al_spool(archivo) as ruta:
+                trabajo = crear_trabajo(
+                    credentials=gestor_credenciales.para_sesion(request),
+                    archivo=ruta,
                     titulo=titulo,
                     descripcion=descripcion,
                     categoria=categoria,
-                    privacidad='public' 
+                    privacidad='public',
+                    **_dueno(request)
                 )
-
-                messages.success(request, "¡Video subido exitosamente a YouTube!")
-            except Exception as e:
-                messages.error(request, f"Error al subir: {e}")
-            finally:
-                if os.path.exists(ruta_completa):
-                    os.remove(ruta_completa)
-            
+            messages.success(request, f"📤 Video en cola de subida (trabajo #{trabajo.pk})")
             return redirect('videos:mis_videos')
         
     return render(request, 'videos/subir_video.html')
@@ -186,13 +194,8 @@ def oauth_callback(request):
         flow.fetch_token(authorization_response=request.build_absolute_uri())
         credentials = flow.credentials
         
-        request.session['youtube_credentials'] = {
-            'token': credentials.token,
-            'refresh_token': credentials.refresh_token,
-            'token_uri': credentials.token_uri,
-            'client_id': credentials.client_id,
-            'client_secret': credentials.client_secret,
-        }
+        # Incluye expiry: el gestor renueva el token antes de que venza
+        gestor_credenciales.guardar_en_sesion(request, credentials)
         
         # Limpiamos el state de la sesión para evitar errores de CSRF en el futuro
         if 'oauth_state' in request.session:
@@ -206,25 +209,17 @@ def oauth_callback(request):
         return redirect('videos:inicio')
     
 def buscar_videos(request):
-    """Busca videos en YouTube por palabra clave"""
-    query = request.GET.get('q', '')
+    """Busca videos en YouTube por palabra clave (con caché compartida)"""
+    query = YouTubeService2026.normalizar_consulta(request.GET.get('q', ''))
     resultados = []
     
     if query:
-        youtube = build(
-            settings.YOUTUBE_API_SERVICE_NAME,
-            settings.YOUTUBE_API_VERSION,
-            developerKey=settings.YOUTUBE_API_KEY
-        )
-        
-        search_response = youtube.search().list(
-            q=query,
-            part='id,snippet',
-            type='video',
-            maxResults=20
-        ).execute()
-        
-        resultados = search_response.get('items', [])
+        try:
+            resultados = YouTubeService2026().buscar_videos_con_cache(query, max_results=20)
+        except CuotaExcedida:
+            messages.warning(request, "⛽ Cuota diaria de YouTube agotada: intenta la búsqueda más tarde")
+        except Exception as e:
+            messages.error(request, f"Error al buscar: {e}")
     
     return render(request, 'videos/buscar.html', {
         'query': query,
@@ -233,44 +228,31 @@ def buscar_videos(request):
 
 # ELIMINADO @login_required para evitar el error 404
 def procesar_subida(request):
-    """Sube video a YouTube usando OAuth del usuario"""
+    """Encola la subida del video a YouTube con el OAuth del usuario"""
     if request.method == 'POST':
+        # Antes de leer request.FILES: sin OAuth no hay a quién subirle el video
+        credentials = gestor_credenciales.para_sesion(request)
+        if credentials is None:
+            messages.error(request, '❌ Conecta tu cuenta de YouTube antes de subir un video')
+            return redirect('videos:oauth_authorize')
+
         try:
-            creds_data = request.session.get('youtube_credentials')
-            credentials = Credentials(**creds_data)
-            
-            youtube = build('youtube', 'v3', credentials=credentials)
-            
             video_file = request.FILES['video']
             titulo = request.POST.get('titulo')
             descripcion = request.POST.get('descripcion')
             
-            temp_path = f'/tmp/{video_file.name}'
-            with open(temp_path, 'wb') as f:
-                for chunk in video_file.chunks():
-                    f.write(chunk)
-            
-            body = {
-                'snippet': {
-                    'title': titulo,
-                    'description': descripcion,
-                    'categoryId': '27'
-                },
-                'status': {'privacyStatus': 'private'}
-            }
-            
-            media = MediaFileUpload(temp_path, resumable=True)
-            
-            request_upload = youtube.videos().insert(
-                part='snippet,status',
-                body=body,
-                media_body=media
-            )
-            
-            response = request_upload.execute()
-            os.remove(temp_path)
-            
-            messages.success(request, f'✅ Video subido: {response["id"]}')
+            with entregar_al_spool(video_file) as ruta:
+                trabajo = crear_trabajo(
+                    credentials=credentials,
+                    archivo=ruta,
+                    titulo=titulo,
+                    descripcion=descripcion,
+                    categoria='27',
+                    privacidad='private',
+                    **_dueno(request)
+                )
+
+            messages.success(request, f'📤 Video en cola de subida (trabajo #{trabajo.pk})')
             return redirect('videos:mis_videos')
             
         except Exception as e:
@@ -279,42 +261,108 @@ def procesar_subida(request):
     return render(request, 'videos/subir_video.html')
 
 def detalle_video(request, video_id):
-    """Muestra los detalles de un video específico usando la API de YouTube"""
-    # UNIFICADO: usamos 'youtube_credentials'
-    creds_data = request.session.get('youtube_credentials')
-    if not creds_data:
-        return redirect('videos:oauth_authorize')
+    """Muestra los detalles de un video (caché → base de datos → API de YouTube)"""
+    # Las credenciales son opcionales: los videos públicos se leen con la API key
+    credentials = gestor_credenciales.para_sesion(request)
 
     try:
-        credentials = Credentials(**creds_data)
-        youtube = build('youtube', 'v3', credentials=credentials)
+        video_data = obtener_detalle_video(video_id, credentials)
 
-        res = youtube.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=video_id
-        ).execute()
-
-        if not res['items']:
+        if video_data is None:
             messages.error(request, "Video no encontrado.")
             return redirect('videos:mis_videos')
 
-        item = res['items'][0]
-        video_data = {
-            'youtube_id': video_id,
-            'titulo': item['snippet']['title'],
-            'descripcion': item['snippet']['description'],
-            'vistas': item['statistics'].get('viewCount', 0),
-            'likes': item['statistics'].get('likeCount', 0),
-            'comentarios': item['statistics'].get('commentCount', 0),
-            'fecha_publicacion': item['snippet']['publishedAt'],
-            'canal_nombre': item['snippet']['channelTitle'],
-            'canal_id': item['snippet']['channelId'],
-            'get_embed_url': f"https://www.youtube.com/embed/{video_id}",
-            'url_video': f"https://www.youtube.com/watch?v={video_id}",
-        }
-
         return render(request, 'videos/detalle_video.html', {'video': video_data})
 
     except Exception as e:
         messages.error(request, f"Error al cargar el video: {e}")
-        return redirect('videos:mis_videos')
\ No newline at end of file
+        return redirect('videos:mis_videos')
+
+
+def api_nube_etiquetas(request):
+    """Tags más usados: ?limite=N (1-200)"""
+    try:
+        limite = max(1, min(int(request.GET.get('limite', 50)), 200))
+    except ValueError:
+        limite = 50
+    return JsonResponse({'etiquetas': nube_etiquetas(limite)})
+
+
+def api_videos_por_etiqueta(request):
+    """Videos con todos los tags de ?etiqueta= (repetible), paginados por ?cursor="""
+    etiquetas = normalizar_lista(request.GET.getlist('etiqueta'))
+    if not etiquetas:
+        return JsonResponse({'error': 'Falta el parámetro etiqueta'}, status=400)
+
+    total = None
+    if len(etiquetas) == 1:
+        # Con un solo tag el contador de la etiqueta evita el COUNT(*)
+        total = Etiqueta.objects.filter(nombre=etiquetas[0]).values_list('total_videos', flat=True).first() or 0
+
+    tamano = tamano_pagina(request.GET.get('por_pagina'))
+    queryset = filtrar_por_etiquetas(
+        Video.objects.only('youtube_id', 'titulo', 'url_thumbnail', 'fecha_publicacion', 'vistas', 'likes'),
+        etiquetas, tamano
+    )
+    pagina = paginar_por_fecha(queryset, request.GET.get('cursor'), tamano, total=total)
+    return JsonResponse({
+        'etiquetas': etiquetas,
+        'total': total,
+        'videos': [{
+            'youtube_id': video.youtube_id,
+            'titulo': video.titulo,
+            'url_thumbnail': video.url_thumbnail,
+            'fecha_publicacion': video.fecha_publicacion.isoformat(),
+            'vistas': video.vistas,
+            'likes': video.likes,
+        } for video in pagina],
+        'siguiente': pagina.cursor_siguiente,
+        'anterior': pagina.cursor_anterior,
+    })
+
+
+async def api_resumen_canales(request):
+    """
+    Datos y últimos videos de ?canal= (repetible, hasta 50) y ?por_canal=N (1-50)
+
+    Vista async: las llamadas de todos los canales van a la vez (youtube_async),
+    así la respuesta tarda unas tres latencias de la API sin importar cuántos sean.
+    """
+    canal_ids = [c.strip() for c in request.GET.getlist('canal') if c.strip()]
+    if not canal_ids:
+        return JsonResponse({'error': 'Falta el parámetro canal'}, status=400)
+    try:
+        por_canal = max(1, min(int(request.GET.get('por_canal', 10)), 50))
+    except ValueError:
+        por_canal = 10
+
+    try:
+        canales = await YouTubeServiceAsync().resumen_canales(canal_ids, por_canal)
+    except CuotaExcedida:
+        return JsonResponse({'error': 'Cuota diaria de YouTube agotada'}, status=429)
+    finally:
+        if not isinstance(request, ASGIRequest):
+            await cerrar_http()  # Bajo WSGI el loop muere con la petición; bajo ASGI el pool se comparte
+    return JsonResponse({'canales': canales})
+
+
+def estado_subida(request, pk):
+    """Progreso de un trabajo de subida (JSON para consultarlo desde la página); solo para su dueño"""
+    if request.user.is_authenticated:
+        propios = TrabajoSubida.objects.filter(usuario=request.user)
+    elif request.session.session_key:
+        propios = TrabajoSubida.objects.filter(usuario=None, sesion=request.session.session_key)
+    else:
+        propios = TrabajoSubida.objects.none()
+    trabajo = get_object_or_404(propios, pk=pk)  # 404 también si es de otro: no revela que existe
+    return JsonResponse({
+        'id': trabajo.pk,
+        'estado': trabajo.estado,
+        'titulo': trabajo.titulo,
+        'bytes_enviados': trabajo.bytes_enviados,
+        'bytes_totales': trabajo.bytes_totales,
+        'porcentaje': trabajo.porcentaje,
+        'bytes_por_segundo': trabajo.bytes_por_segundo,
+        'youtube_id': trabajo.youtube_id,
+        'error': trabajo.error,
+    })
@@ -0,0 +1,292 @@
+"""
+Cliente asíncrono de la YouTube Data API (httpx) para vistas async y workers
+
+Cubre los endpoints de lectura que usa la app (search, videos, channels y
+playlistItems) con las mismas reglas que el cliente síncrono:
+    - Cada llamada pasa por api_gateway.cobrar antes de salir (cuota y prioridad).
+    - Las respuestas se cachean en los mismos espacios de CacheYouTube.
+    - Los errores HTTP se lanzan como googleapiclient.errors.HttpError.
+Así las llamadas independientes de una vista corren a la vez (asyncio.gather)
+en vez de pagar sus latencias una tras otra.
+"""
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings  # Configuración
+from django.core.cache import cache
+from googleapiclient.errors import HttpError
+from google_auth_httplib2 import Request
+from .api_gateway import cobrar, etag_guardado, guardar_etag
+from .youtube_service import (
+    CACHE_SUBIDAS, LOTE_DETALLES, YouTubeService2026, cache_busquedas, cache_detalles, item_a_video, sin_repetir
+)
+import asyncio
+import itertools
+import httplib2
+import httpx
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+URL_API = 'https://www.googleapis.com/'  # rootUrl del discovery document
+
+_clientes_http = weakref.WeakKeyDictionary()  # loop -> httpx.AsyncClient (pool de conexiones por loop)
+_ssl = None  # Contexto TLS compartido: cargar los certificados cuesta ~40 ms por cliente
+
+
+def _contexto_ssl():
+    global _ssl
+    if _ssl is None:
+        _ssl = httpx.create_ssl_context()
+    return _ssl
+
+
+def _http():
+    """
+    AsyncClient del event loop actual
+
+    Un AsyncClient no puede usarse desde otro loop: bajo ASGI hay un solo
+    loop y todas las peticiones comparten el pool de conexiones; bajo WSGI
+    cada vista async corre en un loop propio y el pool dura esa petición.
+    """
+    loop = asyncio.get_running_loop()
+    cliente = _clientes_http.get(loop)
+    if cliente is None:
+        config = settings.YOUTUBE_CLIENT_CONFIG
+        raiz = config.get('api_endpoint') or URL_API
+        cliente = _clientes_http[loop] = httpx.AsyncClient(
+            base_url=f"{raiz}youtube/{settings.YOUTUBE_API_VERSION}/",
+            timeout=config['timeout'],
+            limits=httpx.Limits(max_connections=config['conexiones_async']),
+            verify=_contexto_ssl(),
+        )
+    return cliente
+
+
+async def cerrar_http():
+    """Cierra el pool del loop actual (workers y vistas async bajo WSGI, cuyo loop termina con ellos)"""
+    cliente = _clientes_http.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
+
+
+def _parametros(parametros):
+    """Como googleapiclient: sin None, listas separadas por coma y booleanos en minúscula"""
+    resultado = {}
+    for nombre, valor in parametros.items():
+        if valor is None:
+            continue
+        if isinstance(valor, bool):
+            valor = 'true' if valor else 'false'
+        elif isinstance(valor, (list, tuple)):
+            valor = ','.join(valor)
+        resultado[nombre] = valor
+    return resultado
+
+
+class ClienteYouTubeAsync:
+    """
+    Llamadas *.list de la YouTube Data API sobre httpx
+
+    Args:
+        credentials: Credenciales OAuth (p. ej. gestor_credenciales.para_sesion);
+            sin ellas se usa la API key
+        api_key: API key (por defecto settings.YOUTUBE_API_KEY)
+        prioridad: INTERACTIVA o FONDO; None = la del contexto (ver segundo_plano)
+        usuario: Usuario al que se le atribuye el gasto
+    """
+
+    def __init__(self, credentials=None, api_key=None, prioridad=None, usuario=None):
+        self.credentials = credentials
+        self.api_key = api_key or settings.YOUTUBE_API_KEY
+        self.prioridad = prioridad
+        self.usuario = usuario
+
+    async def _autenticacion(self):
+        """(parámetros, cabeceras) de la llamada: API key o Bearer token"""
+        if self.credentials is None:
+            return {'key': self.api_key}, {}
+        if not self.credentials.valid and self.credentials.refresh_token:
+            # Normalmente ya lo renovó el hilo de gestor_credenciales; si no, sin bloquear el loop
+            await sync_to_async(self.credentials.refresh, thread_sensitive=False)(Request(httplib2.Http()))
+        return {}, {'Authorization': f"Bearer {self.credentials.token}"}
+
+    async def listar(self, recurso, condicional=False, **parametros):
+        """
+        GET {recurso} (search, videos, channels, playlistItems)
+
+        Cobra la operación antes de despacharla, igual que api_gateway.ejecutar.
+        Con condicional=True manda If-None-Match con el ETag que guardó
+        cualquiera de los dos clientes y ante un 304 devuelve el cuerpo guardado
+        (como api_gateway.ejecutar_condicional).
+
+        Raises:
+            CuotaExcedida: si la llamada no cabe en la cuota
+            HttpError: si YouTube responde con error
+        """
+        autenticacion, cabeceras = await self._autenticacion()
+        peticion = _http().build_request(
+            'GET', recurso, params={**_parametros(parametros), **autenticacion}, headers=cabeceras
+        )
+        guardado = await sync_to_async(etag_guardado)(str(peticion.url)) if condicional else None
+        if guardado:
+            peticion.headers['If-None-Match'] = guardado['etag']
+
+        await sync_to_async(cobrar)(f"{recurso}.list", self.prioridad, self.usuario)
+        respuesta = await _http().send(peticion)
+        if guardado and respuesta.status_code == 304:
+            return guardado['cuerpo']
+        if respuesta.status_code >= 300:
+            raise HttpError(
+                httplib2.Response({'status': respuesta.status_code, 'reason': respuesta.reason_phrase}),
+                respuesta.content, uri=str(respuesta.url).replace(self.api_key, '***')
+            )
+        cuerpo = respuesta.json()
+        if condicional:
+            await sync_to_async(guardar_etag)(str(peticion.url), cuerpo)
+        return cuerpo
+
+    async def search(self, **parametros):
+        return await self.listar('search', **parametros)
+
+    async def videos(self, **parametros):
+        return await self.listar('videos', **parametros)
+
+    async def channels(self, **parametros):
+        return await self.listar('channels', **parametros)
+
+    async def playlist_items(self, **parametros):
+        return await self.listar('playlistItems', **parametros)
+
+
+class YouTubeServiceAsync:
+    """Equivalente async de YouTubeService2026 (mismas claves de caché y formato de resultados)"""
+
+    def __init__(self, credentials=None, api_key=None, prioridad=None):
+        self.cliente = ClienteYouTubeAsync(credentials, api_key, prioridad)
+
+    async def buscar_videos_con_cache(self, query, max_results=10, region='MX'):
+        """Busca videos compartiendo caché (y single-flight) con la versión síncrona"""
+        query = YouTubeService2026.normalizar_consulta(query)
+        cache_key = cache_busquedas.construir_clave(q=query, maxResults=max_results, regionCode=region)
+
+        async def llamar_api():
+            logger.info(f"🔍 API CALL (async): {query}")
+            respuesta = await self.cliente.search(
+                condicional=True, q=query, part='id,snippet', type='video', maxResults=max_results,
+                order='relevance', regionCode=region
+            )
+            return respuesta.get('items', [])
+
+        return await cache_busquedas.aobtener_o_calcular(cache_key, llamar_api)
+
+    async def obtener_detalles_videos(self, video_ids, guardar_en_cache=True):
+        """
+        Como YouTubeService2026.obtener_detalles_videos: sin repetidos, caché
+        por ID y lotes de 50; aquí los lotes de una ventana van con gather.
+
+        Yields:
+            dict: Cada video en el orden de entrada (async for)
+        """
+        if isinstance(video_ids, str):
+            video_ids = [video_ids]
+
+        ids = sin_repetir(video_ids)
+        ventana_maxima = LOTE_DETALLES * settings.YOUTUBE_CLIENT_CONFIG['workers_detalles']
+        while ventana := list(itertools.islice(ids, ventana_maxima)):
+            claves = {video_id: cache_detalles.construir_clave(id=video_id) for video_id in ventana}
+            en_cache, vencidas = await sync_to_async(cache_detalles.obtener_varios)(list(claves.values()))
+            detalles = {video_id: en_cache[clave] for video_id, clave in claves.items() if clave in en_cache}
+            if vencidas:
+                # Se sirven ya y se refrescan juntas en un hilo con su propio loop (sobrevive a esta petición)
+                por_clave = {clave: video_id for video_id, clave in claves.items()}
+
+                def refrescar(pendientes, por_clave=por_clave):
+                    return async_to_sync(self._refrescar_detalles)([por_clave[c] for c in pendientes])
+
+                await sync_to_async(cache_detalles.revalidar_varios)(vencidas, refrescar)
+
+            faltantes = [video_id for video_id in ventana if video_id not in detalles]
+            lotes = await asyncio.gather(*(
+                self._consultar_detalles(faltantes[i:i + LOTE_DETALLES])
+                for i in range(0, len(faltantes), LOTE_DETALLES)
+            ))
+            nuevos = {video['youtube_id']: video for lote in lotes for video in lote}
+            if guardar_en_cache:
+                await sync_to_async(cache_detalles.guardar_varios)(
+                    {claves[video_id]: video for video_id, video in nuevos.items()}
+                )
+            detalles.update(nuevos)
+
+            for video_id in ventana:
+                if video_id in detalles:
+                    yield detalles[video_id]
+
+    async def _refrescar_detalles(self, video_ids):
+        """{clave de cache_detalles: video} de las entradas vencidas; cierra el pool de su loop al terminar"""
+        try:
+            lotes = await asyncio.gather(*(
+                self._consultar_detalles(video_ids[i:i + LOTE_DETALLES])
+                for i in range(0, len(video_ids), LOTE_DETALLES)
+            ))
+        finally:
+            await cerrar_http()
+        return {cache_detalles.construir_clave(id=video['youtube_id']): video for lote in lotes for video in lote}
+
+    async def _consultar_detalles(self, video_ids):
+        respuesta = await self.cliente.videos(condicional=True, id=video_ids, part='snippet,contentDetails,statistics')
+        return [item_a_video(item) for item in respuesta.get('items', [])]
+
+    async def resumen_canales(self, canal_ids, por_canal=10):
+        """
+        Datos, estadísticas y últimos videos de varios canales
+
+        Tres rondas de red sin importar cuántos canales sean:
+            1. Un channels.list con todos los IDs (hasta 50).
+            2. playlistItems.list de la playlist de subidas de cada canal, a la vez.
+            3. videos.list de todos los videos juntos, en lotes de 50 a la vez.
+        En síncrono serían 1 + N + N×por_canal/50 llamadas una tras otra.
+
+        Returns:
+            list: [{'canal_id', 'titulo', 'suscriptores', 'vistas', 'total_videos', 'videos': [...]}]
+        """
+        canal_ids = list(sin_repetir(canal_ids))[:LOTE_DETALLES]
+        if not canal_ids:
+            return []
+
+        respuesta = await self.cliente.channels(id=canal_ids, part='snippet,statistics,contentDetails')
+        canales = {item['id']: item for item in respuesta.get('items', [])}
+        await sync_to_async(cache.set_many)({
+            CACHE_SUBIDAS.format(canal_id=canal_id): item['contentDetails']['relatedPlaylists']['uploads']
+            for canal_id, item in canales.items()
+        }, timeout=None)  # Las mismas que usa obtener_playlist_subidas
+
+        encontrados = [canal_id for canal_id in canal_ids if canal_id in canales]
+        paginas = await asyncio.gather(*(
+            self.cliente.playlist_items(
+                playlistId=canales[canal_id]['contentDetails']['relatedPlaylists']['uploads'],
+                part='contentDetails', maxResults=min(por_canal, LOTE_DETALLES)
+            )
+            for canal_id in encontrados
+        ))
+        ids_por_canal = {
+            canal_id: [item['contentDetails']['videoId'] for item in pagina.get('items', [])]
+            for canal_id, pagina in zip(encontrados, paginas)
+        }
+
+        videos = {}
+        async for video in self.obtener_detalles_videos(itertools.chain.from_iterable(ids_por_canal.values())):
+            videos[video['youtube_id']] = video
+
+        resumen = []
+        for canal_id in encontrados:
+            item = canales[canal_id]
+            estadisticas = item.get('statistics', {})
+            resumen.append({
+                'canal_id': canal_id,
+                'titulo': item['snippet']['title'],
+                'suscriptores': int(estadisticas.get('subscriberCount', 0)),
+                'vistas': int(estadisticas.get('viewCount', 0)),
+                'total_videos': int(estadisticas.get('videoCount', 0)),
+                'videos': [videos[video_id] for video_id in ids_por_canal[canal_id] if video_id in videos],
+            })
+        return resumen
@@ -0,0 +1,108 @@
+from googleapiclient.discovery import build_from_document  # Construye el servicio desde un documento ya cargado
+from googleapiclient import discovery_cache  # Documentos discovery incluidos en la librería
+from google_auth_httplib2 import AuthorizedHttp  # Transporte autenticado con OAuth
+from django.conf import settings  # Configuración
+from pathlib import Path
+import threading
+import httplib2
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_URL = 'https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest'
+
+_documento = None  # Discovery document parseado, compartido por todo el proceso
+_lock = threading.Lock()
+_local = threading.local()  # Transporte y clientes por hilo (httplib2 no es thread-safe)
+
+
+def _leer_documento():
+    """Lee el discovery document: el incluido en la librería o la copia en disco"""
+    api = settings.YOUTUBE_API_SERVICE_NAME
+    version = settings.YOUTUBE_API_VERSION
+
+    contenido = discovery_cache.get_static_doc(api, version)  # static_discovery
+    if contenido:
+        return contenido
+
+    # cache_discovery: se descarga una sola vez y se guarda en disco
+    ruta = Path(settings.YOUTUBE_CLIENT_CONFIG['discovery_cache_dir']) / f'{api}.{version}.json'
+    if ruta.exists():
+        return ruta.read_text(encoding='utf-8')
+
+    logger.info(f"🌐 Descargando discovery document de {api} {version}")
+    respuesta, contenido = httplib2.Http().request(DISCOVERY_URL.format(api=api, version=version))
+    if respuesta.status >= 400:
+        raise RuntimeError(f"No se pudo descargar el discovery document ({respuesta.status})")
+    contenido = contenido.decode('utf-8')
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(contenido, encoding='utf-8')
+    return contenido
+
+
+def obtener_documento_discovery():
+    """Devuelve el discovery document parseado (se parsea una sola vez por proceso)"""
+    global _documento
+    if _documento is None:
+        with _lock:
+            if _documento is None:
+                documento = json.loads(_leer_documento())
+                # build_from_document completa los parámetros de cada método la
+                # primera vez que se usan; lo hacemos aquí, bajo el lock, para que
+                # después el documento sea de solo lectura entre hilos
+                servicio = build_from_document(documento, http=httplib2.Http())
+                for recurso in documento.get('resources', {}):
+                    getattr(servicio, recurso)()
+
+                # Endpoint alternativo (p. ej. el servidor falso local): cambia
+                # tanto las llamadas normales como las URLs de subida
+                endpoint = settings.YOUTUBE_CLIENT_CONFIG.get('api_endpoint')
+                if endpoint:
+                    documento = dict(documento, rootUrl=endpoint, baseUrl=endpoint + documento['servicePath'])
+                _documento = documento
+    return _documento
+
+
+def _transporte():
+    """Conexión HTTP keep-alive reutilizada por el hilo actual"""
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=settings.YOUTUBE_CLIENT_CONFIG['timeout'])
+        # Igual que build_http(): el 308 de las subidas reanudables no es una redirección
+        http.redirect_codes = http.redirect_codes - {308}
+        _local.http = http
+    return http
+
+
+def obtener_cliente(credentials=None, api_key=None):
+    """
+    Devuelve un cliente de YouTube Data API listo para usar
+
+    Args:
+        credentials: Credenciales OAuth del usuario. Si se pasan, se crea un
+            cliente autenticado que comparte el discovery ya parseado.
+        api_key: API key (por defecto settings.YOUTUBE_API_KEY). Estos clientes
+            se reutilizan entre peticiones del mismo hilo.
+
+    Returns:
+        Resource: Servicio de YouTube
+    """
+    documento = obtener_documento_discovery()
+
+    if credentials is not None:
+        return build_from_document(
+            documento,
+            http=AuthorizedHttp(credentials, http=_transporte())
+        )
+
+    api_key = api_key or settings.YOUTUBE_API_KEY
+    clientes = getattr(_local, 'clientes', None)
+    if clientes is None:
+        clientes = _local.clientes = {}
+
+    cliente = clientes.get(api_key)
+    if cliente is None:
+        cliente = build_from_document(documento, developerKey=api_key, http=_transporte())
+        clientes[api_key] = cliente
+    return cliente
@@ -1,66 +1,120 @@
-from googleapiclient.discovery import build  # Constructor de servicio Google
+from .youtube_client import obtener_cliente  # Cliente reutilizable por proceso
 from django.conf import settings  # Configuración
 from datetime import datetime  # Manejo de fechas
-import isodate  # Para parsear duración ISO 8601
-import hashlib
+from .metrics_service import duracion_en_segundos  # Parsea la duración ISO 8601
+from .cache_service import CacheYouTube
+from .api_gateway import ejecutar, ejecutar_condicional, prioridad_actual  # Cobra la cuota antes de cada llamada
+from .ingest_service import iterar_playlist  # Recorre playlistItems siguiendo nextPageToken
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import itertools
 import re
 # from django.views import youtube
 
 from django.core.cache import cache
+from django.db import connection
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+cache_busquedas = CacheYouTube('search', unidades_por_llamada=100)  # search.list cuesta 100 unidades
+cache_detalles = CacheYouTube('videos', unidades_por_llamada=1 / 50)  # Por ID: videos.list cuesta 1 unidad cada 50
+cache_canales = CacheYouTube('channel', unidades_por_llamada=2)  # playlistItems.list + videos.list por cada 50 videos
+
+CACHE_SUBIDAS = 'youtube_subidas_{canal_id}'  # Playlist de subidas de cada canal (no cambia nunca)
+LOTE_DETALLES = 50  # IDs por videos.list (máximo de la API)
+
+
+def item_a_video(item):
+    """Convierte un item de videos.list (snippet, contentDetails, statistics) al formato del modelo Video"""
+    snippet = item['snippet']  # Información básica
+    statistics = item.get('statistics', {})  # Estadísticas (puede no existir)
+    content = item['contentDetails']  # Detalles de contenido
+    
+    # Parsear duración ISO 8601 (PT15M30S → 15:30)
+    duracion_iso = content.get('duration', 'PT0S')  # Obtiene duración
+    duracion_segundos = duracion_en_segundos(duracion_iso)  # Convierte a segundos (igual que Video)
+    
+    video_data = {  # Construye diccionario con datos
+        'youtube_id': item['id'],  # ID del video
+        'titulo': snippet['title'],  # Título
+        'descripcion': snippet['description'],  # Descripción
+        'canal_id': snippet['channelId'],  # ID del canal
+        'canal_nombre': snippet['channelTitle'],  # Nombre del canal
+        'fecha_publicacion': datetime.fromisoformat(  # Convierte a datetime
+            snippet['publishedAt'].replace('Z', '+00:00')
+        ),
+        'url_thumbnail': snippet['thumbnails']['high']['url'],  # Miniatura alta resolución
+        'url_video': f"https://www.youtube.com/watch?v={item['id']}",  # URL completa
+        'duracion': duracion_iso,  # Duración en formato ISO
+        'duracion_segundos': duracion_segundos,  # Duración en segundos
+        'vistas': int(statistics.get('viewCount', 0)),  # Visualizaciones
+        'likes': int(statistics.get('likeCount', 0)),  # Me gusta
+        'comentarios': int(statistics.get('commentCount', 0)),  # Comentarios
+        'etiquetas': ','.join(snippet.get('tags', [])),  # Tags separados por coma
+    }
+    
+    return video_data
+
+
+def sin_repetir(video_ids):
+    """Genera los IDs en orden, cada uno una sola vez"""
+    vistos = set()
+    for video_id in video_ids:
+        if video_id and video_id not in vistos:
+            vistos.add(video_id)
+            yield video_id
+
+
 class YouTubeService2026:
     """Servicio YouTube Data API v3 - Optimizado 2026"""
     
     def __init__(self, api_key=None):
         self.api_key = api_key or settings.YOUTUBE_API_KEY
-        self.youtube = build(
-            settings.YOUTUBE_API_SERVICE_NAME,
-            settings.YOUTUBE_API_VERSION,
-            developerKey=self.api_key
-        )
     
-    def buscar_videos_con_cache(self, query, max_results=10):
-        """Busca videos con caché automático (2026 feature)"""
-        
-        # Generar clave de caché única
-        cache_key = f"youtube_search_{hashlib.md5(query.encode()).hexdigest()}"
-        
-        # Intentar obtener de caché
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            logger.info(f"✅ Cache HIT: {query}")
-            return cached_result
-        
-        # Si no existe en caché, llamar a API
-        logger.info(f"🔍 API CALL: {query}")
-        
-        search_response = self.youtube.search().list(
-            q=query,
-            part='id,snippet',
-            type='video',
-            maxResults=max_results,
-            order='relevance',
-            regionCode='MX'  # México
-        ).execute()
-        
-        resultados = search_response.get('items', [])
-        
-        # Guardar en caché por 1 hora
-        cache.set(cache_key, resultados, timeout=3600)
-        
-        return resultados
+    @property
+    def youtube(self):
+        """Cliente del hilo actual (los refrescos de caché corren en otros hilos)"""
+        return obtener_cliente(api_key=self.api_key)
+    
+    @staticmethod
+    def normalizar_consulta(query):
+        """'  Django   TUTORIAL ' → 'django tutorial' (misma búsqueda, misma clave)"""
+        return ' '.join(query.split()).lower()
+
+    def buscar_videos_con_cache(self, query, max_results=10, region='MX'):
+        """Busca videos con caché compartida y llamadas agrupadas (2026 feature)"""
+        
+        query = self.normalizar_consulta(query)
+        
+        # Clave única por TODOS los parámetros que cambian la respuesta
+        cache_key = cache_busquedas.construir_clave(q=query, maxResults=max_results, regionCode=region)
+        
+        def llamar_api():
+            logger.info(f"🔍 API CALL: {query}")
+            # Al vencer la caché, si los resultados no cambiaron llega un 304 sin cuerpo
+            search_response, _ = ejecutar_condicional(self.youtube.search().list(
+                q=query,
+                part='id,snippet',
+                type='video',
+                maxResults=max_results,
+                order='relevance',
+                regionCode=region  # México por defecto
+            ))
+            return search_response.get('items', [])
+        
+        # Si está en caché se devuelve directo; si no, solo UNA petición
+        # concurrente llama a la API y las demás esperan su resultado
+        return cache_busquedas.obtener_o_calcular(cache_key, llamar_api)
     
     def obtener_estadisticas_mejoradas(self, video_id):
         """Obtiene estadísticas con métricas 2026"""
         
-        response = self.youtube.videos().list(
+        response = ejecutar(self.youtube.videos().list(
             part='snippet,contentDetails,statistics,topicDetails',
             id=video_id
-        ).execute()
+        ))
         
         if not response['items']:
             return None
@@ -75,78 +129,176 @@ class YouTubeService2026:
             'engagement_rate': self._calcular_engagement(stats),  # 🆕 2026
         }
 
-    def obtener_detalles_videos(self, video_ids):
+    def obtener_detalles_videos(self, video_ids, guardar_en_cache=True):
         """
         Obtiene información detallada de videos
         
+        Acepta cualquier cantidad de IDs: se quitan repetidos, los que están
+        en caché (por ID) no salen a la red y el resto se pide en lotes de 50
+        (máximo de videos.list) a un pool de hilos acotado. Los resultados se
+        van entregando en el orden de entrada mientras llegan los lotes.
+        
         Args:
-            video_ids: Lista de IDs de videos o string único
+            video_ids: Iterable de IDs de videos (puede ser un generador) o string único
+            guardar_en_cache: False para no escribir una entrada por video (p. ej.
+                un recorrido de canal, que ya se cachea entero); se sigue leyendo
         
-        Returns:
-            list: Información completa de videos
+        Yields:
+            dict: Información completa de cada video (los que YouTube no
+                devuelve, p. ej. borrados o privados, se omiten)
         """
         
         # Convertir a lista si es string
         if isinstance(video_ids, str):
             video_ids = [video_ids]  # Convierte a lista
         
+        workers = settings.YOUTUBE_CLIENT_CONFIG['workers_detalles']
+        prioridad = prioridad_actual()  # Los hilos del pool cobran con la prioridad de quien llama
+        ids = sin_repetir(video_ids)
+        ventanas = deque()  # (ids, cacheados, lotes en vuelo) en orden de entrada
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # Se piden hasta dos ventanas por adelantado: mientras se entrega
+                # una, los lotes de la siguiente ya están en la red
+                while len(ventanas) < 2:
+                    ventana = list(itertools.islice(ids, LOTE_DETALLES * workers))
+                    if not ventana:
+                        break
+                    ventanas.append(self._pedir_ventana(pool, ventana, prioridad))
+                if not ventanas:
+                    return
+                yield from self._entregar_ventana(*ventanas.popleft(), guardar_en_cache)
+    
+    def _pedir_ventana(self, pool, ventana, prioridad):
+        """
+        Busca la ventana en caché y manda al pool los IDs que faltan, de 50 en 50
+        
+        Los vencidos (TTL suave) se entregan igual y se refrescan juntos en
+        segundo plano (stale-while-revalidate), sin hacer esperar a nadie.
+        """
+        
+        claves = {video_id: cache_detalles.construir_clave(id=video_id) for video_id in ventana}
+        en_cache, vencidas = cache_detalles.obtener_varios(list(claves.values()))
+        cacheados = {video_id: en_cache[clave] for video_id, clave in claves.items() if clave in en_cache}
+        faltantes = [video_id for video_id in ventana if video_id not in cacheados]
+        if vencidas:
+            por_clave = {clave: video_id for video_id, clave in claves.items()}
+            cache_detalles.revalidar_varios(
+                vencidas, lambda pendientes: self._refrescar_detalles([por_clave[c] for c in pendientes])
+            )
+        lotes = [
+            pool.submit(self._consultar_en_pool, faltantes[i:i + LOTE_DETALLES], prioridad)
+            for i in range(0, len(faltantes), LOTE_DETALLES)
+        ]
+        return ventana, cacheados, lotes
+    
+    def _entregar_ventana(self, ventana, detalles, lotes, guardar_en_cache):
+        """Espera los lotes de una ventana, los cachea y la entrega en orden"""
+        
+        for lote in lotes:
+            nuevos = {video['youtube_id']: video for video in lote.result()}
+            if guardar_en_cache:
+                cache_detalles.guardar_varios(
+                    {cache_detalles.construir_clave(id=video_id): video for video_id, video in nuevos.items()}
+                )
+            detalles.update(nuevos)
+        for video_id in ventana:
+            if video_id in detalles:
+                yield detalles[video_id]
+    
+    def _refrescar_detalles(self, video_ids):
+        """{clave de cache_detalles: video} para refrescar entradas vencidas (lotes de 50)"""
+        
+        return {
+            cache_detalles.construir_clave(id=video['youtube_id']): video
+            for i in range(0, len(video_ids), LOTE_DETALLES)
+            for video in self._consultar_detalles(video_ids[i:i + LOTE_DETALLES])
+        }
+    
+    def _consultar_en_pool(self, video_ids, prioridad):
+        """_consultar_detalles desde un hilo del pool, que no tiene quien cierre su conexión a la BD"""
+        try:
+            return self._consultar_detalles(video_ids, prioridad)
+        finally:
+            connection.close()
+
+    def _consultar_detalles(self, video_ids, prioridad=None):
+        """Llama a videos.list (hasta 50 IDs) y convierte cada item al formato del modelo Video"""
+        
         # Llamar endpoint videos.list
-        videos_response = self.youtube.videos().list(  # Obtiene detalles
+        videos_response, _ = ejecutar_condicional(self.youtube.videos().list(  # Obtiene detalles (If-None-Match)
             id=','.join(video_ids),  # IDs separados por coma
             part='snippet,contentDetails,statistics'  # Incluye snippet, duración y stats
-        ).execute()
-        
-        videos = []  # Lista para almacenar resultados
-        
-        for item in videos_response.get('items', []):  # Itera resultados
-            snippet = item['snippet']  # Información básica
-            statistics = item.get('statistics', {})  # Estadísticas (puede no existir)
-            content = item['contentDetails']  # Detalles de contenido
-            
-            # Parsear duración ISO 8601 (PT15M30S → 15:30)
-            duracion_iso = content.get('duration', 'PT0S')  # Obtiene duración
-            duracion_segundos = isodate.parse_duration(duracion_iso).total_seconds()  # Convierte a segundos
-            
-            video_data = {  # Construye diccionario con datos
-                'youtube_id': item['id'],  # ID del video
-                'titulo': snippet['title'],  # Título
-                'descripcion': snippet['description'],  # Descripción
-                'canal_id': snippet['channelId'],  # ID del canal
-                'canal_nombre': snippet['channelTitle'],  # Nombre del canal
-                'fecha_publicacion': datetime.fromisoformat(  # Convierte a datetime
-                    snippet['publishedAt'].replace('Z', '+00:00')
-                ),
-                'url_thumbnail': snippet['thumbnails']['high']['url'],  # Miniatura alta resolución
-                'url_video': f"https://www.youtube.com/watch?v={item['id']}",  # URL completa
-                'duracion': duracion_iso,  # Duración en formato ISO
-                'duracion_segundos': int(duracion_segundos),  # Duración en segundos
-                'vistas': int(statistics.get('viewCount', 0)),  # Visualizaciones
-                'likes': int(statistics.get('likeCount', 0)),  # Me gusta
-                'comentarios': int(statistics.get('commentCount', 0)),  # Comentarios
-                'etiquetas': ','.join(snippet.get('tags', [])),  # Tags separados por coma
-            }
-            
-            videos.append(video_data)  # Agrega a la lista
+        ), prioridad=prioridad)
+        
+        # Convierte cada item al formato del modelo Video
+        videos = [item_a_video(item) for item in videos_response.get('items', [])]
         
         return videos  # Retorna lista de videos
     
     def obtener_videos_canal(self, canal_id, max_resultados=20):
-        """Obtiene videos de un canal específico"""
-        
-        search_response = self.youtube.search().list(
-            channelId=canal_id,  # Filtrar por canal
-            part='id',
-            type='video',
-            order='date',  # Más recientes primero
-            maxResults=max_resultados
-        ).execute()
+        """
+        Obtiene videos de un canal específico (con caché stale-while-revalidate)
+
+        Args:
+            canal_id: ID del canal (UC...)
+            max_resultados: Videos más recientes a traer; None = el canal completo
+        """
         
-        video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+        cache_key = cache_canales.construir_clave(channelId=canal_id, maxResults=max_resultados)
+        return cache_canales.obtener_o_calcular(
+            cache_key, lambda: list(self.recorrer_canal(canal_id, max_resultados))
+        )
+    
+    def obtener_playlist_subidas(self, canal_id):
+        """ID de la playlist 'uploads' del canal (channels.list, 1 unidad, una sola vez por canal)"""
+        
+        clave = CACHE_SUBIDAS.format(canal_id=canal_id)
+        playlist_id = cache.get(clave)
+        if playlist_id is None:
+            respuesta = ejecutar(self.youtube.channels().list(part='contentDetails', id=canal_id))
+            items = respuesta.get('items', [])
+            if not items:
+                return None  # Canal inexistente o cerrado
+            playlist_id = items[0]['contentDetails']['relatedPlaylists']['uploads']
+            cache.set(clave, playlist_id, timeout=None)
+        return playlist_id
+    
+    def iterar_ids_canal(self, canal_id, max_resultados=None):
+        """
+        Genera los IDs de los videos del canal, del más reciente al más antiguo
+
+        Pagina la playlist de subidas (playlistItems.list, 1 unidad por 50
+        videos) en vez de search.list (100 unidades por página) y deja de
+        pedir páginas en cuanto se alcanza `max_resultados`.
+        """
         
-        if video_ids:
-            return self.obtener_detalles_videos(video_ids)
+        playlist_id = self.obtener_playlist_subidas(canal_id)
+        if playlist_id is None:
+            return
+        por_pagina = min(LOTE_DETALLES, max_resultados or LOTE_DETALLES)
+        ids = (
+            item['contentDetails']['videoId']
+            for items in iterar_playlist(self.youtube, playlist_id, por_pagina, part='contentDetails')
+            for item in items
+        )
+        yield from itertools.islice(ids, max_resultados)
+    
+    def recorrer_canal(self, canal_id, max_resultados=None):
+        """
+        Genera los detalles de los videos del canal en lotes de 50 IDs
+
+        Cada lote es un videos.list (1 unidad): un canal de 5,000 videos
+        cuesta ~200 unidades (100 páginas + 100 lotes) en vez de 10,000+
+        con search.list. Los IDs se consumen a medida que llegan las
+        páginas, sin juntar la lista completa antes de empezar.
+        """
         
-        return []
+        return self.obtener_detalles_videos(
+            self.iterar_ids_canal(canal_id, max_resultados),
+            guardar_en_cache=False  # Miles de entradas por canal; obtener_videos_canal ya guarda la lista
+        )
     
     def _calcular_engagement(self, stats):
         """Calcula tasa de engagement (2026 metric)"""
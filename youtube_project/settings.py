@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -83,6 +83,8 @@ DATABASES = {
         'PASSWORD': '12345678',            # Contraseña del usuario
         'HOST': 'localhost',                 # Servidor (local)
         'PORT': '3306',                      # Puerto por defecto de MySQL
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),  # Segundos que se reutiliza la conexión (0 = una por petición)
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),  # Verifica la conexión antes de reutilizarla
         'OPTIONS': {
             'charset': 'utf8mb4',           # Soporte para emojis y caracteres especiales
         }
@@ -94,11 +96,30 @@ YOUTUBE_API_KEY = config('YOUTUBE_API_KEY')
 YOUTUBE_API_SERVICE_NAME = 'youtube'
 YOUTUBE_API_VERSION = 'v3'
 
+# Fábrica de clientes (videos/youtube_client.py)
+YOUTUBE_CLIENT_CONFIG = {
+    'discovery_cache_dir': BASE_DIR / '.discovery_cache',  # Copia en disco si la librería no trae el documento
+    'timeout': 30,  # Segundos por petición HTTP
+    'workers_detalles': 4,  # Lotes de 50 IDs de videos.list en paralelo (obtener_detalles_videos)
+    'conexiones_async': 20,  # Conexiones simultáneas del pool httpx (videos/youtube_async.py)
+    'api_endpoint': config('YOUTUBE_API_ENDPOINT', default=''),  # Vacío = Google; p. ej. http://127.0.0.1:8765/ para el servidor falso
+}
+
 # OAuth 2.0 - Sin restricciones para cuenta personal
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET')
 GOOGLE_REDIRECT_URI = config('GOOGLE_REDIRECT_URI')
 
+# Cifrado de refresh tokens (Fernet.generate_key()); la primera clave cifra y todas
+# descifran, así se rota agregando una clave nueva al inicio de la lista
+FERNET_KEYS = config('FERNET_KEYS', default='', cast=Csv())
+
+YOUTUBE_CREDENTIALS_CONFIG = {
+    'max_en_memoria': 500,  # Credenciales vivas en el LRU de cada proceso
+    'margen_refresco': 300,  # Se renueva el access token cuando le quedan menos de N segundos
+    'intervalo_refresco': 60,  # Segundos entre revisiones del hilo de refresco
+}
+
 YOUTUBE_SCOPES = [
     'https://www.googleapis.com/auth/youtube',  # Gestión completa
     'https://www.googleapis.com/auth/youtube.upload',  # Subir videos
@@ -122,9 +143,74 @@ YOUTUBE_QUOTA_CONFIG = {
     'daily_limit': 15000,  # Aumentado de 10,000
     'warning_threshold': 12000,  # 80% de la cuota
     'enable_cache': True,  # Cachear búsquedas repetidas
-    'cache_ttl': 3600,  # 1 hora
+    'cache_ttl': 3600,  # TTL duro (1 hora): la entrada expira y se espera a la API
+    'cache_soft_ttl': 1800,  # TTL suave (30 min): se sirve lo cacheado y se refresca en segundo plano
+    'detail_freshness': 900,  # Segundos que una fila de Video se sirve sin volver a la API
+    'lote_registro': 200,  # Filas de QuotaUsage acumuladas antes de un bulk_create
+    'intervalo_registro': 30,  # Segundos máximos que una fila espera en el buffer
+    'zona_horaria': 'America/Los_Angeles',  # La cuota de YouTube se reinicia a medianoche del Pacífico
+    'reserva_interactiva': 3000,  # Unidades que los procesos en segundo plano nunca pueden usar
+    'margen_ritmo': 0.1,  # Fracción del día que el segundo plano puede adelantarse a su ritmo
+    'peticiones_condicionales': True,  # If-None-Match con el ETag guardado (304 = sin descargar ni escribir)
+    'etag_ttl': 86400,  # Segundos que se guarda el ETag de una lectura (y su cuerpo); acota el atraso de vistas_por_dia
+}
+
+# Caché compartida entre workers (por defecto en disco; en producción puede ser Redis:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://127.0.0.1:6379)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+        'TIMEOUT': YOUTUBE_QUOTA_CONFIG['cache_ttl'],
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),  # Los detalles se cachean por video
+        },
+    }
 }
 
+# Sincronización en segundo plano (python manage.py sincronizar_estadisticas)
+YOUTUBE_SYNC_CONFIG = {
+    'intervalo': 900,  # Segundos entre corridas del worker (15 min)
+    'workers': 4,  # Páginas de 50 IDs consultadas en paralelo
+    'lote_escritura': 1000,  # Filas por bulk_update
+    'intervalo_ingesta': 300,  # mis_videos ingresa el canal a lo sumo una vez cada N segundos por sesión
+    'duracion_max_short': 180,  # Segundos: hasta aquí un video cuenta como Short
+    'tolerancia_vistas_por_dia': 0.05,  # El sync reescribe un video sin cambios si su vistas_por_dia se desvió más que esto
+}
+
+# Búsqueda en la biblioteca local (mis_videos)
+YOUTUBE_SEARCH_CONFIG = {
+    'motor': config('SEARCH_BACKEND', default='auto'),  # auto (FULLTEXT en MySQL, índice en memoria en otros), fulltext, indice
+    'max_resultados': 200,  # Resultados rankeados que se devuelven como máximo
+    'reconstruir_cada': 600,  # Segundos máximos de vida del índice en memoria
+}
+
+# Paginación por cursor (keyset) de los listados
+YOUTUBE_PAGINATION_CONFIG = {
+    'tamano_pagina': config('PAGE_SIZE', default=25, cast=int),  # Videos por página
+    'tamano_maximo': 100,  # Tope para ?por_pagina=
+    'conteo_aproximado': True,  # Total desde ResumenEstadisticas en vez de COUNT(*)
+}
+
+# Subidas reanudables por partes
+YOUTUBE_UPLOAD_CONFIG = {
+    'chunk_size': 8 * 1024 * 1024,  # 8 MB por parte (múltiplo de 256 KB)
+    'max_reintentos': 8,  # Reintentos por parte antes de fallar
+    'espera_maxima': 64,  # Tope en segundos del backoff exponencial
+    'workers': config('UPLOAD_WORKERS', default=2, cast=int),  # Subidas simultáneas por proceso
+    'pool_en_proceso': True,  # False = solo las procesa `manage.py procesar_subidas`
+    'espera_procesamiento': 600,  # Segundos máximos esperando a que YouTube procese el video
+    'intervalo_procesamiento': 15,  # Segundos entre consultas de processingStatus
+    'directorio_spool': config('UPLOAD_SPOOL_DIR', default=str(BASE_DIR / 'spool')),  # Videos recibidos pendientes de subir
+}
+
+# Los videos se escriben directo al spool mientras llegan; el resto de archivos sigue el flujo normal
+FILE_UPLOAD_HANDLERS = [
+    'videos.upload_handlers.VideoSpoolUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Categorías de YouTube actualizadas 2026
 YOUTUBE_CATEGORIES = {
     '1': 'Film & Animation',